@@ -6,6 +6,8 @@ Comprehensive fix for ALL modules - handles all corrupted patterns
 
 import re
 
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 print("Reading file...")
@@ -35,9 +37,9 @@ for pattern in arrow_patterns:
 
 # 3. Fix Launch Simulator buttons - replace corrupted rocket emoji
 launch_pattern = r'<span[^>]*className="mr-2"[^>]*>[^<]*Ã[^<]*?</span>\s*Launch Simulator'
-matches = len(re.findall(launch_pattern, content))
+matches = len(budgeted.findall(launch_pattern, content))
 if matches > 0:
-    content = re.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content)
+    content = budgeted.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content)
     fixed_count += matches
     print(f"Fixed {matches} Launch Simulator buttons")
 
@@ -51,17 +53,17 @@ if matches > 0:
 
 # 5. Fix Next Topic buttons  
 next_pattern = r'(Next Topic:[^<]*?)Ã¢â[^<]*?(</Button>)'
-matches = len(re.findall(next_pattern, content))
+matches = len(budgeted.findall(next_pattern, content))
 if matches > 0:
-    content = re.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content)
+    content = budgeted.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content)
     fixed_count += matches
     print(f"Fixed {matches} Next Topic buttons")
 
 # 6. Fix bullet points in span tags
 bullet_span_pattern = r'(<span[^>]*className="text-primary"[^>]*>)[^<]*Ã[^<]*?(</span>)'
-matches = len(re.findall(bullet_span_pattern, content))
+matches = len(budgeted.findall(bullet_span_pattern, content))
 if matches > 0:
-    content = re.sub(bullet_span_pattern, r'\1•\2', content)
+    content = budgeted.sub(bullet_span_pattern, r'\1•\2', content)
     fixed_count += matches
     print(f"Fixed {matches} bullet point spans")
 
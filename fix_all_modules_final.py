@@ -7,6 +7,8 @@ Comprehensive fix for ALL modules - final version
 import re
 import sys
 
+from repair import budgeted
+
 # Set UTF-8 encoding for console output
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -41,9 +43,9 @@ for pattern in arrow_patterns:
 
 # 3. Fix Launch Simulator buttons
 launch_pattern = r'<span[^>]*className="mr-2"[^>]*>[^<]*Ã[^<]*?</span>\s*Launch Simulator'
-matches = len(re.findall(launch_pattern, content))
+matches = len(budgeted.findall(launch_pattern, content))
 if matches > 0:
-    content = re.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content)
+    content = budgeted.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content)
     fixed_count += matches
     changes.append(f"Launch Simulator buttons: {matches}")
 
@@ -57,17 +59,17 @@ if matches > 0:
 
 # 5. Fix Next Topic buttons  
 next_pattern = r'(Next Topic:[^<]*?)Ã¢â[^<]*?(</Button>)'
-matches = len(re.findall(next_pattern, content))
+matches = len(budgeted.findall(next_pattern, content))
 if matches > 0:
-    content = re.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content)
+    content = budgeted.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content)
     fixed_count += matches
     changes.append(f"Next Topic buttons: {matches}")
 
 # 6. Fix bullet points in span tags
 bullet_span_pattern = r'(<span[^>]*className="text-primary"[^>]*>)[^<]*Ã[^<]*?(</span>)'
-matches = len(re.findall(bullet_span_pattern, content))
+matches = len(budgeted.findall(bullet_span_pattern, content))
 if matches > 0:
-    content = re.sub(bullet_span_pattern, r'\1•\2', content)
+    content = budgeted.sub(bullet_span_pattern, r'\1•\2', content)
     fixed_count += matches
     changes.append(f"Bullet spans: {matches}")
 
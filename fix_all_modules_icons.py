@@ -7,6 +7,10 @@ Fixes corrupted emojis, icons, bullet points, and arrows across all modules
 
 import re
 
+from repair import budgeted
+from repair.decode import decode_mojibake
+from repair.engine import Replacer
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 print("Reading file...")
@@ -39,8 +43,8 @@ replacements.extend([
 
 # 3. Fix Launch Simulator icons - replace corrupted rocket emoji spans
 launch_pattern = r'<span[^>]*className="mr-2"[^>]*>[^<]*Ã[^<]*</span>\s*Launch Simulator'
-content = re.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content, flags=re.MULTILINE)
-if re.search(launch_pattern, content):
+content = budgeted.sub(launch_pattern, '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator', content, flags=re.MULTILINE)
+if budgeted.search(launch_pattern, content):
     fixed_count += 1
     print("Fixed Launch Simulator buttons")
 
@@ -49,67 +53,33 @@ prev_pattern = r'(<Button[^>]*onClick=\{\(\) => navigate\([^)]*\)\}[^>]*>)\s*Ã
 content = re.sub(prev_pattern, r'\1<ArrowLeft className="mr-2 h-4 w-4 inline" /> Previous Topic', content, flags=re.MULTILINE)
 
 next_pattern = r'(Next Topic:[^<]*?)Ã¢â[^<]*?(</Button>)'
-content = re.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content, flags=re.MULTILINE)
+content = budgeted.sub(next_pattern, r'\1 <ArrowRight className="ml-2 h-4 w-4 inline" />\2', content, flags=re.MULTILINE)
 
 # 5. Fix corrupted emoji icons in arrays and text
-# Common emoji patterns that get corrupted
-emoji_replacements = {
-    # Technology emojis
-    r'Ã°Å¸Å¡â¬': '💻',  # Laptop/computer
-    r'Ã°Å¸â¥Ã¯Â¸Â': '🖥️',  # Desktop
-    r'Ã°Å¸â"Å': '🔌',  # Plug
-    r'Ã°Å¸Â§Â': '🧠',  # Brain
-    r'Ã°Å¸â\'\xadÂ¾': '💾',  # Floppy disk
-    r'Ã°Å¸â\'\xadÂ¿': '💽',  # Disk
-    r'Ã°Å¸â\'\xad\xa2': '💪',  # Flex/bicep
-    r'Ã°Å¸â\'\xad¤–': '🤖',  # Robot
-    r'Ã°Å¸â\'\xad": '🔄',  # Refresh
-    r'Ã°Å¸Å¡â\x80": '🚀',  # Rocket
-    r'Ã°Å¸Å¡Â«': '🔧',  # Wrench
-    r'Ã°Å¸Å¡Â¦': '📦',  # Package
-    r'Ã°Å¸â"§': '🔧',  # Wrench
-    r'Ã°Å¸â\'\xadŽ': '💎',  # Gem
-    r'Ã°Å¸â\'\xad°': '💰',  # Money bag
-    r'Ã°Å¸Å¡Â¦': '📦',  # Package
-    r'Ã°Å¸Å¡â\x80': '🚀',  # Rocket
-    r'Ã°Å¸Å¡â¬': '💻',  # Laptop
-    r'Ã°Å¸â¥Ã¯Â¸Â': '🖥️',  # Desktop
-    r'Ã°Å¸â"Å': '🔌',  # Plug
-    
-    # Warning/symbol emojis
-    r'âš¡': '⚡',  # Lightning
-    r'âš™ï¸': '⚙️',  # Gear
-    r'âœ…': '✅',  # Checkmark
-    r'Ã°Å¸â\'\xad¤': '🎯',  # Target
-}
-
-# Apply emoji replacements
-for pattern, replacement in emoji_replacements.items():
-    matches = len(re.findall(pattern, content))
-    if matches > 0:
-        content = re.sub(pattern, replacement, content)
-        fixed_count += matches
-        print(f"Fixed {matches} instances of emoji pattern")
-
-# 6. Apply simple text replacements
-for old, new in replacements:
-    count = content.count(old)
+content, decoded = decode_mojibake(content)
+if decoded > 0:
+    fixed_count += decoded
+    print(f"Decoded {decoded} corrupted emoji sequences")
+
+# 6. Apply simple text replacements (one pass over the file)
+replacer = Replacer(replacements)
+content, counts = replacer.sub(content)
+for old, count in counts.items():
     if count > 0:
-        content = content.replace(old, new)
         fixed_count += count
-        print(f"Fixed {count} instances of '{old[:20]}...' → '{new}'")
+        print(f"Fixed {count} instances of '{old[:20]}...' → '{replacer.table[old]}'")
 
 # 7. Fix bullet points in span tags specifically
 bullet_span_pattern = r'(<span[^>]*className="text-primary"[^>]*>)[^<]*Ã[^<]*?(</span>)'
-matches = len(re.findall(bullet_span_pattern, content))
+matches = len(budgeted.findall(bullet_span_pattern, content))
 if matches > 0:
-    content = re.sub(bullet_span_pattern, r'\1•\2', content)
+    content = budgeted.sub(bullet_span_pattern, r'\1•\2', content)
     fixed_count += matches
     print(f"Fixed {matches} bullet point spans")
 
 # 8. Fix corrupted emojis in icon fields (like in arrays)
 icon_field_pattern = r'(icon:\s*"[^"]*)Ã[^"]*(")'
-matches = len(re.findall(icon_field_pattern, content))
+matches = len(budgeted.findall(icon_field_pattern, content))
 if matches > 0:
     # This is trickier - we'll handle common ones
     icon_fixes = [
@@ -125,7 +95,7 @@ if matches > 0:
 
 # 9. Fix text-4xl divs with corrupted emojis
 text_4xl_pattern = r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)'
-matches = len(re.findall(text_4xl_pattern, content))
+matches = len(budgeted.findall(text_4xl_pattern, content))
 if matches > 0:
     # Replace with a placeholder or try to decode
     # For now, we'll leave these as they might be context-specific
@@ -8,6 +8,9 @@ Uses aggressive pattern matching to catch everything
 import re
 import sys
 
+from repair import budgeted
+from repair.engine import replace_all
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -46,12 +49,11 @@ known_fixes = {
 }
 
 # Apply known fixes
-for corrupted, replacement in known_fixes.items():
-    count = content.count(corrupted)
+content, counts = replace_all(content, known_fixes.items())
+for corrupted, count in counts.items():
     if count > 0:
-        content = content.replace(corrupted, replacement)
         fixed_count += count
-        print(f"Fixed '{corrupted[:20]}' → '{replacement}': {count} instances")
+        print(f"Fixed '{corrupted[:20]}' → '{known_fixes[corrupted]}': {count} instances")
 
 # Fix all remaining Ã patterns in specific contexts
 lines = content.split('\n')
@@ -61,7 +63,7 @@ for i, line in enumerate(lines):
     
     # Fix in span tags (bullet points)
     if '<span' in line and 'Ã' in line:
-        line = re.sub(r'(<span[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
+        line = budgeted.sub(r'(<span[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
     
     # Fix in div tags (icons)
     if '<div' in line and 'text-4xl' in line and 'Ã' in line:
@@ -79,7 +81,7 @@ for i, line in enumerate(lines):
         elif 'Storage' in context or 'HDD' in context or 'SSD' in context:
             emoji = '💾'
         
-        line = re.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+        line = budgeted.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
     
     # Fix in text content (not in tags)
     if 'Ã' in line and not ('<' in line and '>' in line):
@@ -109,10 +111,9 @@ replacements = [
     ('Ã¢Å"', '✅'),
 ]
 
-for old, new in replacements:
-    count = content.count(old)
+content, counts = replace_all(content, replacements)
+for old, count in counts.items():
     if count > 0:
-        content = content.replace(old, new)
         fixed_count += count
         print(f"Final pass: Fixed '{old[:15]}': {count}")
 
@@ -1,67 +1,42 @@
-file_path = 'src/pages/ModuleDetail.tsx'
+from repair.context import ContextIndex
+from repair.mapped import repair_file
+from repair.sections import SectionMap
 
-# Read as bytes to handle exact pattern
-with open(file_path, 'rb') as f:
-    content = f.read()
+file_path = 'src/pages/ModuleDetail.tsx'
 
 # The corrupted bullet pattern (double-encoded)
 bad_bytes = b'\xc3\x83\xc2\xa2\xc3\xa2\xc2\x82\xc2\xac\xc3\x82\xc2\xa2'
 good_bytes = b'\xe2\x80\xa2'  # UTF-8 for bullet •
 
-# Also try the UTF-8 decoded version
-bad_utf8 = bad_bytes.decode('utf-8', errors='ignore')
-good_utf8 = '•'
-
-# Count occurrences
-count_before = content.count(bad_bytes)
-print(f"Found {count_before} instances of corrupted bullet pattern")
+found = 0
+fixed_lines = []
+sections = None
+lines = None
 
-# Only replace in Module 1 context - convert to string for context check
-content_str = content.decode('utf-8', errors='replace')
-lines = content_str.split('\n')
 
-# Track which lines to fix
-lines_to_fix = set()
+def in_module1(buf, offset):
+    # Only replace inside Module 1: getModule1Sections() and the
+    # moduleId === 1 render branches, looked up in the section map
+    global found, sections, lines
+    found += 1
+    if sections is None:
+        sections = SectionMap.from_source(buf)
+        lines = ContextIndex(buf, [])
+    if sections.module_at(offset) != 1:
+        return False
+    if len(fixed_lines) < 15:
+        fixed_lines.append(lines.line_of(offset) + 1)
+    return True
 
-for i, line in enumerate(lines):
-    context_start = max(0, i-100)
-    context_end = min(len(lines), i+100)
-    context = '\n'.join(lines[context_start:context_end])
-    
-    in_module1 = (
-        'moduleId === 1' in context or 
-        '/module/1/' in context or 
-        'topicId === "3"' in context or
-        'topicId === "2"' in context or
-        'Hardware Basics' in context or
-        'Types of Computers' in context
-    )
-    
-    if in_module1 and bad_utf8 in line:
-        lines_to_fix.add(i)
 
-print(f"Found {len(lines_to_fix)} lines in Module 1 to fix")
+# Memory-mapped: matches the bytes in place and streams the rewrite
+edits = repair_file(file_path, [(bad_bytes, good_bytes)], keep=in_module1)
 
-# Rebuild content with fixes
-new_lines = []
-fixed = 0
-for i, line in enumerate(lines):
-    if i in lines_to_fix:
-        new_line = line.replace(bad_utf8, good_utf8)
-        if new_line != line:
-            fixed += 1
-            if fixed <= 15:
-                print(f"Line {i+1}: Fixed bullet point")
-            new_lines.append(new_line)
-        else:
-            new_lines.append(line)
-    else:
-        new_lines.append(line)
+print(f"Found {found} instances of corrupted bullet pattern")
+for line_no in fixed_lines:
+    print(f"Line {line_no}: Fixed bullet point")
 
-if fixed > 0:
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines))
-    print(f"\nFixed {fixed} bullet points in Module 1")
+if edits:
+    print(f"\nFixed {len(edits)} bullet points in Module 1")
 else:
     print("No fixes needed")
@@ -1,3 +1,5 @@
+from repair.sections import SectionMap
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 # Read as bytes first to see exact pattern
@@ -20,26 +22,18 @@ fixed = 0
 original = content
 
 # Only replace in Module 1 context
-import re
+# Exact extents of getModule1Sections() and the moduleId === 1 branches
+sections = SectionMap.from_source(content)
 
 # Split into lines for context checking
 lines = content.split('\n')
 new_lines = []
+offset = 0
 
 for i, line in enumerate(lines):
-    # Check Module 1 context
-    context_start = max(0, i-100)
-    context_end = min(len(lines), i+100)
-    context = '\n'.join(lines[context_start:context_end])
-    
-    in_module1 = (
-        'moduleId === 1' in context or 
-        '/module/1/' in context or 
-        'topicId === "3"' in context or
-        'topicId === "2"' in context or
-        'Hardware Basics' in context or
-        'Types of Computers' in context
-    )
+    # A line belongs to Module 1 if it starts or ends inside one of its sections
+    in_module1 = 1 in (sections.module_at(offset), sections.module_at(offset + len(line)))
+    offset += len(line) + 1
     
     if in_module1:
         original_line = line
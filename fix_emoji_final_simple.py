@@ -6,6 +6,8 @@ Simple direct fix for remaining emoji corruption
 
 import re
 
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
@@ -70,7 +72,7 @@ for i, line in enumerate(lines):
         
         # Replace any corrupted content in the div
         old = line
-        line = re.sub(r'(<div[^>]*text-5xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+        line = budgeted.sub(r'(<div[^>]*text-5xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
         if line != original_line:
             fixed += 1
     
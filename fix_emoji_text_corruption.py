@@ -12,6 +12,9 @@ Specifically fixes:
 import re
 import sys
 
+from repair.engine import Replacer
+from repair.rules import load_rules
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -24,6 +27,7 @@ with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
 original = content
 fixed_count = 0
 changes = []
+rules = load_rules()
 
 # 1. Fix partially fixed emojis with trailing corruption
 # Pattern: Emoji followed by corrupted characters
@@ -31,19 +35,8 @@ changes = []
 
 # Remove trailing corrupted characters after emojis
 # Match emoji (Unicode range) followed by corrupted patterns
-emoji_cleanup_patterns = [
-    (r'([\u{1F300}-\u{1F9FF}][\uFE00-\uFE0F]?)\s*â[^\s<>"]*Ã[^\s<>"]*', r'\1'),  # Emoji + corrupted
-    (r'([\u{1F300}-\u{1F9FF}][\uFE00-\uFE0F]?)\s*Ã[^\s<>"]*', r'\1'),  # Emoji + corrupted variant
-    (r'⚠️â[^\s<>"]*Ã[^\s<>"]*', '⚠️'),  # Specific warning emoji cleanup
-    (r'(✅|❌|💾|🧠|💿|📁|🔒|🔐|🔑|🚀|💻|🖥️|🔌|📱|🤖|📄|📊|💬|💥|⚡|⚙️|🎯|🛡️|🔍|📞|📟|📷|📢|🦠|🪱|💰|🔧|📦|🏰|🚪|💎|⌨️|🙆|👆|🔐|🔑|🔇|🪟|🎬|🖼️|📋|🗑️|📡|👁️)\s*â[^\s<>"]*Ã[^\s<>"]*', r'\1'),  # Clean known emojis
-]
-
-for pattern, replacement in emoji_cleanup_patterns:
-    matches = len(re.findall(pattern, content, re.UNICODE))
-    if matches > 0:
-        content = re.sub(pattern, replacement, content, flags=re.UNICODE)
-        fixed_count += matches
-        changes.append(f"Cleaned {matches} emoji trailing corruption")
+content, hits = rules.apply(content, 'emoji_text_corruption.cleanup', report=changes.append, tsx=True)
+fixed_count += sum(hits.values())
 
 # 2. Fix corrupted emoji patterns in text
 # Ã°Å¸â'â patterns - these are corrupted file/document emojis
@@ -68,38 +61,21 @@ corrupted_emoji_patterns = [
     ('Ã¯Â¸Â', ''),  # Remove standalone variation selector
 ]
 
-for corrupted, replacement in corrupted_emoji_patterns:
-    count = content.count(corrupted)
+replacer = Replacer(corrupted_emoji_patterns)
+content, counts = replacer.sub(content)
+for corrupted, count in counts.items():
     if count > 0:
-        content = content.replace(corrupted, replacement)
         fixed_count += count
-        changes.append(f"Fixed '{corrupted[:15]}...' → '{replacement}': {count}")
+        changes.append(f"Fixed '{corrupted[:15]}...' → '{replacer.table[corrupted]}': {count}")
 
 # 3. Fix corrupted patterns in icon fields
-icon_field_fixes = [
-    (r'icon:\s*"Ã°Å¸â\'â"', 'icon: "📄"'),
-    (r'icon:\s*"Ã°Å¸â\'Â"', 'icon: "📁"'),
-    (r'icon:\s*"Ã°Å¸â\'Â¤"', 'icon: "💬"'),
-    (r'icon:\s*"Ã°Å¸â\'Â¥"', 'icon: "💥"'),
-    (r'icon:\s*"Ã°Å¸â\'Â±"', 'icon: "📱"'),
-    (r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "⚠️"'),  # Generic corrupted icon
-]
-
-for pattern, replacement in icon_field_fixes:
-    matches = len(re.findall(pattern, content))
-    if matches > 0:
-        content = re.sub(pattern, replacement, content)
-        fixed_count += matches
-        changes.append(f"Fixed icon fields: {matches}")
+content, hits = rules.apply(content, 'emoji_text_corruption.icon_fields', report=changes.append, tsx=True)
+fixed_count += sum(hits.values())
 
 # 4. Clean up emoji variation selectors (Ã¯Â¸Â)
 # These should be removed when they appear after emojis or alone
-variation_selector_pattern = r'([\u{1F300}-\u{1F9FF}])\s*Ã¯Â¸Â'
-matches = len(re.findall(variation_selector_pattern, content, re.UNICODE))
-if matches > 0:
-    content = re.sub(variation_selector_pattern, r'\1', content, flags=re.UNICODE)
-    fixed_count += matches
-    changes.append(f"Removed {matches} emoji variation selectors")
+content, hits = rules.apply(content, 'emoji_text_corruption.variation_selectors', report=changes.append, tsx=True)
+fixed_count += sum(hits.values())
 
 # Also fix standalone variation selectors
 standalone_vs = content.count(' Ã¯Â¸Â')
@@ -109,23 +85,8 @@ if standalone_vs > 0:
     changes.append(f"Removed {standalone_vs} standalone variation selectors")
 
 # 5. Fix specific corrupted text patterns in content
-text_cleanup_patterns = [
-    # Common corrupted emoji combinations
-    (r'Ã°Å¸â\'â', '📄'),
-    (r'Ã°Å¸â\'Â', '📁'),
-    (r'Ã°Å¸Â"°', '🏰'),
-    (r'Ã°Å¸â\'Â¡', '🚪'),
-    (r'Ã°Å¸â\'Å½', '💎'),
-    (r'Ã°Å¸â\'Â¾', '💾'),
-    (r'Ã°Å¸â\'Â¿', '💿'),
-]
-
-for pattern, replacement in text_cleanup_patterns:
-    count = len(re.findall(pattern, content))
-    if count > 0:
-        content = re.sub(pattern, replacement, content)
-        fixed_count += count
-        changes.append(f"Fixed text pattern '{pattern[:15]}...': {count}")
+content, hits = rules.apply(content, 'emoji_text_corruption.text_cleanup', report=changes.append, tsx=True)
+fixed_count += sum(hits.values())
 
 # 6. Clean any remaining emoji + corrupted patterns more aggressively
 # Match any emoji followed by corrupted characters and clean it
@@ -7,6 +7,8 @@ Direct fix for corrupted emoji text patterns
 import re
 import sys
 
+from repair import budgeted
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -48,7 +50,7 @@ corrupted_fixes = [
     ('Ã¢"â"Ã¯Â¸Â', '✅'),  # Checkmark
     ('Ã°Å¸â"Â¼Ã¯Â¸Â', '🖼️'),  # Picture
     ('Ã°Å¸â"Å"Ã¯Â¸Â', '🔑'),  # Key
-    ('Ã°Å¸â"â'Ã¯Â¸Â', '📊'),  # Chart
+    ("Ã°Å¸â\"â'Ã¯Â¸Â", '📊'),  # Chart
     ('Ã¢â Â©Ã¯Â¸Â', '©️'),  # Copyright
     ('Ã°Å¸Â¦Â¿Ã¯Â¸Â', '🛡️'),  # Shield
     ('Ã°Å¸â"Â¥Ã¯Â¸Â', '🖥️'),  # Desktop
@@ -96,7 +98,7 @@ for i, line in enumerate(lines):
         
         # Replace corrupted emoji in text-5xl divs
         old = line
-        line = re.sub(r'(<div[^>]*text-5xl[^>]*>)[^<]*Ã[^<]*?Ã¯Â¸Â?[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+        line = budgeted.sub(r'(<div[^>]*text-5xl[^>]*>)[^<]*Ã[^<]*?Ã¯Â¸Â?[^<]*?(</div>)', f'\\1{emoji}\\2', line)
         
         if line != original_line:
             fixed_count += 1
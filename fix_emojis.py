@@ -1,101 +1,22 @@
 
 import os
 
-replacements = [
-    ("â†’", "→"),
-    ("ðŸ” ", "🔍"),
-    ("ðŸ”£", "🔣"),
-    ("âš™ï¸ ", "⚙️"),
-    ("ðŸ’»", "💻"),
-    ("ðŸ”§", "🔧"),
-    ("ðŸ§ ", "🧠"),
-    ("ðŸ“ ", "📂"),
-    ("ðŸ”Œ", "🔌"),
-    ("ðŸ›¡ï¸ ", "🛡️"),
-    ("ðŸ“‚", "📂"),
-    ("ðŸ §", "🐧"),
-    ("â€¢", "•"),
-    ("â†’", "→"),
-    ("â† ", "←"),
-    ("Ã¢â‚¬â€œ", "-"),
-    ("Ã¢â‚¬â€", "—"),
-    ("ðŸŽ¯", "🎯"),
-    ("ðŸ’¾", "💾"),
-    ("ðŸ’ª", "💪"),
-    ("ðŸ¤–", "🤖"),
-    ("ðŸ”„", "🔄"),
-    ("âœ…", "✅"),
-    ("âŒ¨ï¸ ", "⌨️"),
-    ("ðŸ–±ï¸ ", "🖱️"),
-    ("ðŸ–¥ï¸ ", "🖥️"),
-    ("ðŸ–¨ï¸ ", "🖨️"),
-    ("ðŸ“·", "📷"),
-    ("ðŸŒ ", "🌐"),
-    ("ðŸ“„", "📄"),
-    ("ðŸŽ®", "🎮"),
-    ("ðŸŽ¨", "🎨"),
-    ("ðŸŽ¤", "🎤"),
-    ("ðŸ“¹", "📹"),
-    ("ðŸ‘†", "👆"),
-    ("ðŸ”Š", "🔊"),
-    ("ðŸ“½ï¸ ", "📽️"),
-    ("ðŸŽ§", "🎧"),
-    ("ðŸ“¶", "📶"),
-    ("ðŸ“ ", "📏"),
-    ("ðŸ¦„", "🦄"),
-    ("ðŸ ¶", "🐶"),
-    ("ðŸ“±", "📱"),
-    ("ðŸ”¢", "🔢"),
-    ("ðŸ§¬", "🧬"),
-    ("ðŸ— ï¸ ", "🗝️"),
-    ("âš ï¸ ", "⚠️"),
-    ("âš”ï¸ ", "⚔️"),
-    ("ðŸ °", "🏰"),
-    ("ðŸ’Ž", "💎"),
-    ("ðŸ Ž", "🍎"),
-    ("Ã—", "×"),
-    ("Ã·", "÷"),
-    ("ðŸ”µ", "🔵"),
-    ("ðŸš€", "🚀"),
-    ("ðŸ“¦", "📦"),
-    ("ðŸ’¿", "💽"),
-    ("ðŸ”’", "🔒"),
-    ("ðŸ’°", "💰"),
-    ("ðŸ”‡", "🔇"),
-    ("ðŸªŸ", "🪟"),
-    ("ðŸŽ¬", "🎬"),
-    ("ðŸ–¼ï¸ ", "🖼️"),
-    ("ðŸ“‹", "📋"),
-    ("ðŸ—‘ï¸ ", "🗑️"),
-    ("ðŸ—¹ï¸ ", "🗑️"),
-    ("ðŸ“¡", "📡"),
-    ("ðŸ‘ ï¸ ", "👁️"),
-    ("âš¡", "⚡"),
-    ("Ã¢â\x82¬â\x80\x9c", "-"),
-    ("Ã¢â\x82¬â\x80\x9d", "—"),
-    ("Ã¢â\x80\x94", "—"),
-    ("ðŸ\" ", "🔍"),
-    ("ðŸ\"£", "🔣"),
-    ("ðŸ\"🔍", "🔍"),
-    ("âš块", "⚠️"),
-    ("âš\xadï¸\x8f", "⚙️"),
-    ("Ã\x97", "×"),
-    ("Ã·", "÷"),
-    ("ðŸ\x9a\x80", "🚀"),
-    ("ðŸ\x92\xbb", "💻"),
-    ("ðŸ\x92\xaa", "💪"),
-    ("ðŸ\x92\xbe", "💾"),
-    ("ðŸ\x92\xbf", "💽"),
-    ("â\x9c\x85", "✅"),
-    ("â\x8c\xa8ï¸\x8f", "⌨️"),
-    ("ðŸ\xa7\xa0", "🧠"),
-    ("ðŸ\xa7\xec", "🧬")
-]
+from repair import emojimap
+from repair.decode import LOSSY_RESIDUALS, decode_mojibake
+from repair.engine import Replacer
+
+# Everything repair.decode can undo is handled there; the table covers
+# the lossy leftovers, and the generated emoji table whatever lossy form
+# it is sure of (loaded only when a file can still hold one)
+replacer = Replacer(LOSSY_RESIDUALS)
 
 files = [
-    r'c:\Users\HP\OneDrive\Desktop\all-compu-foundation\loveable-compu-f\compu-foundation-learn-main\src\pages\ModuleDetail.tsx',
-    r'c:\Users\HP\OneDrive\Desktop\all-compu-foundation\loveable-compu-f\compu-foundation-learn-main\src\data\lessons.ts'
+    'src/pages/ModuleDetail.tsx',
+    'src/data/lessons.ts'
 ]
+# As a repair.pipeline stage only the pipeline's target is ours to write
+if 'PIPELINE_TARGET' in globals():
+    files = [PIPELINE_TARGET]
 
 for file_path in files:
     if not os.path.exists(file_path):
@@ -109,8 +30,9 @@ for file_path in files:
             content = f.read()
         
         original_content = content
-        for bad, good in replacements:
-            content = content.replace(bad, good)
+        content, _ = decode_mojibake(content)
+        content, _ = replacer.sub(content)
+        content, _ = emojimap.sub(content)
         
         if content != original_content:
             # Write as UTF-8
@@ -16,21 +16,20 @@ original = content
 # This is more aggressive but should catch all variations
 import re
 
+from repair.context import ContextIndex
+
 # Pattern: <span...>ANY_CORRUPTED_TEXT</span> Launch Simulator
 # Only in Module 1 context
+module1_markers = ['/module/1/', 'topicId === "m1-t', 'moduleId === 1']
+context = ContextIndex(content, module1_markers)
 lines = content.split('\n')
 new_lines = []
 fixed_count = 0
 
 for i, line in enumerate(lines):
     if 'Launch Simulator' in line:
-        # Check context for Module 1
-        context_start = max(0, i - 50)
-        context_end = min(len(lines), i + 10)
-        context = '\n'.join(lines[context_start:context_end])
-        
-        # Only fix Module 1
-        if '/module/1/' in context or 'topicId === "m1-t' in context or 'moduleId === 1' in context:
+        # Only fix Module 1 (50 lines above, 9 below)
+        if context.any_near(module1_markers, i, 50, 10):
             # Replace the entire corrupted span pattern
             if '<span' in line and '</span>' in line:
                 # Replace any span with corrupted text before "Launch Simulator"
@@ -53,9 +52,6 @@ else:
     # Debug: show what we're looking for
     for i, line in enumerate(lines):
         if 'Launch Simulator' in line:
-            context_start = max(0, i - 10)
-            context_end = min(len(lines), i + 5)
-            context = '\n'.join(lines[context_start:context_end])
-            if '/module/1/' in context:
+            if context.near('/module/1/', i, 10, 5):
                 print(f"\nFound Launch Simulator at line {i+1}:")
                 print(f"  Content: {repr(line[:100])}")
@@ -1,49 +1,49 @@
+import re
+
+from repair.patch import AnchorError, Line, Patch, add_import, apply_patches, corrupted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
-with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-    lines = f.readlines()
-
-# Line 7934 (index 7933) has the corrupted Launch Simulator button
-# Replace the corrupted span with Rocket icon
-if len(lines) > 7933:
-    line = lines[7933]
-    print(f"Original line 7934: {repr(line[:100])}")
-    
-    # Replace the corrupted span pattern
-    import re
-    new_line = re.sub(
-        r'<span className="mr-2">[^<]*</span> Launch Simulator',
-        '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator',
+with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+    lines = f.read().split('\n')
+
+# The corrupted Launch Simulator buttons of Module 1 (the first one used
+# to be line 7934). Anchored on the button line itself - whatever icon is
+# in the span, the ASCII skeleton is the same - and limited to lines inside
+# Module 1's sections, instead of a line number and a 50-line look-back.
+# Only a span whose icon is corrupted is replaced; a clean one is kept
+LAUNCH_BUTTON = '<span className="mr-2"></span> Launch Simulator'
+
+
+def use_rocket(line):
+    return re.sub(
+        r'<span className="mr-2">([^<]*)</span> Launch Simulator',
+        lambda m: ('<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator'
+                   if corrupted(m.group(1)) else m.group(0)),
         line
     )
-    
-    if new_line != line:
-        lines[7933] = new_line
-        print(f"New line 7934: {repr(new_line[:100])}")
-        
-        # Check for other Launch Simulator buttons in Module 1 context
-        for i in range(len(lines)):
-            if i != 7933 and 'Launch Simulator' in lines[i]:
-                # Check context
-                context_start = max(0, i-50)
-                context_end = min(len(lines), i+10)
-                context = ''.join(lines[context_start:context_end])
-                if '/module/1/' in context or 'module/1/topic' in context:
-                    old = lines[i]
-                    lines[i] = re.sub(
-                        r'<span className="mr-2">[^<]*</span> Launch Simulator',
-                        '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator',
-                        old
-                    )
-                    if lines[i] != old:
-                        print(f"Also fixed line {i+1}")
-        
-        # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
-        print("\nFixed Launch Simulator button(s)")
-    else:
-        print("Line 7934 doesn't match expected pattern")
-        print(f"Full line: {repr(line)}")
-else:
-    print(f"File has only {len(lines)} lines, line 7934 doesn't exist")
+
+
+patch = Patch(Line(LAUNCH_BUTTON, every=True, module=1), use_rocket)
+lines, changed, problems = apply_patches(lines, [patch])
+
+for _, problem in problems:
+    print(f"Launch Simulator button not found: {problem}")
+
+for line_number, _ in changed:
+    print(f"Fixed line {line_number}: {lines[line_number - 1].strip()[:100]!r}")
+
+if changed:
+    try:
+        if add_import(lines, 'Rocket'):
+            print("Added Rocket to the lucide-react import")
+    except AnchorError as e:
+        print(f"Not writing: the buttons use <Rocket /> but {e}")
+        changed = []
+
+if changed:
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\n'.join(lines))
+    print("\nFixed Launch Simulator button(s)")
+elif not problems:
+    print("Launch Simulator button(s) already fixed")
@@ -1,3 +1,5 @@
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
@@ -17,8 +19,7 @@ for line_idx, search_term, emoji in powercard_fixes:
         if search_term in ''.join(lines[max(0, line_idx-2):line_idx+5]):
             old = lines[line_idx]
             # Replace any corrupted emoji pattern
-            import re
-            lines[line_idx] = re.sub(r'"[^"]*Ã[^"]*"', f'"{emoji}"', lines[line_idx])
+            lines[line_idx] = budgeted.sub(r'"[^"]*Ã[^"]*"', f'"{emoji}"', lines[line_idx])
             if lines[line_idx] != old:
                 fixed += 1
                 print(f"Line {line_idx+1}: Fixed {search_term} icon")
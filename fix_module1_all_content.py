@@ -9,6 +9,8 @@ Comprehensive fix for Module 1 content corruption:
 
 import re
 
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
@@ -18,21 +20,21 @@ original = content
 fixed_count = 0
 
 # Fix 1: powerCards array icons (Module 1, topic 2)
-content = re.sub(
+content = budgeted.sub(
     r'(const powerCards = \[[^\]]*?icon:\s*")Ã°Å¸Å¡â¬(")',
     r'\1💻\2',
     content,
     flags=re.DOTALL
 )
 
-content = re.sub(
+content = budgeted.sub(
     r'(icon:\s*")Ã°Å¸â¥Ã¯Â¸Â("[\s\S]*?title:\s*"Servers")',
     r'\1🖥️\2',
     content,
     flags=re.DOTALL
 )
 
-content = re.sub(
+content = budgeted.sub(
     r'(icon:\s*")Ã°Å¸â"Å("[\s\S]*?title:\s*"Embedded Systems")',
     r'\1🔌\2',
     content,
@@ -7,6 +7,8 @@ Fix corrupted characters in Module 1 content sections:
 3. Arrows in text
 """
 
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
@@ -62,15 +64,14 @@ for i, line in enumerate(lines):
                 # Try to identify and replace corrupted emojis
                 # Common patterns: server rack, embedded chip, supercomputer
                 if 'Server' in context or 'server' in line:
-                    line = re.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "🖥️"', line)
+                    line = budgeted.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "🖥️"', line)
                 elif 'Embedded' in context or 'embedded' in line:
-                    line = re.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "🔌"', line)
+                    line = budgeted.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "🔌"', line)
                 elif 'Supercomputer' in context or 'supercomputer' in line:
-                    line = re.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "💻"', line)
+                    line = budgeted.sub(r'icon:\s*"[^"]*Ã[^"]*"', 'icon: "💻"', line)
                 else:
                     # Generic fix - remove corrupted part
-                    import re
-                    line = re.sub(r'"[^"]*Ã[^"]*"', '"⚠️"', line)
+                    line = budgeted.sub(r'"[^"]*Ã[^"]*"', '"⚠️"', line)
                 
                 if line != lines[i]:
                     fixed_count += 1
@@ -82,7 +83,6 @@ for i, line in enumerate(lines):
                 in_power_cards = False
 
 # Fix corrupted emojis in text-4xl divs (Why It Matters sections)
-import re
 for i, line in enumerate(lines):
     context_start = max(0, i-30)
     context_end = min(len(lines), i+10)
@@ -93,8 +93,8 @@ for i, line in enumerate(lines):
         # Fix text-4xl emoji divs
         if 'text-4xl' in line and 'Ã°' in line:
             # Replace corrupted emoji with placeholder or remove
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã°[^<]*</div>', 
-                         '<div className="text-4xl">⚠️</div>', line)
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã°[^<]*</div>', 
+                               '<div className="text-4xl">⚠️</div>', line)
             if line != lines[i]:
                 fixed_count += 1
                 print(f"Line {i+1}: Fixed text-4xl emoji")
@@ -4,6 +4,8 @@
 Final fix for Module 1 icon issues - handles corrupted UTF-8 characters
 """
 
+from repair import budgeted
+
 file_path = 'src/pages/ModuleDetail.tsx'
 
 # Read file with error handling
@@ -27,8 +29,7 @@ for i, line in enumerate(lines):
             # Replace any corrupted span before "Launch Simulator"
             if '<span' in line:
                 # Use regex to find and replace the span
-                import re
-                line = re.sub(
+                line = budgeted.sub(
                     r'<span[^>]*className="mr-2"[^>]*>.*?</span>\s*Launch Simulator',
                     '<Rocket className="mr-2 h-5 w-5 inline" /> Launch Simulator',
                     line
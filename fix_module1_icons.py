@@ -4,6 +4,8 @@ Fix corrupted emoji/unicode icons in Module 1 topics only.
 Replaces corrupted text with proper React icon components.
 """
 
+from repair import budgeted
+
 file_path = r'src/pages/ModuleDetail.tsx'
 
 # Read file
@@ -74,7 +76,7 @@ for i, line in enumerate(lines):
     # Check if this line has corrupted next topic AND is in Module 1 context
     context = '\n'.join(lines[max(0, i-10):min(len(lines), i+5)])
     if '/module/1/topic' in context and 'Ã¢â' in line and 'Next Topic:' in line:
-        line = re.sub(next_regex, replace_next, line)
+        line = budgeted.sub(next_regex, replace_next, line)
         changes_made = True
         print(f"Fixed Next Topic button at line {i+1}")
     new_lines.append(line)
@@ -7,6 +7,9 @@ Aggressive fix for remaining 151 corrupted characters
 import re
 import sys
 
+from repair import budgeted
+from repair.context import ContextIndex
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -18,6 +21,20 @@ with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
 original = content
 fixed_count = 0
 
+# Context keyword -> emoji, first match wins
+div_emojis = [
+    (['RAM', 'Memory'], '💾'),
+    (['CPU', 'Processor'], '🧠'),
+    (['ROM', 'Firmware'], '💿'),
+    (['File'], '📁'),
+    (['Storage', 'HDD', 'SSD', 'Disk'], '💾'),
+    (['Network', 'Internet'], '🌐'),
+    (['Security', 'Password', 'Firewall'], '🔒'),
+    (['Advantages', 'Benefits'], '✅'),
+    (['Disadvantages', 'Drawbacks'], '❌'),
+]
+context = ContextIndex(content, [k for keywords, _ in div_emojis for k in keywords])
+
 # Aggressive replacement: Replace all corrupted patterns with appropriate defaults
 lines = content.split('\n')
 new_lines = []
@@ -32,46 +49,32 @@ for i, line in enumerate(lines):
     
     # 2. Fix all span tags with corrupted content (bullet points)
     if '<span' in line and 'Ã' in line:
-        line = re.sub(r'(<span[^>]*className="[^"]*text-primary[^"]*"[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
-        line = re.sub(r'(<span[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
+        line = budgeted.sub(r'(<span[^>]*className="[^"]*text-primary[^"]*"[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
+        line = budgeted.sub(r'(<span[^>]*>)[^<]*Ã[^<]*?(</span>)', r'\1•\2', line)
     
     # 3. Fix all div tags with text-4xl and corrupted content
     if '<div' in line and 'text-4xl' in line and 'Ã' in line:
-        context = ''.join(lines[max(0, i-15):min(len(lines), i+15)])
+        # 15 lines above, 14 below
         emoji = '⚠️'
-        if 'RAM' in context or 'Memory' in context:
-            emoji = '💾'
-        elif 'CPU' in context or 'Processor' in context:
-            emoji = '🧠'
-        elif 'ROM' in context or 'Firmware' in context:
-            emoji = '💿'
-        elif 'File' in context:
-            emoji = '📁'
-        elif 'Storage' in context or 'HDD' in context or 'SSD' in context or 'Disk' in context:
-            emoji = '💾'
-        elif 'Network' in context or 'Internet' in context:
-            emoji = '🌐'
-        elif 'Security' in context or 'Password' in context or 'Firewall' in context:
-            emoji = '🔒'
-        elif 'Advantages' in context or 'Benefits' in context:
-            emoji = '✅'
-        elif 'Disadvantages' in context or 'Drawbacks' in context:
-            emoji = '❌'
+        for keywords, candidate in div_emojis:
+            if context.any_near(keywords, i, 15, 15):
+                emoji = candidate
+                break
         
-        line = re.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
-        line = re.sub(r'(<div[^>]*text-3xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+        line = budgeted.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+        line = budgeted.sub(r'(<div[^>]*text-3xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
     
     # 4. Fix icon fields in objects/arrays
     if 'icon:' in line and 'Ã' in line:
         # Common icon replacements
-        line = re.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1⚠️\2', line)
+        line = budgeted.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1⚠️\2', line)
         # But try to preserve known patterns
         if 'RAM' in line or 'Memory' in line:
-            line = re.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1💾\2', line)
+            line = budgeted.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1💾\2', line)
         elif 'CPU' in line:
-            line = re.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1🧠\2', line)
+            line = budgeted.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1🧠\2', line)
         elif 'Storage' in line or 'HDD' in line or 'SSD' in line:
-            line = re.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1💾\2', line)
+            line = budgeted.sub(r'(icon:\s*")[^"]*Ã[^"]*(")', r'\1💾\2', line)
     
     # 5. Fix checkmarks/arrows in advantages sections
     if 'Advantages' in line or 'Benefits' in line:
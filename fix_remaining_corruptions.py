@@ -7,6 +7,8 @@ Second pass - fix remaining corrupted patterns
 import re
 import sys
 
+from repair import budgeted
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -95,10 +97,10 @@ content = '\n'.join(new_lines)
 
 # Fix text-4xl divs with corrupted emojis - replace with placeholder
 text_4xl_pattern = r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)'
-matches = len(re.findall(text_4xl_pattern, content))
+matches = len(budgeted.findall(text_4xl_pattern, content))
 if matches > 0:
     # Try to decode common ones, or use placeholder
-    content = re.sub(text_4xl_pattern, r'\1⚠️\2', content)
+    content = budgeted.sub(text_4xl_pattern, r'\1⚠️\2', content)
     fixed_count += matches
     changes.append(f"text-4xl divs: {matches}")
 
@@ -7,6 +7,9 @@ Fix specific corrupted patterns directly
 import re
 import sys
 
+from repair import budgeted
+from repair.context import ContextIndex
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -15,6 +18,8 @@ file_path = 'src/pages/ModuleDetail.tsx'
 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
     lines = f.readlines()
 
+context = ContextIndex(''.join(lines), ['RAM', 'Memory', 'CPU', 'ROM', 'File'])
+
 fixed = 0
 
 # Fix specific patterns line by line
@@ -33,18 +38,17 @@ for i, line in enumerate(lines):
     # Fix "Why It Matters" section emojis
     if 'text-4xl' in line and 'Ã' in line:
         # Check context
-        context = ''.join(lines[max(0, i-10):min(len(lines), i+10)])
-        if 'RAM' in context or 'Memory' in context:
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">💾</div>', line)
-        elif 'CPU' in context:
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">🧠</div>', line)
-        elif 'ROM' in context:
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">💿</div>', line)
-        elif 'File' in context:
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">📁</div>', line)
+        if context.any_near(['RAM', 'Memory'], i, 10, 10):
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">💾</div>', line)
+        elif context.near('CPU', i, 10, 10):
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">🧠</div>', line)
+        elif context.near('ROM', i, 10, 10):
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">💿</div>', line)
+        elif context.near('File', i, 10, 10):
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">📁</div>', line)
         else:
             # Generic fix
-            line = re.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">⚠️</div>', line)
+            line = budgeted.sub(r'<div[^>]*text-4xl[^>]*>[^<]*Ã[^<]*?</div>', '<div className="text-4xl mb-4">⚠️</div>', line)
     
     if line != original:
         lines[i] = line
@@ -53,7 +57,7 @@ for i, line in enumerate(lines):
             print(f"Line {i+1}: Fixed")
 
 # Also do global replacements
-content = '\n'.join(lines)
+content = ''.join(lines)
 
 # Fix all remaining bullet points
 bullet_count = content.count('Ã¢â¬Â¢')
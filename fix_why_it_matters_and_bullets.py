@@ -7,6 +7,8 @@ Fix "Why It Matters" section icons and remaining bullet points
 import re
 import sys
 
+from repair import budgeted
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -21,7 +23,7 @@ fixed_count = 0
 # 1. Fix "Why It Matters" section emojis in text-4xl divs
 # These are corrupted emojis that should be context-specific
 why_it_matters_pattern = r'(<div[^>]*text-4xl[^>]*mb-4[^>]*>)[^<]*Ã[^<]*?(</div>[\s\S]*?Understanding (RAM|CPU|ROM|File Systems|File Extensions|File Management))'
-matches = len(re.findall(why_it_matters_pattern, content, re.IGNORECASE))
+matches = len(budgeted.findall(why_it_matters_pattern, content, re.IGNORECASE))
 if matches > 0:
     # Map context to emoji
     context_emojis = {
@@ -39,7 +41,7 @@ if matches > 0:
         emoji = context_emojis.get(context, '⚠️')
         return f'{div_tag}{emoji}</div>{match.group(2)}'
     
-    content = re.sub(why_it_matters_pattern, replace_why_matters, content, flags=re.IGNORECASE)
+    content = budgeted.sub(why_it_matters_pattern, replace_why_matters, content, flags=re.IGNORECASE)
     fixed_count += matches
     print(f"Fixed {matches} 'Why It Matters' section emojis")
 
@@ -72,7 +74,7 @@ for pattern, icon in advantage_icons:
 
 # 4. Fix text-4xl divs with any corrupted content - replace with placeholder
 text_4xl_pattern = r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)'
-matches = len(re.findall(text_4xl_pattern, content))
+matches = len(budgeted.findall(text_4xl_pattern, content))
 if matches > 0:
     # Try to detect context and use appropriate emoji
     lines = content.split('\n')
@@ -100,7 +102,7 @@ if matches > 0:
                 emoji = '🔒'
             
             old = line
-            line = re.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
+            line = budgeted.sub(r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)', f'\\1{emoji}\\2', line)
             if line != old:
                 fixed_count += 1
                 if fixed_count <= 20:
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the fix_*.py repair scripts
+"""
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repair benchmark suite
+
+Generates synthetic corrupted corpora (see repair.corpus) and times each
+repair script and repair mode on a fresh copy, each in its own process.
+Throughput (MB/s of input) and peak RSS are appended to a JSONL results
+file in the repair cache and compared with the previous run of the same
+target, size and density, so regressions show up between runs.
+
+Usage: python -m repair.bench [--size 100KB --size 10MB ...] [--density 0.3]
+                              [--target NAME ...] [--results FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from repair import cache
+from repair.corpus import MODES, parse_size, write_corpus
+from repair.pipeline import STAGES, TARGET
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(cache.CACHE_DIR, 'bench_results.jsonl')
+SIZES = ['100KB', '1MB', '10MB']
+
+# name -> arguments for the interpreter, run with the corpus at TARGET
+# inside a scratch directory
+TARGETS = {
+    'fix_all_modules_comprehensive.py': [os.path.join(REPO, 'fix_all_modules_comprehensive.py')],
+    'fix_remaining_aggressive.py': [os.path.join(REPO, 'fix_remaining_aggressive.py')],
+    'pipeline': ['-m', 'repair.pipeline'],
+    'stream': ['-m', 'repair.stream', TARGET, '--in-place'],
+    'tree': ['-m', 'repair.tree', 'src', '--jobs', '1'],
+}
+for _stage in STAGES:
+    TARGETS.setdefault(_stage, [os.path.join(REPO, _stage)])
+
+DEFAULT_TARGETS = ['fix_all_modules_comprehensive.py', 'fix_remaining_aggressive.py',
+                   'pipeline', 'stream', 'tree']
+
+# Runs a target and records its own peak RSS at exit. A child's ru_maxrss
+# also counts the parent's pages it inherited before exec, so the child
+# reads VmHWM of its post-exec address space instead.
+_LAUNCHER = r"""
+import atexit, runpy, sys
+out, args = sys.argv[1], sys.argv[2:]
+
+def peak():
+    kb = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    kb = int(line.split()[1])
+    except OSError:
+        try:
+            import resource
+            kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            kb = kb // 1024 if sys.platform == 'darwin' else kb
+        except ImportError:
+            pass
+    with open(out, 'w') as f:
+        f.write('' if kb is None else str(kb))
+
+atexit.register(peak)
+if args[0] == '-m':
+    sys.argv = args[1:]
+    runpy.run_module(args[1], run_name='__main__', alter_sys=True)
+else:
+    sys.argv = args
+    runpy.run_path(args[0], run_name='__main__')
+"""
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(['git', '-C', REPO, 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_target(args, workdir):
+    """(seconds, peak RSS in MB or None, exit code) of one run"""
+    env = dict(os.environ, PYTHONPATH=REPO + os.pathsep + os.environ.get('PYTHONPATH', ''),
+               REPAIR_CACHE_DIR=os.path.join(workdir, '.repair_cache'))
+    peak_file = os.path.join(workdir, '.peak_rss')
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', _LAUNCHER, peak_file] + args, cwd=workdir,
+                          env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    try:
+        with open(peak_file, 'r') as f:
+            rss = int(f.read()) / 1024
+    except (OSError, ValueError):
+        rss = None
+    return seconds, rss, proc.returncode
+
+
+def _previous(results_file):
+    previous = {}
+    try:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                previous[(record['target'], record['bytes'], record['density'])] = record
+    except (OSError, ValueError):
+        pass
+    return previous
+
+
+def run_benchmarks(sizes=SIZES, density=0.3, targets=DEFAULT_TARGETS, repeat=1,
+                   results_file=RESULTS_FILE, seed=1):
+    previous = _previous(results_file)
+    revision = _git_revision()
+    scratch = tempfile.mkdtemp(prefix='repair-bench-')
+    records = []
+    try:
+        for size_text in sizes:
+            size = parse_size(size_text)
+            corpus = os.path.join(scratch, f'corpus-{size}.tsx')
+            size = write_corpus(corpus, size, density, MODES, seed)
+            print(f'\n{size_text} corpus ({size:,} bytes, density {density})')
+            print(f"  {'target':<36} {'s':>8} {'MB/s':>8} {'RSS MB':>8}  vs last")
+            for name in targets:
+                best = None
+                for _ in range(repeat):
+                    workdir = os.path.join(scratch, 'work')
+                    shutil.rmtree(workdir, ignore_errors=True)
+                    os.makedirs(os.path.join(workdir, os.path.dirname(TARGET)))
+                    shutil.copyfile(corpus, os.path.join(workdir, TARGET))
+                    run = run_target(TARGETS[name], workdir)
+                    if best is None or run[0] < best[0]:
+                        best = run
+                seconds, rss, code = best
+                record = {
+                    'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'revision': revision,
+                    'python': platform.python_version(),
+                    'target': name,
+                    'bytes': size,
+                    'density': density,
+                    'seconds': round(seconds, 4),
+                    'mb_per_s': round(size / 1e6 / seconds, 3),
+                    'peak_rss_mb': None if rss is None else round(rss, 1),
+                    'exit_code': code,
+                }
+                records.append(record)
+                last = previous.get((name, size, density))
+                change = ''
+                if last:
+                    change = f"{(record['mb_per_s'] / last['mb_per_s'] - 1) * 100:+.0f}%"
+                rss_text = '-' if rss is None else f'{rss:.1f}'
+                failed = f'  exit {code}' if code else ''
+                print(f"  {name:<36} {seconds:>8.3f} {record['mb_per_s']:>8.2f} {rss_text:>8}  {change}{failed}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(results_file) or '.', exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    print(f'\nAppended {len(records)} result(s) to {results_file}')
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', action='append', dest='sizes',
+                        help=f'corpus size, e.g. 100KB or 100MB (default: {", ".join(SIZES)})')
+    parser.add_argument('--density', type=float, default=0.3)
+    parser.add_argument('--target', action='append', dest='targets', choices=sorted(TARGETS),
+                        help='what to time (default: %s)' % ', '.join(DEFAULT_TARGETS))
+    parser.add_argument('--all-stages', action='store_true', help='also time every pipeline stage')
+    parser.add_argument('--repeat', type=int, default=1, help='keep the best of N runs')
+    parser.add_argument('--results', default=RESULTS_FILE)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    targets = args.targets or list(DEFAULT_TARGETS)
+    if args.all_stages:
+        targets += [stage for stage in STAGES if stage not in targets]
+    records = run_benchmarks(args.sizes or SIZES, args.density, targets, args.repeat,
+                             args.results, args.seed)
+    return 1 if any(r['exit_code'] for r in records) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Budgeted regex calls for the fix_*.py scripts
+
+The scripts' inline patterns are mostly of the [^<]*Ã[^<]*? kind that
+repair.safety flags as able to backtrack badly. sub(), subn(), search()
+and findall() here take the arguments of their re namesakes. A pattern
+with hazards is first run over the same text in repair.safety's worker
+process; when that takes longer than the budget the call raises
+TimeoutError instead of stalling the script, which the pipeline then
+rolls back like any failing stage. Patterns without hazards go straight
+to re.
+
+`python -m repair.safety --scripts` fails on hazardous patterns that a
+script passes to re directly.
+"""
+
+import re
+from functools import lru_cache
+
+from repair import safety
+
+BUDGET_MS = safety.DEFAULT_BUDGET_MS
+
+_worker = None
+
+
+@lru_cache(maxsize=None)
+def _hazardous(pattern, flags):
+    return bool(safety.hazards(pattern, flags))
+
+
+def _probe(name, pattern, flags, string):
+    # Runs in the worker: the same scan the call will make, result dropped
+    compiled = re.compile(pattern, flags)
+    if name == 'search':
+        compiled.search(string)
+    else:
+        for _ in compiled.finditer(string):
+            pass
+
+
+def _check(name, pattern, string, flags):
+    """Raises TimeoutError when a hazardous pattern is over budget on string"""
+    global _worker
+    if not _hazardous(pattern, flags):
+        return
+    if _worker is None:
+        _worker = safety.Worker()
+    _worker.call(_probe, (name, pattern, flags, string), BUDGET_MS / 1000)
+
+
+def sub(pattern, repl, string, count=0, flags=0):
+    _check('sub', pattern, string, flags)
+    return re.sub(pattern, repl, string, count=count, flags=flags)
+
+
+def subn(pattern, repl, string, count=0, flags=0):
+    _check('subn', pattern, string, flags)
+    return re.subn(pattern, repl, string, count=count, flags=flags)
+
+
+def search(pattern, string, flags=0):
+    _check('search', pattern, string, flags)
+    return re.search(pattern, string, flags)
+
+
+def findall(pattern, string, flags=0):
+    _check('findall', pattern, string, flags)
+    return re.findall(pattern, string, flags)
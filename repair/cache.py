@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Small on-disk cache for derived data (section maps, rule metadata, ...)
+
+Entries are JSON files named after what they were derived from, so a
+changed input simply misses the cache; load_bytes/store_bytes keep raw
+bytes (a file's last repaired contents) the same way. Every edit leaves
+entries for texts that will not come back, so a store keeps only the
+KEEP most recently used entries of its kind (a hit counts as a use) and
+deletes the rest; a kind with one entry per source file passes a bigger
+keep. Set REPAIR_CACHE_DIR to move the cache and
+REPAIR_CACHE_KEEP to keep more.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+CACHE_DIR = os.environ.get('REPAIR_CACHE_DIR', '.repair_cache')
+KEEP = int(os.environ.get('REPAIR_CACHE_KEEP', '32'))
+
+
+def digest(data):
+    """Content hash used as cache key"""
+    if isinstance(data, str):
+        data = data.encode('utf-8', errors='surrogatepass')
+    return hashlib.sha1(data).hexdigest()
+
+
+def _path(kind, key, suffix='.json'):
+    return os.path.join(CACHE_DIR, f'{kind}-{key}{suffix}')
+
+
+def _used(path):
+    # The modification time doubles as the last use, for _evict
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _evict(kind, keep):
+    """Delete all but the keep most recently used entries of kind"""
+    # Keys are digests, some with a qualifier ('-bytes', '-py311')
+    entry = re.compile(re.escape(kind) + r'-[0-9a-f]{40}(?:-[\w.]+)?\.(?:json|bin)')
+    try:
+        paths = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)
+                 if entry.fullmatch(name)]
+        if len(paths) <= keep:
+            return
+        used = {path: os.path.getmtime(path) for path in paths}
+    except OSError:
+        return
+    for path in sorted(paths, key=used.get, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load(kind, key):
+    """Cached value or None"""
+    path = _path(kind, key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _used(path)
+    return value
+
+
+def store(kind, key, value, keep=None):
+    """Best effort - a read-only checkout just runs uncached"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = _path(kind, key) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # dumps() uses the C encoder; dump() streams through the Python one
+            f.write(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, _path(kind, key))
+    except OSError:
+        return
+    _evict(kind, KEEP if keep is None else keep)
+
+
+def load_bytes(kind, key):
+    """Cached bytes or None"""
+    path = _path(kind, key, '.bin')
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    _used(path)
+    return data
+
+
+def store_bytes(kind, key, data, keep=None):
+    """Best effort, like store()"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = _path(kind, key, '.bin') + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, _path(kind, key, '.bin'))
+    except OSError:
+        return
+    _evict(kind, KEEP if keep is None else keep)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read-only corruption census
+
+The file is decoded once (which also validates it) and one regex pass
+finds every run of the characters repair.decode maps back to bytes, and
+every lone 'ð' or 'Ã' stub in front of a quote, tag or whitespace (the
+icon: "ð" left in lessons.ts when the rest of an emoji was dropped).
+Each run is classified by how many cp1252 layers it takes to decode:
+
+    double-emoji    ðŸ’¾          -> 💾
+    triple-emoji    Ã°Å¸â€™Â¾     -> 💾
+    symbol          â€¢ / Ã¢â‚¬Â¢ -> • → ✓ — ...
+    orphan-vs       ï¸ with no emoji in front
+    lossy-stub      ðŸ” , "ð" - bytes were dropped, nothing decodes
+    other           decodes to something else (accented text, ...)
+
+Counts are reported by class and by owning module/topic, with line:col
+positions. Nothing is written. Exit codes for pre-commit gates:
+0 clean, 1 suspect runs found, 2 a file could not be read or decoded.
+A clean ModuleDetail.tsx takes ~40ms. The breakdown needs the section
+map, which costs ~0.2s the first time a changed file has findings;
+--no-sections skips it.
+
+Usage: python -m repair.census [file ...] [--json] [--list] [--class NAME ...]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+
+from repair.context import ContextIndex
+from repair.decode import LOSSY_STUB, SUSPECT_RUN, decode_run
+from repair.pipeline import TARGET
+from repair.sections import SectionMap
+
+CLASSES = ('double-emoji', 'triple-emoji', 'symbol', 'orphan-vs', 'lossy-stub', 'other')
+
+# Runs of two or more suspect characters, and single-character stubs
+SUSPECT = re.compile(f'{SUSPECT_RUN.pattern}|{LOSSY_STUB.pattern}')
+_VS16_MOJIBAKE = 'ï¸'
+# E2 82 AC (€) read as cp1252 with the 0x82 lost, or arrows of E2 AC ..
+_STRIPPED_PUNCTUATION = ('â¬',)
+
+
+def _is_emoji(ch):
+    cp = ord(ch)
+    return (cp >= 0x1F000 or 0x2300 <= cp <= 0x23FF or 0x2600 <= cp <= 0x27BF
+            or 0x2B00 <= cp <= 0x2BFF)
+
+
+def _peel(text):
+    """Decode one cp1252 layer of every suspect run in text"""
+    repaired = 0
+
+    def swap(m):
+        nonlocal repaired
+        fixed, count = decode_run(m.group(0))
+        repaired += count
+        return fixed
+
+    return SUSPECT_RUN.sub(swap, text), repaired
+
+
+def classify(run):
+    """Class of one suspect run"""
+    if any(stub in run for stub in _STRIPPED_PUNCTUATION):
+        return 'symbol'
+    text = run
+    for layers in (1, 2, 3):
+        text, repaired = _peel(text)
+        if not repaired:
+            break
+        if SUSPECT_RUN.search(text):
+            continue   # another layer to peel
+        if any(_is_emoji(ch) for ch in text):
+            return 'double-emoji' if layers == 1 else 'triple-emoji'
+        if text.strip() == '\ufe0f':
+            return 'orphan-vs'
+        if all(unicodedata.category(ch)[0] in 'PSZ' or ch == '\ufe0f' for ch in text if ord(ch) > 0x7F):
+            return 'symbol'
+        return 'other'
+    if run.startswith(('ð', 'Ã°')) or run == 'Ã':
+        return 'lossy-stub'
+    if _VS16_MOJIBAKE in run:
+        return 'orphan-vs'
+    return 'other'
+
+
+class Finding:
+    __slots__ = ('file', 'offset', 'line', 'col', 'kind', 'text', 'module', 'topic')
+
+    def __init__(self, file, offset, line, col, kind, text, module=None, topic=None):
+        self.file = file
+        self.offset = offset
+        self.line = line
+        self.col = col
+        self.kind = kind
+        self.text = text
+        self.module = module
+        self.topic = topic
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def scan_text(text, file_path='<text>', with_sections=True):
+    """All suspect runs of one text, in order; offsets are in characters"""
+    matches = list(SUSPECT.finditer(text))
+    if not matches:
+        return []
+    lines = ContextIndex(text, [])
+    sections = None
+    if with_sections and file_path.endswith('.tsx'):
+        # Only built when something was found; cached by content hash
+        sections = SectionMap.from_source(text)
+    findings = []
+    for m in matches:
+        line = lines.line_of(m.start())
+        line_start = lines.newlines[line - 1] + 1 if line else 0
+        module, topic = sections.topic_at(m.start()) if sections else (None, None)
+        findings.append(Finding(file_path, m.start(), line + 1, m.start() - line_start + 1,
+                                classify(m.group(0)), m.group(0), module, topic))
+    return findings
+
+
+def scan_file(file_path, with_sections=True):
+    """Findings of one file; raises UnicodeDecodeError on invalid UTF-8"""
+    with open(file_path, 'rb') as f:
+        text = f.read().decode('utf-8')
+    return scan_text(text, file_path, with_sections)
+
+
+def _owner(finding, with_sections):
+    if not with_sections or not finding.file.endswith('.tsx'):
+        return ''
+    if finding.module is None:
+        return 'outside modules'
+    return f'module {finding.module}' + (f' topic {finding.topic}' if finding.topic else '')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', default=[TARGET])
+    parser.add_argument('--json', action='store_true', help='print findings as JSON lines')
+    parser.add_argument('--list', action='store_true', help='list every finding with line:col')
+    parser.add_argument('--no-sections', action='store_true',
+                        help='skip the module/topic breakdown (fastest gate)')
+    parser.add_argument('--class', dest='classes', action='append', choices=CLASSES,
+                        help='only count these classes')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    status = 0
+    findings = []
+    for file_path in args.files:
+        try:
+            found = scan_file(file_path, not args.no_sections)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f'❌ {file_path}: {e}', file=sys.stderr)
+            status = 2
+            continue
+        if args.classes:
+            found = [f for f in found if f.kind in args.classes]
+        findings.extend(found)
+
+    if args.json:
+        for f in findings:
+            print(json.dumps(f.as_dict(), ensure_ascii=False))
+    else:
+        if args.list:
+            for f in findings:
+                owner = _owner(f, not args.no_sections)
+                print(f'{f.file}:{f.line}:{f.col}: {f.kind} {f.text!r}' + (f' ({owner})' if owner else ''))
+        by_class = Counter(f.kind for f in findings)
+        by_owner = Counter((f.file, _owner(f, not args.no_sections)) for f in findings)
+        ms = (time.perf_counter() - start) * 1000
+        if findings:
+            print(f'{len(findings)} suspect run(s) in {ms:.0f}ms')
+            for kind in CLASSES:
+                if by_class[kind]:
+                    print(f'  {kind:<14} {by_class[kind]}')
+            print('By location:')
+            for (file_path, owner), count in sorted(by_owner.items(), key=lambda i: -i[1]):
+                print(f'  {count:>5}  {file_path} {owner}'.rstrip())
+        elif status == 0:
+            print(f'✅ No suspect runs in {len(args.files)} file(s) ({ms:.0f}ms)')
+
+    if findings and status == 0:
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword context index
+
+Replaces the "join lines[i-100:i+100] and test `in`" window checks.
+Each keyword is searched once over the whole text; per-line prefix sums
+then answer "does keyword K occur within lines [i-before, i+after)" in O(1).
+Works on str, bytes and mmap buffers.
+"""
+
+from bisect import bisect_left
+from itertools import accumulate
+
+
+def _positions(buf, needle):
+    pos = buf.find(needle)
+    while pos >= 0:
+        yield pos
+        pos = buf.find(needle, pos + 1)
+
+
+class ContextIndex:
+    """
+    Line-window keyword lookups over one text
+
+    Line numbers are 0-based, as in enumerate(content.split('\\n')).
+    A window [i-before, i+after) is the same slice lines[i-before:i+after]
+    the scripts used to join.
+    """
+
+    def __init__(self, buf, keywords):
+        newline = '\n' if isinstance(buf, str) else b'\n'
+        self.newlines = list(_positions(buf, newline))
+        self.line_count = len(self.newlines) + 1
+        self.prefix = {}
+        for keyword in keywords:
+            hits = [0] * self.line_count
+            for pos in _positions(buf, keyword):
+                hits[self.line_of(pos)] = 1
+            # prefix[k][i] = number of lines before line i holding k
+            self.prefix[keyword] = [0] + list(accumulate(hits))
+
+    def line_of(self, offset):
+        """0-based line holding a character/byte offset"""
+        return bisect_left(self.newlines, offset)
+
+    def near(self, keyword, line, before, after):
+        """True when keyword occurs in lines[line-before:line+after]"""
+        counts = self.prefix[keyword]
+        start = max(0, line - before)
+        end = min(self.line_count, line + after)
+        return end > start and counts[end] > counts[start]
+
+    def any_near(self, keywords, line, before, after):
+        return any(self.near(k, line, before, after) for k in keywords)
+
+    def first_near(self, keywords, line, before, after):
+        """First keyword (in the given order) found in the window, or None"""
+        for keyword in keywords:
+            if self.near(keyword, line, before, after):
+                return keyword
+        return None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic mojibake corpus generator
+
+Takes clean ModuleDetail.tsx-shaped TSX, repeats it up to the requested
+size and corrupts non-ASCII characters the ways the real file was
+corrupted:
+
+    single    one cp1252 round trip               💾 -> ðŸ’¾
+    double    two round trips                     💾 -> Ã°Å¸â€™Â¾
+    triple    three round trips
+    spaced    cp1252-undefined bytes became spaces 🔍 -> ðŸ” 
+    stripped  second trip via latin-1, C1 dropped  • -> Ã¢â¬Â¢
+
+The output is deterministic for a given seed.
+
+Usage: python -m repair.corpus OUT --size 10MB [--density 0.3] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+
+from repair.pipeline import SCRIPT_DIR, TARGET
+
+SOURCE = os.path.join(SCRIPT_DIR, TARGET)
+
+MODES = ('single', 'double', 'triple', 'spaced', 'stripped')
+
+_UNITS = {'': 1, 'B': 1, 'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3}
+_NON_ASCII = re.compile(r'[^\x00-\x7f]+')
+
+
+def parse_size(text):
+    """'100KB' -> 100000"""
+    m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', text.upper())
+    if not m:
+        raise ValueError(f'bad size: {text!r}')
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+
+def _round_trip(text, spaced=False):
+    """Encode as UTF-8 and read back as cp1252, as the Windows editor did"""
+    out = []
+    for b in text.encode('utf-8'):
+        try:
+            out.append(bytes([b]).decode('cp1252'))
+        except UnicodeDecodeError:
+            # 0x81, 0x8D, 0x8F, 0x90, 0x9D: kept as C1 controls, or spaces
+            out.append(' ' if spaced else chr(b))
+    return ''.join(out)
+
+
+def _strip_c1(text):
+    """Read back as latin-1 with the C1 controls dropped"""
+    raw = text.encode('utf-8').decode('latin-1')
+    return ''.join(ch for ch in raw if not '\x80' <= ch <= '\x9f')
+
+
+def corrupt(text, mode):
+    if mode == 'single':
+        return _round_trip(text)
+    if mode == 'double':
+        return _round_trip(_round_trip(text))
+    if mode == 'triple':
+        return _round_trip(_round_trip(_round_trip(text)))
+    if mode == 'spaced':
+        return _round_trip(text, spaced=True)
+    if mode == 'stripped':
+        return _strip_c1(_round_trip(text))
+    raise ValueError(f'unknown mode: {mode}')
+
+
+def generate(clean, size, density=0.3, modes=MODES, seed=1):
+    """Corrupted text of about `size` UTF-8 bytes built from clean"""
+    rng = random.Random(seed)
+    pieces = []
+    total = 0
+
+    def swap(m):
+        if rng.random() >= density:
+            return m.group(0)
+        return corrupt(m.group(0), rng.choice(modes))
+
+    while total < size:
+        piece = _NON_ASCII.sub(swap, clean)
+        encoded_len = len(piece.encode('utf-8'))
+        if total + encoded_len > size:
+            # Stop on a line boundary
+            piece = piece.encode('utf-8')[:size - total].decode('utf-8', 'ignore')
+            piece = piece[:piece.rfind('\n') + 1] or piece
+            encoded_len = len(piece.encode('utf-8'))
+        pieces.append(piece)
+        total += encoded_len
+    return ''.join(pieces)
+
+
+def write_corpus(out_path, size, density=0.3, modes=MODES, seed=1, source=SOURCE):
+    with open(source, 'r', encoding='utf-8') as f:
+        clean = f.read()
+    text = generate(clean, size, density, modes, seed)
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return len(text.encode('utf-8'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out')
+    parser.add_argument('--size', default='1MB')
+    parser.add_argument('--density', type=float, default=0.3,
+                        help='share of non-ASCII runs to corrupt')
+    parser.add_argument('--mode', action='append', dest='modes', choices=MODES)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--source', default=SOURCE, help='clean TSX to build from')
+    args = parser.parse_args(argv)
+    written = write_corpus(args.out, parse_size(args.size), args.density,
+                           tuple(args.modes or MODES), args.seed, args.source)
+    print(f'Wrote {written:,} bytes to {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
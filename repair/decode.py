@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Algorithmic mojibake decoder
+
+Undoes UTF-8 text that was decoded as cp1252 (or latin-1) one or more
+times, e.g. 'ðŸ’¾' -> '💾' and 'Ã°Å¸â€™Â¾' -> 'ðŸ’¾' -> '💾'.
+Instead of a hand-kept table, every run of suspect characters is mapped
+back to the bytes it came from and each valid UTF-8 sequence inside it is
+decoded; runs are re-decoded until they stop changing.
+
+Only lossless damage can be undone this way. Sequences whose bytes were
+dropped (cp1252 has no character for 0x81, 0x8D, 0x8F, 0x90, 0x9D, so
+some tools turned them into spaces) are left for the tables to handle.
+The one exception is 'ï¸ ' after an emoji: that is always U+FE0F
+(EF B8 8F) with the 0x8F lost, as no other variation selector is used.
+"""
+
+import re
+import time
+
+from repair import profiling
+
+# char -> the byte it was decoded from
+_TO_BYTE = {}
+for _b in range(0x80, 0x100):
+    try:
+        _TO_BYTE[bytes([_b]).decode('cp1252')] = _b
+    except UnicodeDecodeError:
+        pass
+    # latin-1 keeps every byte, C1 controls included
+    _TO_BYTE.setdefault(chr(_b), _b)
+
+SUSPECT_CHARS = ''.join(sorted(_TO_BYTE))
+SUSPECT_RUN = re.compile('[' + re.escape(SUSPECT_CHARS) + ']{2,}')
+LOST_VS16 = re.compile(r'(?<=[^\x00-\x7f])\u00ef\u00b8 ')
+# What is left of an emoji whose other bytes were dropped: a lone 'ð' or
+# 'Ã', not part of a run, right before a closing quote, a tag or whitespace
+LOSSY_STUB = re.compile('(?<![' + re.escape(SUSPECT_CHARS) + '])[\u00f0\u00c3](?=["\'`<\\s])')
+
+# Lossy leftovers decode_mojibake cannot undo: a byte cp1252 cannot show
+# was turned into a space, or the sequence was cut short
+LOSSY_RESIDUALS = [
+    ("ðŸ” ", "🔍"),
+    ("ðŸ“ ", "📂"),
+    ("ðŸ §", "🐧"),
+    ("â† ", "←"),
+    ("â€â€", "—"),
+    ("ðŸŒ ", "🌐"),
+    ("ðŸ ¶", "🐶"),
+    ("ðŸ— ï¸ ", "🗝️"),
+    ("ðŸ °", "🏰"),
+    ("ðŸ Ž", "🍎"),
+    ("ðŸ‘ ï¸ ", "👁️"),
+    ("â—", "—"),
+    ("ðŸ\" ", "🔍"),
+    ("ðŸ\"£", "🔣"),
+    ("ðŸ\"🔍", "🔍")
+]
+
+
+def _sequence_length(lead):
+    if 0xC2 <= lead <= 0xDF:
+        return 2
+    if 0xE0 <= lead <= 0xEF:
+        return 3
+    if 0xF0 <= lead <= 0xF4:
+        return 4
+    return 0
+
+
+def decode_run(run):
+    """Decode every valid UTF-8 sequence hidden in one run of suspect chars"""
+    raw = bytes(_TO_BYTE[ch] for ch in run)
+    out = []
+    repaired = 0
+    i = 0
+    while i < len(raw):
+        length = _sequence_length(raw[i])
+        if length and i + length <= len(raw):
+            try:
+                out.append(raw[i:i + length].decode('utf-8'))
+                repaired += 1
+                i += length
+                continue
+            except UnicodeDecodeError:
+                pass
+        out.append(run[i])
+        i += 1
+    return ''.join(out), repaired
+
+
+def _fix_run(run):
+    fixed, repaired = decode_run(run)
+    # Double and triple encodings peel off one layer per round
+    if repaired and SUSPECT_RUN.search(fixed):
+        fixed, more, _ = _decode(fixed)
+        repaired += more
+    return fixed, repaired
+
+
+def _decode(content):
+    repaired = 0
+    rewritten = 0
+
+    def _swap(m):
+        nonlocal repaired, rewritten
+        fixed, count = _fix_run(m.group(0))
+        repaired += count
+        if count:
+            rewritten += len(m.group(0).encode('utf-8', 'surrogatepass'))
+        return fixed
+
+    content = SUSPECT_RUN.sub(_swap, content)
+    content, lost = LOST_VS16.subn('\ufe0f', content)
+    # 'ï¸ ' is three characters of two bytes each
+    return content, repaired + lost, rewritten + 6 * lost
+
+
+def decode_mojibake(content):
+    """Return (content, number of repaired sequences)"""
+    profiler = profiling.active()
+    start = time.perf_counter()
+    scanned = len(content)
+    content, repaired, rewritten = _decode(content)
+    if profiler is not None:
+        profiler.record('decoder', 'decode_mojibake', time.perf_counter() - start,
+                        matches=repaired, rewritten=rewritten, scanned=scanned)
+    return content, repaired
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unified and side-by-side diffs straight from an edit list
+
+difflib compares every line with every other, which crawls on two
+26k-line ModuleDetail.tsx versions full of near-identical JSX. The
+repairs already know what they changed: sorted (offset, removed,
+inserted) edits into the old bytes. Each edit is widened to whole lines
+with rfind/find, edits on touching lines are merged, and hunks whose
+context overlaps are joined. Line numbers come from counting newlines
+between consecutive edits, so the cost is the edits plus their context
+lines - the unchanged text between hunks is never split or compared.
+
+For two files without an edit list, repair.piece.diff_edits supplies
+one (changed span plus a greedy line alignment, no quadratic matching).
+
+Usage: python -m repair.diff OLD NEW [-U N] [--html FILE]
+       python -m repair.diff --journal [JOURNAL] [-U N] [--html FILE]
+"""
+
+import argparse
+import hashlib
+import html
+import sys
+
+from repair.piece import diff_edits
+
+CONTEXT = 3
+
+
+def _decode(line):
+    return line.decode('utf-8', 'replace')
+
+
+def _display(line):
+    return _decode(line[:-1] if line.endswith(b'\n') else line)
+
+
+class Hunk:
+    """Old lines [old_start, old_end) and the lines that replace them, with context"""
+
+    def __init__(self, old_line, new_line):
+        self.old_line = old_line        # 1-based number of the first old line
+        self.new_line = new_line
+        self.rows = []                  # (tag, old line, new line); tag ' ', '-', '+' or '!'
+
+    @property
+    def old_count(self):
+        return sum(1 for tag, _, _ in self.rows if tag in ' -!')
+
+    @property
+    def new_count(self):
+        return sum(1 for tag, _, _ in self.rows if tag in ' +!')
+
+
+def _line_start(data, pos):
+    return data.rfind(b'\n', 0, pos) + 1
+
+
+def _line_end(data, pos):
+    """Offset just past the newline of the line holding pos (len(data) on the last line)"""
+    nl = data.find(b'\n', pos)
+    return len(data) if nl < 0 else nl + 1
+
+
+def _changes(old, edits):
+    """
+    Merge edits into line-level changes
+
+    Yields (start, end, new): old[start:end] is whole lines, new is what
+    replaces them.
+    """
+    current = None
+    for offset, removed, inserted in edits:
+        start = _line_start(old, offset)
+        # Through the line holding the first byte after the edit: removing a
+        # newline joins the next line into this one
+        end = _line_end(old, offset + len(removed))
+        if current is not None and start <= current[1]:
+            # Touches the previous change: one change
+            c_start, c_end, parts, pos = current
+            parts.append(old[pos:offset])
+            parts.append(inserted)
+            current = (c_start, max(c_end, end), parts, offset + len(removed))
+        else:
+            if current is not None:
+                yield _finish(old, current)
+            current = (start, end, [old[start:offset], inserted], offset + len(removed))
+    if current is not None:
+        yield _finish(old, current)
+
+
+def _finish(old, change):
+    start, end, parts, pos = change
+    parts.append(old[pos:end])
+    return start, end, b''.join(parts)
+
+
+def _lines(data):
+    """Lines of data, each with its newline (the last one may have none)"""
+    parts = data.split(b'\n')
+    lines = [part + b'\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def hunks(old, edits, context=CONTEXT):
+    """Hunks of a sorted edit list over old (bytes), with context lines each side"""
+    result = []
+    hunk = None
+    hunk_end = 0        # old offset where the current hunk's lines stop
+    line = 1            # line number at offset counted
+    counted = 0
+    shift = 0           # new line number - old line number
+    for start, end, new in _changes(old, edits):
+        line += old.count(b'\n', counted, start)
+        counted = start
+        join = False
+        if hunk is not None:
+            # Joined when the context after the last change meets the context before this one
+            pos = start
+            for _ in range(2 * context):
+                if pos <= hunk_end:
+                    break
+                pos = _line_start(old, pos - 1)
+            join = pos <= hunk_end
+        if join:
+            # Close enough to the previous hunk: the lines between are context
+            for text in _lines(old[hunk_end:start]):
+                hunk.rows.append((' ', text, text))
+        else:
+            if hunk is not None:
+                _close(old, hunk, hunk_end, context)
+                result.append(hunk)
+            before = start
+            for _ in range(context):
+                if before == 0:
+                    break
+                before = _line_start(old, before - 1)
+            context_lines = _lines(old[before:start])
+            first = line - len(context_lines)
+            hunk = Hunk(first, first + shift)
+            hunk.rows.extend((' ', text, text) for text in context_lines)
+        old_lines, new_lines = _lines(old[start:end]), _lines(new)
+        # Whole lines an edit kept (e.g. a line inserted in front of one)
+        head = 0
+        while head < min(len(old_lines), len(new_lines)) and old_lines[head] == new_lines[head]:
+            head += 1
+        tail = 0
+        while (tail < min(len(old_lines), len(new_lines)) - head
+               and old_lines[-1 - tail] == new_lines[-1 - tail]):
+            tail += 1
+        hunk.rows.extend((' ', text, text) for text in old_lines[:head])
+        hunk.rows.extend(_pair(old_lines[head:len(old_lines) - tail],
+                               new_lines[head:len(new_lines) - tail]))
+        hunk.rows.extend((' ', text, text) for text in old_lines[len(old_lines) - tail:])
+        shift += len(new_lines) - len(old_lines)
+        hunk_end = end
+    if hunk is not None:
+        _close(old, hunk, hunk_end, context)
+        result.append(hunk)
+    return [part for hunk in result for part in _split(hunk, context)]
+
+
+def _split(hunk, context):
+    """
+    Cut a hunk down to `context` unchanged rows around its changes
+
+    Edits widened to whole lines can bring unchanged lines along; patch
+    reads uneven context as 'this hunk is at the start/end of the file'.
+    """
+    rows = hunk.rows
+    changed = [i for i, (tag, _, _) in enumerate(rows) if tag != ' ']
+    if not changed:
+        return []
+    groups = [[changed[0], changed[0]]]
+    for i in changed[1:]:
+        if i - groups[-1][1] - 1 > 2 * context:
+            groups.append([i, i])
+        else:
+            groups[-1][1] = i
+    parts = []
+    for first, last in groups:
+        start = max(first - context, 0)
+        stop = min(last + context + 1, len(rows))
+        before = rows[:start]
+        part = Hunk(hunk.old_line + sum(1 for tag, _, _ in before if tag in ' -!'),
+                    hunk.new_line + sum(1 for tag, _, _ in before if tag in ' +!'))
+        part.rows = rows[start:stop]
+        parts.append(part)
+    return parts
+
+
+def _pair(old_lines, new_lines):
+    """Rows of one change: replaced lines side by side, the rest removed or added"""
+    rows = []
+    for i in range(max(len(old_lines), len(new_lines))):
+        if i < len(old_lines) and i < len(new_lines):
+            rows.append(('!', old_lines[i], new_lines[i]))
+        elif i < len(old_lines):
+            rows.append(('-', old_lines[i], None))
+        else:
+            rows.append(('+', None, new_lines[i]))
+    return rows
+
+
+def _close(old, hunk, end, context):
+    stop = end
+    for _ in range(context):
+        if stop >= len(old):
+            break
+        stop = _line_end(old, stop)
+    hunk.rows.extend((' ', text, text) for text in _lines(old[end:stop]))
+
+
+def _range(start, count):
+    if count == 1:
+        return str(start)
+    # An empty range names the line before it
+    return f'{start - 1 if count == 0 else start},{count}'
+
+
+def _output(prefix, line):
+    yield prefix + _display(line)
+    if not line.endswith(b'\n'):
+        yield '\\ No newline at end of file'
+
+
+def unified(old, edits, fromfile='a', tofile='b', context=CONTEXT):
+    """Lines of a unified diff (without newlines) for an edit list over old"""
+    found = hunks(old, edits, context)
+    if not found:
+        return
+    yield f'--- {fromfile}'
+    yield f'+++ {tofile}'
+    for hunk in found:
+        yield (f'@@ -{_range(hunk.old_line, hunk.old_count)} '
+               f'+{_range(hunk.new_line, hunk.new_count)} @@')
+        removed = []
+        added = []
+        for tag, old_line, new_line in hunk.rows + [(' ', None, None)]:
+            if tag == ' ':
+                # Removed lines of a block first, then the added ones
+                for text in removed:
+                    yield from _output('-', text)
+                for text in added:
+                    yield from _output('+', text)
+                removed, added = [], []
+                if old_line is not None:
+                    yield from _output(' ', old_line)
+                continue
+            if old_line is not None:
+                removed.append(old_line)
+            if new_line is not None:
+                added.append(new_line)
+
+
+def _marked(text, other, tag):
+    """text escaped, with the part that differs from other wrapped in tag"""
+    p = 0
+    limit = min(len(text), len(other))
+    while p < limit and text[p] == other[p]:
+        p += 1
+    q = 0
+    while q < limit - p and text[len(text) - q - 1] == other[len(other) - q - 1]:
+        q += 1
+    return (html.escape(text[:p]) + f'<{tag}>' + html.escape(text[p:len(text) - q])
+            + f'</{tag}>' + html.escape(text[len(text) - q:]))
+
+
+_STYLE = """
+body { font-family: sans-serif; }
+table { border-collapse: collapse; width: 100%; table-layout: fixed; margin-bottom: 1em; }
+td { font-family: monospace; white-space: pre-wrap; word-break: break-all; vertical-align: top; }
+td.n { width: 4em; color: #888; text-align: right; padding-right: .5em; }
+tr.hunk td { background: #eef; color: #448; }
+td.old { background: #fee; } td.new { background: #efe; }
+del { background: #fbb; text-decoration: none; } ins { background: #bfb; text-decoration: none; }
+"""
+
+
+def side_by_side(old, edits, title='diff', context=CONTEXT):
+    """A standalone HTML page with old and new lines next to each other"""
+    out = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>',
+           f'<style>{_STYLE}</style></head><body><h1>{html.escape(title)}</h1>']
+    for hunk in hunks(old, edits, context):
+        out.append('<table>')
+        out.append(f'<tr class="hunk"><td colspan="4">@@ -{_range(hunk.old_line, hunk.old_count)} '
+                   f'+{_range(hunk.new_line, hunk.new_count)} @@</td></tr>')
+        a, b = hunk.old_line, hunk.new_line
+        for tag, old_line, new_line in hunk.rows:
+            left = right = ''
+            left_n = right_n = ''
+            old_text = _display(old_line) if old_line is not None else None
+            new_text = _display(new_line) if new_line is not None else None
+            if tag == ' ':
+                left = right = html.escape(old_text)
+            elif tag == '!':
+                left = _marked(old_text, new_text, 'del')
+                right = _marked(new_text, old_text, 'ins')
+            elif tag == '-':
+                left = html.escape(old_text)
+            else:
+                right = html.escape(new_text)
+            if old_text is not None:
+                left_n, a = str(a), a + 1
+            if new_text is not None:
+                right_n, b = str(b), b + 1
+            cls_old = ' class="old"' if tag in '-!' else ''
+            cls_new = ' class="new"' if tag in '+!' else ''
+            out.append(f'<tr><td class="n">{left_n}</td><td{cls_old}>{left}</td>'
+                       f'<td class="n">{right_n}</td><td{cls_new}>{right}</td></tr>')
+        out.append('</table>')
+    out.append('</body></html>')
+    return '\n'.join(out)
+
+
+def write_diff(old, edits, fromfile, tofile, context=CONTEXT, html_path=None, out=sys.stdout):
+    """
+    Write the unified diff to out (unless it is None) and the HTML view to
+    html_path (if given); returns the number of hunks
+    """
+    count = 0
+    for line in unified(old, edits, fromfile, tofile, context):
+        count += line.startswith('@@')
+        if out is not None:
+            out.write(line + '\n')
+    if html_path:
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(side_by_side(old, edits, f'{fromfile} → {tofile}', context))
+    return count
+
+
+def _journal_edits(path):
+    """(file, before bytes, net edits) of a journal, against the current file"""
+    from repair import journal
+    found = journal.journals()
+    path = path or (found[-1] if found else None)
+    if path is None:
+        raise SystemExit(f'No journals in {journal.JOURNAL_DIR}')
+    entry = journal.load(path)
+    with open(entry.file, 'rb') as f:
+        after = f.read()
+    if hashlib.sha1(after).digest() != entry.after:
+        raise SystemExit(f'{entry.file} changed since {path} was written')
+    before, _, _ = journal.revert(entry, after)
+    return entry.file, before, diff_edits(before, after)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help='OLD NEW')
+    parser.add_argument('--journal', nargs='?', const='', metavar='JOURNAL',
+                        help='diff what a journal changed (default: the newest)')
+    parser.add_argument('-U', '--context', type=int, default=CONTEXT, help='context lines')
+    parser.add_argument('--html', metavar='FILE', help='also write a side-by-side HTML view')
+    args = parser.parse_args(argv)
+
+    if args.journal is not None:
+        file_path, old, edits = _journal_edits(args.journal or None)
+        names = (f'a/{file_path}', f'b/{file_path}')
+    elif len(args.files) == 2:
+        with open(args.files[0], 'rb') as f:
+            old = f.read()
+        with open(args.files[1], 'rb') as f:
+            edits = diff_edits(old, f.read())
+        names = tuple(args.files)
+    else:
+        parser.error('give OLD and NEW, or --journal')
+    hunk_count = write_diff(old, edits, *names, context=args.context, html_path=args.html)
+    return 1 if hunk_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
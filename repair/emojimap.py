@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generated emoji mojibake table
+
+The hand tables (LOSSY_RESIDUALS, the pattern lists in the fix_*.py
+scripts) only know the damage someone already saw. This table is built
+instead: every emoji the installed unicodedata names (U+2300-U+23FF,
+U+2600-U+27BF, U+2B00-U+2BFF, U+1F000-U+1FAFF), alone and with U+FE0F,
+plus every sequence the sources use (ZWJ sequences, skin tones, 🖥️,
+⌨️), is mis-decoded one, two and three times. Earlier layers are cp1252;
+the last one is any of LAYERS, which is where bytes get lost:
+
+    cp1252                  undefined bytes kept as C1 controls
+    cp1252, dropped         0x81 0x8D 0x8F 0x90 0x9D dropped
+    cp1252, spaces          ... turned into spaces ('ðŸ” ' for 🔍)
+    latin-1                 every byte kept
+    latin-1, dropped        C1 controls dropped ('Ã°Å¸â' stubs)
+
+The reverse map - form -> candidate sequences, best first - is written
+as one file of fixed-size records sorted by the form's UTF-8 bytes, an
+array of keys and an array of values. It is opened with one mmap and
+never parsed: a lookup is a binary search over the records, and the
+longest form at a position takes one or two more. Candidates are ranked
+by how often the sources use them; a form is sure when only one
+candidate fits, or only one of them appears in the sources.
+
+The table lives in the cache and is rebuilt when it is missing, was
+built from another Unicode version, or the emoji the sources use (and
+how often) changed since: the header keeps a digest of them. Each
+source file's emoji are cached by its contents, so checking that costs
+a read and a hash per file. New emoji in the curriculum need no code
+changes: the next load picks them up.
+
+Usage: python -m repair.emojimap build [--source PATH ...]
+       python -m repair.emojimap lookup FORM ...
+       python -m repair.emojimap scan [file ...]
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+from collections import Counter, namedtuple
+
+from repair import cache
+from repair.decode import SUSPECT_CHARS, decode_mojibake
+from repair.piece import _common_prefix
+
+TABLE_PATH = os.path.join(cache.CACHE_DIR, 'emoji.table')
+SOURCES = ['src']
+DEFAULT_FILES = ['src/pages/ModuleDetail.tsx']
+# Shorter forms are mostly ordinary accented text
+MIN_FORM = 2
+MIN_SURE = 3
+
+MAGIC = b'EMJT\x02'
+# Records, key bytes, value bytes, first-character bytes, longest form
+# in characters, Unicode version, digest of the used sequences
+HEADER = struct.Struct('<IIIIH16s20s')
+# Key offset, value offset, flags
+RECORD = struct.Struct('<IIB')
+LAYER_MASK = 0x03       # mis-decodings (1-3) of the best candidate
+LOSSY = 0x04            # bytes were lost, repair.decode cannot undo it
+SURE = 0x08             # one candidate, or one the sources use
+
+_EMOJI = '\u2300-\u23ff\u2600-\u27bf\u2b00-\u2bff\U0001f000-\U0001faff'
+RANGES = [(0x2300, 0x2400), (0x2600, 0x27C0), (0x2B00, 0x2C00), (0x1F000, 0x1FB00)]
+VS16 = '\ufe0f'
+# An emoji with an optional skin tone and VS16, ZWJ-joined to more of them
+SEQUENCE = re.compile(f'[{_EMOJI}][\U0001f3fb-\U0001f3ff]?{VS16}?'
+                      f'(?:\u200d[{_EMOJI}][\U0001f3fb-\U0001f3ff]?{VS16}?)*')
+
+_SUSPECT = frozenset(SUSPECT_CHARS)
+# Every form starts with a UTF-8 lead byte read as cp1252 or latin-1
+# (the two agree from 0xC0 up)
+LEAD = re.compile('[\u00c2-\u00f4]')
+
+Entry = namedtuple('Entry', 'form candidates layers lossy sure')
+
+
+def _layer(codec, lost):
+    """str.translate table from latin-1-decoded bytes to one mis-decoding"""
+    table = {}
+    for b in range(0x80, 0x100):
+        if codec == 'cp1252':
+            try:
+                table[b] = bytes([b]).decode('cp1252')
+                continue
+            except UnicodeDecodeError:
+                pass
+        elif b >= 0xA0:
+            continue
+        table[b] = {'kept': chr(b), 'dropped': '', 'spaces': ' '}[lost]
+    return table
+
+
+LAYERS = {
+    'cp1252': _layer('cp1252', 'kept'),
+    'cp1252, dropped': _layer('cp1252', 'dropped'),
+    'cp1252, spaces': _layer('cp1252', 'spaces'),
+    'latin-1': _layer('latin-1', 'kept'),
+    'latin-1, dropped': _layer('latin-1', 'dropped'),
+}
+LOSSY_LAYERS = {'cp1252, dropped', 'cp1252, spaces', 'latin-1, dropped'}
+
+
+def mis_decode(text, layer='cp1252'):
+    """text encoded as UTF-8 and read back with one of LAYERS"""
+    return text.encode('utf-8').decode('latin-1').translate(LAYERS[layer])
+
+
+def forms(sequence):
+    """{form: (layers, lossy)} of every one- to three-layer mis-decoding"""
+    found = {}
+    text = sequence
+    for layers in (1, 2, 3):
+        for layer in LAYERS:
+            form = mis_decode(text, layer)
+            if len(form) >= MIN_FORM and form not in found:
+                found[form] = (layers, layer in LOSSY_LAYERS)
+        text = mis_decode(text)
+    return found
+
+
+def named_emoji():
+    """Every code point of RANGES the installed unicodedata names"""
+    for start, end in RANGES:
+        for cp in range(start, end):
+            if unicodedata.name(chr(cp), None):
+                yield chr(cp)
+
+
+def _file_sequences(data, keep):
+    """{sequence: count} of one file's decoded contents, cached by them"""
+    key = cache.digest(data)
+    found = cache.load('emoji-used', key)
+    if found is None:
+        text = data.decode('utf-8', errors='surrogateescape')
+        found = dict(Counter(SEQUENCE.findall(decode_mojibake(text)[0])))
+        cache.store('emoji-used', key, found, keep)
+    return found
+
+
+def used_sequences(sources=SOURCES):
+    """Counter of the emoji sequences the (decoded) sources use"""
+    from repair.tree import find_files
+    paths = [file_path for source in sources
+             for file_path in ([source] if os.path.isfile(source) else find_files(source))]
+    used = Counter()
+    for file_path in paths:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if not data.isascii():
+            # One entry per file, plus the usual slack for edited ones
+            used.update(_file_sequences(data, len(paths) + cache.KEEP))
+    return used
+
+
+def used_digest(used):
+    """20-byte digest of a used_sequences() Counter, for the table header"""
+    return bytes.fromhex(cache.digest('\n'.join(f'{s}\t{n}' for s, n in sorted(used.items()))))
+
+
+def build_table(sources=SOURCES, used=None):
+    """The table file's contents"""
+    if used is None:
+        used = used_sequences(sources)
+    sequences = set(used)
+    for ch in named_emoji():
+        sequences.update((ch, ch + VS16))
+
+    reverse = {}        # form -> {sequence: (layers, lossy)}
+    for sequence in sequences:
+        for form, how in forms(sequence).items():
+            reverse.setdefault(form.encode('utf-8'), {})[sequence] = how
+
+    def rank(sequence, how):
+        return -used[sequence], how[0], len(sequence), sequence
+
+    values = {}         # candidate list -> offset; a sequence's forms share one
+    value_blob = bytearray()
+    key_blob = bytearray()
+    record_blob = bytearray()
+    firsts = set()
+    longest = 0
+    for key in sorted(reverse):
+        found = reverse[key]
+        candidates = sorted(found, key=lambda s: rank(s, found[s]))
+        layers, lossy = found[candidates[0]]
+        form = key.decode('utf-8')
+        in_sources = sum(1 for s in candidates if used[s])
+        sure = (len(candidates) == 1 or in_sources == 1) and len(form) >= MIN_SURE
+        value = '\n'.join(candidates).encode('utf-8')
+        if value not in values:
+            values[value] = len(value_blob)
+            value_blob += value + b'\0'
+        flags = layers | (LOSSY if lossy else 0) | (SURE if sure else 0)
+        record_blob += RECORD.pack(len(key_blob), values[value], flags)
+        key_blob += key
+        firsts.add(form[0])
+        longest = max(longest, len(form))
+    first_blob = ''.join(sorted(firsts)).encode('utf-8')
+    count = len(record_blob) // RECORD.size
+    header = HEADER.pack(count, len(key_blob), len(value_blob), len(first_blob), longest,
+                         unicodedata.unidata_version.encode('ascii'), used_digest(used))
+    return bytes(MAGIC + header + record_blob + key_blob + value_blob + first_blob)
+
+
+def write_table(data, path=TABLE_PATH):
+    """Best effort, like the rest of the cache"""
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+
+class EmojiTable:
+    """Read-only view of a built table: bytes, or an mmap of the file"""
+
+    def __init__(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not an emoji table')
+        (self.count, key_size, value_size, first_size, self.longest,
+         version, self.used) = HEADER.unpack_from(data, len(MAGIC))
+        self.data = data
+        self.version = version.rstrip(b'\0').decode('ascii')
+        self._records = len(MAGIC) + HEADER.size
+        self._keys = self._records + self.count * RECORD.size
+        self._values = self._keys + key_size
+        firsts = data[self._values + value_size:self._values + value_size + first_size]
+        self.firsts = bytes(firsts).decode('utf-8')
+        self.starts = re.compile('[' + re.escape(self.firsts) + ']')
+
+    @classmethod
+    def open(cls, path=TABLE_PATH):
+        """Map a table file; raises OSError or ValueError"""
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, i):
+        return RECORD.unpack_from(self.data, self._records + i * RECORD.size)
+
+    def _key(self, i):
+        start = self._keys + self._record(i)[0]
+        end = self._keys + self._record(i + 1)[0] if i + 1 < self.count else self._values
+        return self.data[start:end]
+
+    def _entry(self, i, key):
+        _, value, flags = self._record(i)
+        start = self._values + value
+        candidates = self.data[start:self.data.find(b'\0', start)].decode('utf-8')
+        return Entry(key.decode('utf-8'), tuple(candidates.split('\n')), flags & LAYER_MASK,
+                     bool(flags & LOSSY), bool(flags & SURE))
+
+    def _floor(self, key):
+        """Index of the last record whose key is <= key, or -1"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def lookup(self, form):
+        """Entry of one mojibake form, or None"""
+        key = form.encode('utf-8', 'surrogatepass')
+        i = self._floor(key)
+        return self._entry(i, key) if i >= 0 and self._key(i) == key else None
+
+    def match(self, text, pos=0):
+        """Entry of the longest form starting at text[pos], or None"""
+        probe = text[pos:pos + self.longest].encode('utf-8', 'surrogatepass')
+        while probe:
+            i = self._floor(probe)
+            if i < 0:
+                return None
+            key = self._key(i)
+            if probe.startswith(key):
+                return self._entry(i, key)
+            # A longer match would sort after this key: only prefixes of
+            # what the two share are left
+            probe = probe[:_common_prefix(key, probe)]
+        return None
+
+    def finditer(self, text):
+        """Entry and offset of every form in text, left to right, longest first"""
+        pos = 0
+        starts = self.starts
+        while True:
+            m = starts.search(text, pos)
+            if m is None:
+                return
+            entry = self.match(text, m.start())
+            if entry is None:
+                pos = m.start() + 1
+                continue
+            yield m.start(), entry
+            pos = m.start() + len(entry.form)
+
+    def sub(self, text):
+        """
+        Replace every sure form with its emoji; returns (text, count)
+
+        A form inside a longer run of suspect characters is left alone:
+        the run may be something else that only ends like an emoji
+        ('â¬' is also € with its 0x82 lost).
+        """
+        pieces = []
+        last = count = 0
+        for offset, entry in self.finditer(text):
+            end = offset + len(entry.form)
+            if (entry.sure and text[offset - 1:offset] not in _SUSPECT
+                    and text[end:end + 1] not in _SUSPECT):
+                pieces += (text[last:offset], entry.candidates[0])
+                last = end
+                count += 1
+        if not count:
+            return text, 0
+        pieces.append(text[last:])
+        return ''.join(pieces), count
+
+
+_loaded = None
+
+
+def load(path=TABLE_PATH, sources=SOURCES):
+    """The table, mapped once per process; built first when missing or stale"""
+    global _loaded
+    if _loaded is None:
+        try:
+            table = EmojiTable.open(path)
+        except (OSError, ValueError, struct.error):
+            table = None
+        used = used_sequences(sources)
+        if (table is None or table.version != unicodedata.unidata_version
+                or table.used != used_digest(used)):
+            data = build_table(sources, used)
+            write_table(data, path)
+            table = EmojiTable(data)
+        _loaded = table
+    return _loaded
+
+
+def sub(text):
+    """load().sub(text), without loading the table for text no form can be in"""
+    if LEAD.search(text) is None:
+        return text, 0
+    return load().sub(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_cmd = sub.add_parser('build', help='(re)build the table from unicodedata and the sources')
+    build_cmd.add_argument('--source', action='append', dest='sources',
+                           help=f'file or directory whose emoji rank candidates '
+                                f'(default: {", ".join(SOURCES)})')
+    lookup = sub.add_parser('lookup', help='candidates of mojibake forms')
+    lookup.add_argument('forms', nargs='+')
+    scan = sub.add_parser('scan', help='every form the table knows in files')
+    scan.add_argument('files', nargs='*', default=DEFAULT_FILES)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        data = build_table(args.sources or SOURCES)
+        write_table(data)
+        table = EmojiTable(data)
+        print(f'{TABLE_PATH}: {len(table)} forms, {len(data)} bytes, Unicode {table.version} '
+              f'({(time.perf_counter() - start) * 1000:.0f}ms)')
+        return 0
+
+    start = time.perf_counter()
+    table = load()
+    loaded = time.perf_counter() - start
+    if args.command == 'lookup':
+        status = 0
+        for form in args.forms:
+            entry = table.lookup(form)
+            if entry is None:
+                print(f'{form!r}: not in the table')
+                status = 1
+                continue
+            how = f"{entry.layers} layer(s){', lossy' if entry.lossy else ''}"
+            print(f"{form!r}: {' '.join(entry.candidates)} ({how}"
+                  f"{', sure' if entry.sure else ''})")
+        return status
+
+    found = 0
+    for file_path in args.files:
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+        for offset, entry in table.finditer(text):
+            found += 1
+            line = text.count('\n', 0, offset) + 1
+            guess = entry.candidates[0] if entry.sure else ' '.join(entry.candidates[:3]) + ' ?'
+            print(f'{file_path}:{line}: {entry.form!r} -> {guess}')
+    print(f'{found} form(s); table of {len(table)} loaded in {loaded * 1000:.1f}ms, '
+          f'{(time.perf_counter() - start) * 1000:.0f}ms total', file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
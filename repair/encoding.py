@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Encoding sniffing and streaming transcoding
+
+Every repair assumes UTF-8 with LF line ends, but not every file is:
+line15857.txt and url.txt are UTF-16LE with CRLF (read as UTF-8 they come
+out as '< C a r d   c l a s s N a m e'), temp_module_detail.txt starts
+with a UTF-8 BOM. Opening those with a guessed codec is how mojibake
+spreads, so the encoding is sniffed first - from the first SNIFF_BYTES
+only, never the whole file:
+
+    1. a byte order mark (UTF-32 before UTF-16, which shares its prefix)
+    2. NUL interleaving: ASCII text in UTF-16/32 has NULs at fixed
+       positions of each code unit
+    3. UTF-8 validity of the head (a character cut at the end is fine)
+
+A file that is none of these is left alone unless a --fallback codec is
+given. Transcoding streams fixed-size blocks through an incremental
+decoder to UTF-8 with LF line ends (a CR at the end of a block waits
+for the next one), into a temporary file that replaces the original.
+
+Usage: python -m repair.encoding [path ...] [--check] [--fallback CODEC]
+"""
+
+import argparse
+import codecs
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+SNIFF_BYTES = 4096
+CHUNK_BYTES = 1 << 16
+DEFAULT_PATHS = ['.']
+EXTENSIONS = ('.ts', '.tsx', '.json', '.md', '.txt')
+
+# UTF-32 LE first: its BOM starts with the UTF-16 LE one
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+# Share of code units that must have a NUL at the same position
+NUL_SHARE = 0.4
+
+
+class Sniffed:
+    """What the head of a file says about its encoding"""
+
+    __slots__ = ('encoding', 'bom', 'newline', 'reason')
+
+    def __init__(self, encoding, bom=b'', newline=None, reason=''):
+        self.encoding = encoding    # codec name, or None when unknown
+        self.bom = bom              # BOM bytes to skip
+        self.newline = newline      # first line end seen: '\n', '\r\n', '\r' or None
+        self.reason = reason
+
+    @property
+    def canonical(self):
+        """UTF-8 without BOM and with LF line ends (as far as the head shows)"""
+        return self.encoding == 'utf-8' and not self.bom and self.newline in ('\n', None)
+
+    def __str__(self):
+        if self.encoding is None:
+            return f'unknown ({self.reason})'
+        parts = [self.encoding] + (['BOM'] if self.bom else [])
+        if self.newline:
+            parts.append({'\n': 'LF', '\r\n': 'CRLF', '\r': 'CR'}[self.newline])
+        return ', '.join(parts)
+
+
+def _nul_interleaved(head):
+    """utf-16/32 codec name when the NULs of head line up per code unit"""
+    for width, names in ((4, ('utf-32-le', 'utf-32-be')), (2, ('utf-16-le', 'utf-16-be'))):
+        units = len(head) // width
+        if not units:
+            continue
+        zero = [sum(1 for i in range(offset, units * width, width) if head[i] == 0)
+                for offset in range(width)]
+        if width == 4:
+            # ASCII in UTF-32 LE: b'A\0\0\0'; in BE: b'\0\0\0A'
+            if min(zero[1:]) >= units * NUL_SHARE and zero[0] < units * NUL_SHARE:
+                return names[0]
+            if min(zero[:3]) >= units * NUL_SHARE and zero[3] < units * NUL_SHARE:
+                return names[1]
+        elif zero[1] >= units * NUL_SHARE and zero[0] < units * NUL_SHARE:
+            return names[0]
+        elif zero[0] >= units * NUL_SHARE and zero[1] < units * NUL_SHARE:
+            return names[1]
+    return None
+
+
+def _first_newline(text):
+    cr = text.find('\r')
+    lf = text.find('\n')
+    if cr < 0:
+        return '\n' if lf >= 0 else None
+    if lf < 0 or cr < lf:
+        return '\r\n' if text.startswith('\n', cr + 1) else '\r'
+    return '\n'
+
+
+def sniff(head, complete=False, fallback=None):
+    """
+    Sniff the encoding from the first bytes of a file
+
+    complete says head is the whole file, so a character cut at its end
+    is an error rather than the edge of the sample.
+    """
+    encoding = bom = None
+    reason = ''
+    for mark, name in BOMS:
+        if head.startswith(mark):
+            encoding, bom, reason = name, mark, 'byte order mark'
+            break
+    if encoding is None and b'\0' in head:
+        encoding = _nul_interleaved(head)
+        reason = 'NUL-interleaved code units' if encoding else 'NUL bytes (binary?)'
+        if encoding is None:
+            return Sniffed(None, reason=reason)
+    if encoding is None:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(head, final=complete)
+        except UnicodeDecodeError as e:
+            if fallback is None:
+                return Sniffed(None, reason=f'invalid UTF-8 at byte {e.start}')
+            encoding, reason = fallback, f'fallback (invalid UTF-8 at byte {e.start})'
+        else:
+            encoding, reason = 'utf-8', 'ASCII' if head.isascii() else 'valid UTF-8'
+    sample = head[len(bom or b''):]
+    # Whole code units only, so the sample decodes
+    if encoding.startswith(('utf-16', 'utf-32')):
+        width = 2 if encoding.startswith('utf-16') else 4
+        sample = sample[:len(sample) - len(sample) % width]
+    text = codecs.getincrementaldecoder(encoding)('replace').decode(sample)
+    return Sniffed(encoding, bom or b'', _first_newline(text), reason)
+
+
+def sniff_file(file_path, fallback=None, size=SNIFF_BYTES):
+    """Sniff a file from its first size bytes"""
+    with open(file_path, 'rb') as f:
+        head = f.read(size + 1)
+    return sniff(head[:size], complete=len(head) <= size, fallback=fallback)
+
+
+def _errors(sniffed):
+    # Invalid UTF-8 survives as surrogate escapes, like everywhere else;
+    # other codecs have nothing to escape to
+    return 'surrogateescape' if sniffed.encoding == 'utf-8' else 'strict'
+
+
+def open_text(file_path, sniffed=None):
+    """Open a file as text in its sniffed encoding, BOM skipped, newlines as LF"""
+    sniffed = sniffed or sniff_file(file_path)
+    if sniffed.encoding is None:
+        raise UnicodeError(f'{file_path}: unknown encoding ({sniffed.reason})')
+    raw = open(file_path, 'rb')
+    raw.seek(len(sniffed.bom))
+    return io.TextIOWrapper(raw, encoding=sniffed.encoding, errors=_errors(sniffed), newline=None)
+
+
+def transcode(src, dst, sniffed, chunk_size=CHUNK_BYTES):
+    """
+    Stream binary src to binary dst as UTF-8 with LF line ends
+
+    src is positioned at the start of the file. Returns the number of
+    CR/CRLF line ends rewritten.
+    """
+    src.read(len(sniffed.bom))
+    errors = _errors(sniffed)
+    decoder = codecs.getincrementaldecoder(sniffed.encoding)(errors)
+    rewritten = 0
+    carry = ''
+    while True:
+        block = src.read(chunk_size)
+        text = carry + decoder.decode(block, final=not block)
+        carry = ''
+        # A CR at the end of a block may be half of a CRLF
+        if block and text.endswith('\r'):
+            text, carry = text[:-1], '\r'
+        if '\r' in text:
+            rewritten += text.count('\r')
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        dst.write(text.encode('utf-8', errors))
+        if not block:
+            return rewritten
+
+
+def transcode_file(file_path, sniffed=None, dry_run=False):
+    """
+    Rewrite file_path as canonical UTF-8 in place
+
+    Returns the Sniffed it was converted from, or None when it already
+    was canonical (or its encoding is unknown).
+    """
+    sniffed = sniffed or sniff_file(file_path)
+    if sniffed.encoding is None or sniffed.canonical:
+        return None
+    if dry_run:
+        return sniffed
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.')
+    try:
+        with open(file_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            transcode(src, dst, sniffed)
+        shutil.copymode(file_path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
+    return sniffed
+
+
+def find_paths(paths):
+    from repair.tree import find_files
+    for path in paths:
+        if os.path.isdir(path):
+            yield from find_files(path, EXTENSIONS)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    parser.add_argument('--check', action='store_true',
+                        help='only report; exit 1 when a file is not canonical UTF-8')
+    parser.add_argument('--fallback', metavar='CODEC',
+                        help='codec for files that are not valid UTF-8 (e.g. cp1252)')
+    args = parser.parse_args(argv)
+
+    status = 0
+    converted = 0
+    for file_path in find_paths(args.paths):
+        try:
+            sniffed = sniff_file(file_path, args.fallback)
+            if sniffed.canonical:
+                continue
+            if sniffed.encoding is None:
+                print(f'⚠️  {file_path}: {sniffed}, left alone')
+                status = max(status, 1)
+                continue
+            before = os.path.getsize(file_path)
+            transcode_file(file_path, sniffed, dry_run=args.check)
+        except (OSError, UnicodeError) as e:
+            print(f'❌ {file_path}: {e}', file=sys.stderr)
+            status = 2
+            continue
+        if args.check:
+            print(f'{file_path}: {sniffed} ({sniffed.reason})')
+            status = max(status, 1)
+        else:
+            converted += 1
+            print(f'✅ {file_path}: {sniffed} -> utf-8, LF ({before} -> {os.path.getsize(file_path)} bytes)')
+    if not args.check:
+        print(f'{converted} file(s) transcoded', file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
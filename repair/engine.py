@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-pass multi-pattern replacement engine
+
+All (corrupted, fixed) pairs of a table are folded into one prefix trie,
+which is compiled into a single regex so the whole file is scanned once
+instead of once per table entry. Matches are leftmost-longest.
+Works on str and bytes alike.
+"""
+
+import re
+import time
+
+from repair import profiling
+from repair.profiling import encoded_len
+
+
+def _build_trie(keys):
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[''] = True  # end of pattern marker
+    return trie
+
+
+def _trie_to_regex(node):
+    # Children are tried before the end marker, so the regex engine
+    # prefers the longest pattern and backtracks to shorter ones.
+    branches = [re.escape(ch) + _trie_to_regex(child)
+                for ch, child in sorted(node.items()) if ch != '']
+    if not branches:
+        return ''
+    if '' not in node and len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')' + ('?' if '' in node else '')
+
+
+class Replacer:
+    """
+    Replaces every key of a (old, new) table in one pass
+
+    When a key appears more than once the first entry wins, which is what
+    the old sequential str.replace loops did.
+    """
+
+    def __init__(self, pairs, name='table'):
+        self.name = name
+        self.table = {}
+        for old, new in pairs:
+            if old and old not in self.table:
+                self.table[old] = new
+        self.is_bytes = any(isinstance(k, bytes) for k in self.table)
+        if self.is_bytes:
+            # latin-1 maps every byte to one char, so the same trie works
+            keys = [k.decode('latin-1') for k in self.table]
+            source = _trie_to_regex(_build_trie(keys)).encode('latin-1')
+        else:
+            source = _trie_to_regex(_build_trie(self.table))
+        # An empty table never matches
+        self.pattern = re.compile(source) if self.table else None
+
+    def finditer(self, data):
+        """Yield (start, end, old) for every leftmost-longest match"""
+        if self.pattern is None:
+            return
+        for m in self.pattern.finditer(data):
+            yield m.start(), m.end(), m.group(0)
+
+    def sub(self, data):
+        """Return (rewritten data, {old: hit count})"""
+        counts = dict.fromkeys(self.table, 0)
+        if self.pattern is None:
+            return data, counts
+        table = self.table
+        profiler = profiling.active()
+        start = time.perf_counter()
+
+        def _swap(m):
+            old = m.group(0)
+            counts[old] += 1
+            return table[old]
+
+        result = self.pattern.sub(_swap, data)
+        if profiler is not None:
+            hits = sum(counts.values())
+            rewritten = sum(encoded_len(old) * n for old, n in counts.items() if n)
+            profiler.record('table', f'{self.name} ({len(table)} entries)',
+                            time.perf_counter() - start, matches=hits,
+                            rewritten=rewritten, scanned=len(data))
+        return result, counts
+
+
+def replace_all(content, pairs):
+    """One-shot helper: apply a (old, new) table, return (content, counts)"""
+    return Replacer(pairs).sub(content)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Git-aware incremental repair
+
+Diffs the file against a baseline and repairs only the changed lines,
+widened by the widest context any rule needs. The baseline is the file
+as the last incremental run left it, kept in the repair cache, or the
+file at a git revision given with --since (HEAD by default). Everything
+outside the windows stays as pieces of the original bytes - never
+decoded, never scanned, never copied before the write - and is reported
+as clean. When a rule can match across any number of lines
+(RuleSet.unbounded, unless the rule declares a "context") no window is
+safe, and the whole file is repaired instead.
+
+In a .tsx file, rules with span kinds stay confined to those spans as
+they are in a whole-file pass: the file is lexed once (the span table is
+cached by content hash), each window gets the spans it overlaps, and the
+span rules run span by span inside it.
+
+Usage: python -m repair.incremental [file] [--since REV] [--dry-run]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from bisect import bisect_right
+
+from repair import cache, journal
+from repair.context import ContextIndex
+from repair.decode import LOSSY_RESIDUALS, decode_mojibake
+from repair.engine import Replacer
+from repair.piece import PieceTable, diff_edits
+from repair.pipeline import TARGET, write_text
+from repair.rules import load_rules
+from repair.tsx import span_table
+
+_residuals = Replacer(LOSSY_RESIDUALS)
+
+
+def _git(file_path, *args):
+    result = subprocess.run(['git', '-C', os.path.dirname(os.path.abspath(file_path))] + list(args),
+                            capture_output=True, check=False)
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def _baseline_key(file_path):
+    return cache.digest(os.path.abspath(file_path))
+
+
+def base_data(file_path, since=None):
+    """Bytes to diff against: stored baseline, else since/HEAD; None if there is none"""
+    if since is None:
+        stored = cache.load_bytes('baseline', _baseline_key(file_path))
+        if stored is not None:
+            return stored
+        since = 'HEAD'
+    # Only reads from git; nothing is added to its object store
+    return _git(file_path, 'show', f'{since}:./{os.path.basename(file_path)}')
+
+
+def changed_lines(base, data, lines):
+    """0-based [start, end) line ranges of data that differ from base; lines indexes data"""
+    ranges = []
+    delta = 0
+    for offset, removed, inserted in diff_edits(base, data):
+        start = offset + delta
+        # A pure deletion joins its neighbours on the line where it was
+        ranges.append((lines.line_of(start), lines.line_of(start + len(inserted)) + 1))
+        delta += len(inserted) - len(removed)
+    return ranges
+
+
+def widen(ranges, context, line_count):
+    """Grow every range by context lines each side and merge overlaps"""
+    windows = []
+    for start, end in sorted(ranges):
+        start = max(0, start - context)
+        end = min(line_count, end + context)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+class Spans:
+    """Span table of a whole TSX file, in bytes, handed out window by window"""
+
+    def __init__(self, data):
+        # All syntax is ASCII: lexing latin-1 gives byte offsets
+        self.spans = span_table(data.decode('latin-1'))
+        self.starts = [start for _, start, _ in self.spans]
+
+    def window(self, data, start, end):
+        """The spans over data[start:end], in characters of its decoded text"""
+        found = []
+        pos = 0
+        i = max(bisect_right(self.starts, start) - 1, 0)
+        while i < len(self.spans) and self.spans[i][1] < end:
+            kind, a, b = self.spans[i]
+            # Span edges are ASCII, so each piece decodes on its own
+            size = len(data[max(a, start):min(b, end)].decode('utf-8', 'surrogateescape'))
+            found.append((kind, pos, pos + size))
+            pos += size
+            i += 1
+        return found
+
+
+def _moved(spans, before, after):
+    """spans of before, carried through the edits that made after"""
+    if spans is None or before == after:
+        return spans
+    table = PieceTable(before)
+    table.apply((offset, len(removed), inserted)
+                for offset, removed, inserted in diff_edits(before, after))
+    edges = [0] + [table.position(start) for _, start, _ in spans[1:]] + [len(after)]
+    return [(kind, a, b) for (kind, _, _), a, b in zip(spans, edges, edges[1:]) if a < b]
+
+
+def steps(rules):
+    """Ids of the repair steps in the order they run"""
+    return ['decode', 'residuals'] + [rule.id for group in rules.groups for rule in rules.group(group)]
+
+
+def repair_steps(content, rules, spans=None):
+    """
+    Run the repair one step at a time
+
+    Yields (step, content, hits) after the decoder, the residual table
+    and each rule, in the order of steps(rules). spans, the
+    [(kind, start, end)] of content from a TSX lex, confine rules with
+    span kinds to them, as RuleSet.apply(..., tsx=True) does; the other
+    steps' edits carry them along. Without spans every rule sees the
+    whole text.
+    """
+    fixed, hits = decode_mojibake(content)
+    spans, content = _moved(spans, content, fixed), fixed
+    yield 'decode', content, hits
+    fixed, counts = _residuals.sub(content)
+    spans, content = _moved(spans, content, fixed), fixed
+    yield 'residuals', content, sum(counts.values())
+    for group in rules.groups:
+        for rule in rules.group(group):
+            try:
+                if spans is not None and rule.spans:
+                    pieces = [[kind, content[start:end]] for kind, start, end in spans]
+                    hits = rule.apply_spans(pieces)
+                    if hits:
+                        content = ''.join(text for _, text in pieces)
+                        spans = []
+                        pos = 0
+                        for kind, text in pieces:
+                            spans.append((kind, pos, pos + len(text)))
+                            pos += len(text)
+                else:
+                    fixed, hits = rule.apply(content)
+                    spans, content = _moved(spans, content, fixed), fixed
+            except TimeoutError:
+                hits = 0
+            yield rule.id, content, hits
+
+
+def repair_text(content, rules, changes=None, spans=None):
+    """
+    Decoder, residual table, then every rule group; returns (content, hits)
+
+    changes, a dict, gets {step: (before, after)} for each step that
+    changed the text, for journaling step by step. spans confine the
+    span rules, see repair_steps.
+    """
+    total = 0
+    for step, fixed, hits in repair_steps(content, rules, spans):
+        total += hits
+        if changes is not None and fixed != content:
+            changes[step] = (content, fixed)
+        content = fixed
+    return content, total
+
+
+def repair_incremental(file_path=TARGET, since=None, dry_run=False):
+    """Repair the changed windows of file_path; returns the number of repairs"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    lines = ContextIndex(data, [])
+    base = base_data(file_path, since)
+    rules = load_rules()
+    if base is None:
+        print(f'No usable baseline for {file_path}, repairing the whole file')
+        windows = [(0, lines.line_count)]
+    elif rules.context is None:
+        print(f'Rule(s) {", ".join(rules.unbounded)} can match across any number of lines, '
+              f'repairing the whole file')
+        windows = [(0, lines.line_count)]
+    else:
+        windows = widen(changed_lines(base, data, lines), rules.context, lines.line_count)
+
+    def line_start(line):
+        return 0 if line == 0 else lines.newlines[line - 1] + 1
+
+    spans = Spans(data) if file_path.endswith('.tsx') else None
+    edits = []
+    repaired = []   # (offset, size, {step: (before, after)}) of each changed window
+    total = 0
+    scanned = 0
+    for start, end in windows:
+        a = line_start(start)
+        b = len(data) if end >= lines.line_count else line_start(end)
+        text = data[a:b].decode('utf-8', 'surrogateescape')
+        changes = {}
+        fixed, hits = repair_text(text, rules, changes,
+                                  None if spans is None else spans.window(data, a, b))
+        scanned += end - start
+        total += hits
+        print(f'  lines {start + 1}-{end}: {hits} repair(s)')
+        if fixed != text:
+            edits.append((a, b - a, fixed.encode('utf-8', 'surrogateescape')))
+            repaired.append((a, b - a, {step: tuple(t.encode('utf-8', 'surrogateescape') for t in pair)
+                                        for step, pair in changes.items()}))
+
+    context = 'whole file' if rules.context is None else f'context ±{rules.context}'
+    print(f'{len(windows)} window(s), {scanned} of {lines.line_count} lines scanned '
+          f'({context}); {lines.line_count - scanned} untouched lines clean')
+
+    if dry_run:
+        print(f'Dry run - {total} repair(s) not written')
+        return total
+    # Untouched windows and the text between them are never copied
+    table = PieceTable(data)
+    table.apply(edits)
+    if table.edits:
+        write_text(file_path, table)
+        print(f'✅ Wrote {total} repair(s) to {file_path}')
+        journal.record(file_path, data, journal.step_batches(repaired, steps(rules)))
+    # The repaired state is the baseline for the next run
+    cache.store_bytes('baseline', _baseline_key(file_path), table.getvalue())
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('file', nargs='?', default=TARGET)
+    parser.add_argument('--since', help='diff against this revision instead of the stored baseline')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    args = parser.parse_args(argv)
+    repair_incremental(args.file, args.since, args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
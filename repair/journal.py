@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reversible edit journal
+
+Every run that writes a file also writes a journal of what it changed:
+batches of (offset, removed bytes, inserted bytes) edits, one batch per
+stage/rule, in the byte offsets the stage saw. Records are varint
+encoded and the whole journal is zlib-compressed, so it costs about as
+much as the changed bytes, not a copy of the file.
+
+Undo replays the journal backwards:
+
+    revert the whole run    every batch, last first, inverted in place
+    revert one rule         its edits are carried forward through the
+                            later batches (an edit a later rule touched
+                            again is a conflict and stays), then
+                            inverted in one pass
+
+Both are O(edits) bookkeeping plus one piece-table pass per batch. A
+journal only applies to the file it produced: a revert checks the hash
+first and refuses to run against a file that changed since. The revert
+itself is journaled, so it can be undone too.
+
+Usage: python -m repair.journal [list]
+       python -m repair.journal show [JOURNAL]
+       python -m repair.journal revert [JOURNAL] [--rule ID ...] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+import zlib
+from bisect import bisect_right
+from itertools import accumulate
+
+from repair.piece import PieceTable, diff_edits
+
+JOURNAL_DIR = os.environ.get('REPAIR_JOURNAL_DIR', '.repair_journal')
+MAGIC = b'RJNL\x01'
+
+
+def _hash(data):
+    return hashlib.sha1(data).digest()
+
+
+def _put(out, n):
+    """Unsigned LEB128 varint"""
+    while n >= 0x80:
+        out.write(bytes([n & 0x7F | 0x80]))
+        n >>= 7
+    out.write(bytes([n]))
+
+
+def _put_bytes(out, data):
+    _put(out, len(data))
+    out.write(data)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def varint(self):
+        n = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def bytes(self, size=None):
+        size = self.varint() if size is None else size
+        value = self.data[self.pos:self.pos + size]
+        if len(value) != size:
+            raise ValueError('truncated journal')
+        self.pos += size
+        return value
+
+
+class Batch:
+    """One stage's or rule's edits, in the offsets of the text it was given"""
+
+    def __init__(self, rule, edits):
+        self.rule = rule
+        self.edits = edits      # sorted, non-overlapping (offset, removed, inserted)
+
+    def output_edits(self):
+        """The same edits in the offsets of the text the batch produced"""
+        delta = 0
+        for offset, removed, inserted in self.edits:
+            yield offset + delta, removed, inserted
+            delta += len(inserted) - len(removed)
+
+
+class _Shift:
+    """Carries spans through the edits of one later batch"""
+
+    def __init__(self, edits):
+        self.starts = [offset for offset, _, _ in edits]
+        self.ends = [offset + len(removed) for offset, removed, _ in edits]
+        self.deltas = list(accumulate((len(i) - len(r) for _, r, i in edits), initial=0))
+
+    def span(self, start, end):
+        """Where [start, end) ended up, or None when the batch edited it"""
+        k = bisect_right(self.starts, start)
+        if k and self.ends[k - 1] > start and (self.starts[k - 1] < start or end > start):
+            return None
+        if k < len(self.starts) and self.starts[k] < end:
+            return None
+        return start + self.deltas[k], end + self.deltas[k]
+
+
+class Journal:
+    def __init__(self, file, before, after, batches, created=None):
+        self.file = file
+        self.before = before        # sha1 of the file before the run
+        self.after = after          # and after it
+        self.batches = batches
+        self.created = int(time.time() if created is None else created)
+
+    @property
+    def edit_count(self):
+        return sum(len(b.edits) for b in self.batches)
+
+    def rules(self):
+        return list(dict.fromkeys(b.rule for b in self.batches))
+
+    def to_bytes(self):
+        out = io.BytesIO()
+        _put_bytes(out, self.file.encode('utf-8'))
+        out.write(self.before + self.after)
+        _put(out, self.created)
+        rules = self.rules()
+        _put(out, len(rules))
+        for rule in rules:
+            _put_bytes(out, rule.encode('utf-8'))
+        _put(out, len(self.batches))
+        for batch in self.batches:
+            _put(out, rules.index(batch.rule))
+            _put(out, len(batch.edits))
+            last = 0
+            for offset, removed, inserted in batch.edits:
+                # Gaps are small numbers, offsets are not
+                _put(out, offset - last)
+                _put_bytes(out, removed)
+                _put_bytes(out, inserted)
+                last = offset + len(removed)
+        return MAGIC + zlib.compress(out.getvalue(), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(MAGIC):
+            raise ValueError('not a repair journal')
+        r = _Reader(zlib.decompress(data[len(MAGIC):]))
+        file = r.bytes().decode('utf-8')
+        before, after = r.bytes(20), r.bytes(20)
+        created = r.varint()
+        rules = [r.bytes().decode('utf-8') for _ in range(r.varint())]
+        batches = []
+        for _ in range(r.varint()):
+            rule = rules[r.varint()]
+            edits = []
+            last = 0
+            for _ in range(r.varint()):
+                offset = last + r.varint()
+                removed = r.bytes()
+                inserted = r.bytes()
+                edits.append((offset, removed, inserted))
+                last = offset + len(removed)
+            batches.append(Batch(rule, edits))
+        return cls(file, before, after, batches, created)
+
+
+def record(file_path, before, batches):
+    """
+    Journal a run that rewrote file_path from before (bytes)
+
+    batches is [(rule id, edits)] in the order they were applied; returns
+    the journal path, or None when nothing changed or the journal could
+    not be written (journaling never fails a repair).
+    """
+    table = PieceTable(before)
+    kept = []
+    for rule, edits in batches:
+        if edits:
+            table.apply((offset, len(removed), inserted) for offset, removed, inserted in edits)
+            kept.append(Batch(rule, edits))
+    if not kept:
+        return None
+    journal = Journal(os.path.relpath(file_path).replace(os.sep, '/'),
+                      _hash(before), _hash(table.getvalue()), kept)
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(journal.created))
+    name = f'{stamp}-{os.path.basename(file_path)}'
+    try:
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        path = os.path.join(JOURNAL_DIR, name + '.rjnl')
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(JOURNAL_DIR, f'{name}-{n}.rjnl')
+            n += 1
+        with open(path, 'wb') as f:
+            f.write(journal.to_bytes())
+    except OSError:
+        return None
+    return path
+
+
+def step_batches(windows, steps):
+    """
+    One (step, edits) batch per step for record(), from windows repaired apart
+
+    windows are (offset, size, {step: (before, after)}) with offset and
+    size in the original bytes and before/after the window's bytes around
+    each step that changed it; steps gives the order the steps ran in.
+    Each batch is in the offsets of the file with every earlier step
+    applied to every window, as record() expects.
+    """
+    sizes = [size for _, size, _ in windows]
+    batches = []
+    for step in steps:
+        edits = []
+        shift = 0
+        for k, (offset, size, changed) in enumerate(windows):
+            current = sizes[k]
+            if step in changed:
+                before, after = changed[step]
+                edits.extend((offset + shift + o, removed, inserted)
+                             for o, removed, inserted in diff_edits(before, after))
+                sizes[k] = len(after)
+            shift += current - size
+        if edits:
+            batches.append((step, edits))
+    return batches
+
+
+def record_rewrite(file_path, before, after, rule):
+    """Journal a one-step rewrite from before to after (bytes)"""
+    return record(file_path, before, [(rule, diff_edits(before, after))])
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return Journal.from_bytes(f.read())
+
+
+def journals():
+    """Journal paths, oldest first"""
+    try:
+        names = os.listdir(JOURNAL_DIR)
+    except OSError:
+        return []
+    paths = [os.path.join(JOURNAL_DIR, n) for n in names if n.endswith('.rjnl')]
+    return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+
+def revert(journal, data, rules=None):
+    """
+    Undo a journal's edits in data, the bytes the run produced
+
+    rules limits the undo to those rules' batches. Returns
+    (data, reverted, conflicts): edits undone, and edits left in place
+    because a later batch changed the same bytes.
+    """
+    batches = journal.batches
+    selected = [rules is None or b.rule in rules for b in batches]
+    # Edits still in effect per batch, for carrying spans forward
+    remaining = [list(b.edits) for b in batches]
+    table = PieceTable(data)
+    reverted = conflicts = 0
+    for k in range(len(batches) - 1, -1, -1):
+        if not selected[k]:
+            continue
+        shifts = [_Shift(remaining[m]) for m in range(k + 1, len(batches)) if remaining[m]]
+        undo = []
+        kept = []
+        for edit, (offset, removed, inserted) in zip(batches[k].edits, batches[k].output_edits()):
+            span = (offset, offset + len(inserted))
+            for shift in shifts:
+                span = shift.span(*span)
+                if span is None:
+                    break
+            if span is None or table.slice(*span) != inserted:
+                kept.append(edit)
+                continue
+            undo.append((span[0], len(inserted), removed))
+        table.apply(undo)
+        remaining[k] = kept
+        reverted += len(undo)
+        conflicts += len(kept)
+    return table.getvalue(), reverted, conflicts
+
+
+def _latest(path):
+    if path:
+        return path
+    found = journals()
+    if not found:
+        raise SystemExit(f'No journals in {JOURNAL_DIR}')
+    return found[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('list', help='list journals, oldest first')
+    show = sub.add_parser('show', help='edits per rule of a journal (default: newest)')
+    show.add_argument('journal', nargs='?')
+    undo = sub.add_parser('revert', help='undo a journal (default: newest)')
+    undo.add_argument('journal', nargs='?')
+    undo.add_argument('--rule', action='append', dest='rules', help='only undo this rule/stage')
+    undo.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command in (None, 'list'):
+        for path in journals():
+            journal = load(path)
+            print(f'{path}  {journal.file}  {journal.edit_count} edit(s), '
+                  f'{len(journal.rules())} rule(s), {os.path.getsize(path)} bytes')
+        return 0
+
+    path = _latest(args.journal)
+    journal = load(path)
+    if args.command == 'show':
+        print(f'{path}: {journal.file}, {time.ctime(journal.created)}')
+        for batch in journal.batches:
+            removed = sum(len(r) for _, r, _ in batch.edits)
+            inserted = sum(len(i) for _, _, i in batch.edits)
+            print(f'  {batch.rule:<36} {len(batch.edits):>6} edit(s)  -{removed} +{inserted} bytes')
+        return 0
+
+    from repair.pipeline import write_text
+    unknown = set(args.rules or ()) - set(journal.rules())
+    if unknown:
+        print(f'❌ {path} has no rule(s) {", ".join(sorted(unknown))}; '
+              f'it has {", ".join(journal.rules())}', file=sys.stderr)
+        return 2
+    with open(journal.file, 'rb') as f:
+        data = f.read()
+    digest = _hash(data)
+    if digest == journal.before and not args.rules:
+        print(f'{journal.file} is already as it was before {path}')
+        return 0
+    if digest != journal.after:
+        print(f'❌ {journal.file} changed since {path} was written; not reverting', file=sys.stderr)
+        return 2
+    result, reverted, conflicts = revert(journal, data, set(args.rules) if args.rules else None)
+    if not args.rules and _hash(result) != journal.before:
+        print(f'❌ Replaying {path} did not restore the original; not writing', file=sys.stderr)
+        return 2
+    what = f'rule(s) {", ".join(args.rules)}' if args.rules else 'the whole run'
+    if args.dry_run:
+        print(f'Dry run - would undo {reverted} edit(s) of {what} ({conflicts} conflict(s))')
+        return 0
+    if reverted:
+        write_text(journal.file, result)
+        record(journal.file, data, [('revert', diff_edits(data, result))])
+    print(f'✅ Undid {reverted} edit(s) of {what} in {journal.file}'
+          + (f'; {conflicts} edit(s) kept, later rules changed the same bytes' if conflicts else ''))
+    return 1 if conflicts else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
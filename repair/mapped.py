@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped byte-level repair mode
+
+The target is mapped read-only and byte patterns are matched directly on
+the mapping. Edits are recorded as (offset, old_len, new_bytes) and the
+output is streamed from memoryview slices of the mapping, so the file is
+never decoded or split into lines.
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from repair.engine import Replacer
+
+
+@contextmanager
+def mapped(file_path):
+    """Map a file read-only; empty files give b''"""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def find_edits(buf, pairs, keep=None):
+    """
+    Match a (bad_bytes, good_bytes) table on buf in one pass
+
+    keep(buf, offset) can veto an edit, e.g. to restrict a fix to one module.
+    """
+    replacer = Replacer(pairs)
+    edits = []
+    for start, end, old in replacer.finditer(buf):
+        if keep is None or keep(buf, start):
+            edits.append((start, end - start, replacer.table[old]))
+    return edits
+
+
+def write_edits(buf, edits, out):
+    """Stream buf to out with the edits spliced in"""
+    pos = 0
+    with memoryview(buf) as view:
+        for offset, old_len, new_bytes in edits:
+            out.write(view[pos:offset])
+            out.write(new_bytes)
+            pos = offset + old_len
+        out.write(view[pos:])
+
+
+def repair_file(file_path, pairs, keep=None):
+    """Apply a byte table to file_path in place, return the edit list"""
+    file_path = os.fspath(file_path)
+    with mapped(file_path) as buf:
+        edits = find_edits(buf, pairs, keep)
+        if not edits:
+            return edits
+        # Write next to the target so the final rename stays atomic
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                write_edits(buf, edits, out)
+            shutil.copymode(file_path, tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    # The mapping is closed before the rename (required on Windows)
+    os.replace(tmp_path, file_path)
+    return edits
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Anchor-based line patches
+
+A patch names the content it rewrites instead of a line number, so it
+still lands on the right line after upstream edits move things around.
+Two kinds of anchor:
+
+    Line(text, before=(), after=())
+        The line whose skeleton - the line with every run of non-ASCII
+        characters (and the spaces inside it) dropped and whitespace
+        collapsed - equals that of text, optionally
+        with neighbouring lines that must match too. Mojibake and emoji
+        are all non-ASCII, so a corrupted line and its repaired form
+        share a skeleton: Patch.line(new_text) anchors a line on itself.
+
+    Path('getModule2Sections › cpuBasics › coreExamples[0]')
+        A structural path: a declaration, then object keys and array
+        indexes, resolved with the TSX scanner. The patch covers the lines
+        of that value.
+
+All line anchors are resolved through one skeleton-hash index of the
+file (O(lines + patches)); path anchors share one scan. A patch whose
+anchor is missing or ambiguous is reported and never applied, so nothing
+is written at a guessed position.
+
+Because a clean line has the same skeleton as its corrupted form, an
+anchor also finds lines that need no repair. A patch only rewrites a
+target that has mojibake in it (a run of suspect characters or a lossy
+stub, see repair.decode); clean targets are left alone.
+"""
+
+import hashlib
+import re
+from bisect import bisect_right
+from collections import defaultdict
+
+from repair.decode import LOSSY_STUB, SUSPECT_RUN
+
+# Lossy mojibake has spaces inside it ('ðŸ› ï¸'): they go with it
+_NON_ASCII = re.compile(r'[^\x00-\x7f]+(?:\s+[^\x00-\x7f]+)*')
+_SPACE = re.compile(r'\s+')
+_OPENER = re.compile(r'\s*(?:return\s*)?\(?\s*([{\[])')
+_RETURNED = re.compile(r'\s*return\s*\(?\s*([{\[])')
+_NAMED_IMPORT = re.compile(r'(\s*import\s*\{)([^}]*)(\}\s*from\s*["\']([^"\']+)["\'].*)')
+
+
+def skeleton(line):
+    """The ASCII shape of a line: non-ASCII runs dropped, whitespace collapsed"""
+    return _SPACE.sub(' ', _NON_ASCII.sub('', line)).strip()
+
+
+def line_key(line):
+    return hashlib.blake2b(skeleton(line).encode('ascii'), digest_size=8).digest()
+
+
+def corrupted(text):
+    """Whether text has mojibake in it: a run of suspect characters or a lossy stub"""
+    return bool(SUSPECT_RUN.search(text) or LOSSY_STUB.search(text))
+
+
+class AnchorError(Exception):
+    pass
+
+
+class Line:
+    """Anchor on a line's skeleton, plus optional neighbours"""
+
+    def __init__(self, text, before=(), after=(), every=False, module=None):
+        self.key = line_key(text)
+        self.before = [line_key(t) for t in before]   # lines just above, top down
+        self.after = [line_key(t) for t in after]     # lines just below
+        self.every = every      # all matching lines instead of exactly one
+        self.module = module    # only lines inside this module's sections
+        self.text = text
+
+    def __str__(self):
+        return f'line {skeleton(self.text)[:60]!r}'
+
+
+class Path:
+    """Anchor on a structural path like 'getModule2Sections › ram › items[1]'"""
+
+    SEGMENT = re.compile(r'(\w+)((?:\[\d+\])*)')
+
+    def __init__(self, path):
+        self.path = path
+        self.segments = []
+        for part in re.split(r'\s*(?:›|/|\.)\s*', path.strip()):
+            m = self.SEGMENT.fullmatch(part)
+            if not m:
+                raise ValueError(f'bad path segment {part!r} in {path!r}')
+            self.segments.append((m.group(1), [int(i) for i in re.findall(r'\d+', m.group(2))]))
+
+    def __str__(self):
+        return f'path {self.path!r}'
+
+
+class Patch:
+    """
+    Rewrite of the anchored line(s)
+
+    replace is the new text (a str of one or more lines, without the final
+    newline) or a callable that gets the old text and returns the new one.
+    With only_corrupted (the default) a target without mojibake is kept.
+    """
+
+    def __init__(self, anchor, replace, only_corrupted=True):
+        self.anchor = anchor
+        self.replace = replace
+        self.only_corrupted = only_corrupted
+
+    @classmethod
+    def line(cls, text, **anchor_options):
+        """Replace the line that has text's skeleton with text"""
+        return cls(Line(text, **anchor_options), text)
+
+
+class LineIndex:
+    """Skeleton hash -> line numbers, built in one pass"""
+
+    def __init__(self, lines):
+        self.keys = [line_key(line) for line in lines]
+        self.where = defaultdict(list)
+        for number, key in enumerate(self.keys):
+            self.where[key].append(number)
+
+    def _neighbours_match(self, number, anchor):
+        keys = self.keys
+        first = number - len(anchor.before)
+        if first < 0 or number + 1 + len(anchor.after) > len(keys):
+            return False
+        return (keys[first:number] == anchor.before
+                and keys[number + 1:number + 1 + len(anchor.after)] == anchor.after)
+
+    def find(self, anchor):
+        return [n for n in self.where.get(anchor.key, ())
+                if (not anchor.before and not anchor.after) or self._neighbours_match(n, anchor)]
+
+
+class _Structure:
+    """Scan-based path resolver for one text"""
+
+    TOKEN = re.compile(r'[{\[(`"\'/]|(\w+)\s*:(?!:)|,')
+
+    def __init__(self, text):
+        from repair.tsx import scan
+        self.text = text
+        result = scan(text)
+        self.pairs = result.pairs
+        self.spans = result.spans
+        self.starts = [start for _, start, _ in self.spans]
+
+    def _span(self, pos):
+        kind, _, end = self.spans[bisect_right(self.starts, pos) - 1]
+        return kind, end
+
+    def _top_level(self, opener):
+        """(pos, key or ',') tokens directly inside the bracket at opener"""
+        text = self.text
+        close = self.pairs[opener]
+        pos = opener + 1
+        while pos < close:
+            m = self.TOKEN.search(text, pos, close)
+            if m is None:
+                return
+            p = m.start()
+            kind, end = self._span(p)
+            if kind != 'code':
+                pos = end
+            elif m.group(1):
+                yield m.end(), m.group(1)
+                pos = m.end()
+            elif text[p] == ',':
+                yield p, ','
+                pos = p + 1
+            elif p in self.pairs:
+                pos = self.pairs[p] + 1
+            else:
+                pos = p + 1
+
+    def _value_end(self, opener, start):
+        """End of the member value that starts at start inside opener"""
+        for pos, token in self._top_level(opener):
+            if pos > start and token == ',':
+                return pos
+        return self.pairs[opener]
+
+    def _container(self, start):
+        """Offset of the '{' or '[' a value starting at start opens"""
+        m = _OPENER.match(self.text, start)
+        if m is None or m.start(1) not in self.pairs:
+            return None
+        opener = m.start(1)
+        # A function body that only returns an object literal
+        inner = _RETURNED.match(self.text, opener + 1)
+        if self.text[opener] == '{' and inner and inner.start(1) in self.pairs:
+            return inner.start(1)
+        return opener
+
+    def _element(self, opener, index):
+        """(start, end) of array element index inside the '[' at opener"""
+        start = opener + 1
+        seen = 0
+        for pos, token in self._top_level(opener):
+            if token != ',':
+                continue
+            if seen == index:
+                return start, pos
+            seen += 1
+            start = pos + 1
+        if seen == index and self.text[start:self.pairs[opener]].strip():
+            return start, self.pairs[opener]
+        return None
+
+    def resolve(self, path):
+        """(start, end) offsets of the value a Path names"""
+        (name, indexes), rest = path.segments[0], path.segments[1:]
+        m = re.search(r'\b(?:const|let|var|function)\s+' + re.escape(name)
+                      + r'\b[^=({]*=?\s*(?:\([^)]*\)\s*=>)?', self.text)
+        if m is None:
+            raise AnchorError(f'{path}: no declaration of {name}')
+        start = m.end()
+        end = None
+        for key, idx in [(None, indexes)] + rest:
+            if key is not None:
+                opener = self._container(start)
+                if opener is None or self.text[opener] != '{':
+                    raise AnchorError(f'{path}: {key} is not inside an object')
+                found = next((pos for pos, token in self._top_level(opener) if token == key), None)
+                if found is None:
+                    raise AnchorError(f'{path}: no key {key}')
+                start, end = found, self._value_end(opener, found)
+            for i in idx:
+                opener = self._container(start)
+                if opener is None or self.text[opener] != '[':
+                    raise AnchorError(f'{path}: [{i}] of something that is not an array')
+                element = self._element(opener, i)
+                if element is None:
+                    raise AnchorError(f'{path}: no element [{i}]')
+                start, end = element
+        if end is None:
+            opener = self._container(start)
+            if opener is None:
+                raise AnchorError(f'{path}: {name} is not an object or array')
+            start, end = opener, self.pairs[opener] + 1
+        text = self.text
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1] in ' \t\r\n,':
+            end -= 1
+        return start, end
+
+
+def resolve(lines, patches):
+    """
+    Resolve every anchor against lines (each without its newline)
+
+    Returns ([(first line, last line + 1, patch)], [(patch, problem)]).
+    """
+    index = LineIndex(lines)
+    text = None
+    structure = None
+    sections = None
+    starts = None
+    targets = []
+    problems = []
+    for patch in patches:
+        anchor = patch.anchor
+        try:
+            if isinstance(anchor, Path):
+                if structure is None:
+                    text = '\n'.join(lines)
+                    structure = _Structure(text)
+                    starts = _line_starts(lines)
+                start, end = structure.resolve(anchor)
+                first = bisect_right(starts, start) - 1
+                last = bisect_right(starts, end - 1)
+                targets.append((first, last, patch))
+                continue
+            found = index.find(anchor)
+            if anchor.module is not None and found:
+                if sections is None:
+                    from repair.sections import SectionMap
+                    text = text or '\n'.join(lines)
+                    sections = SectionMap.from_source(text)
+                    starts = starts or _line_starts(lines)
+                found = [n for n in found if sections.module_at(starts[n]) == anchor.module]
+            if not found:
+                raise AnchorError(f'{anchor}: not found')
+            if len(found) > 1 and not anchor.every:
+                raise AnchorError(f'{anchor}: {len(found)} matches (lines '
+                                  + ', '.join(str(n + 1) for n in found[:5]) + ')')
+            targets.extend((n, n + 1, patch) for n in found)
+        except AnchorError as e:
+            problems.append((patch, str(e)))
+    return targets, problems
+
+
+def _line_starts(lines):
+    starts = [0]
+    for line in lines[:-1]:
+        starts.append(starts[-1] + len(line) + 1)
+    return starts
+
+
+def apply_patches(lines, patches):
+    """
+    Apply patches to lines (each without its newline)
+
+    Returns (lines, [(line number, patch)] changed, [(patch, problem)]).
+    Overlapping targets are problems too; the first patch wins.
+    """
+    targets, problems = resolve(lines, patches)
+    out = []
+    changed = []
+    pos = 0
+    for first, last, patch in sorted(targets, key=lambda t: t[0]):
+        if first < pos:
+            problems.append((patch, f'{patch.anchor}: overlaps an earlier patch at line {first + 1}'))
+            continue
+        old = '\n'.join(lines[first:last])
+        if patch.only_corrupted and not corrupted(old):
+            new = old
+        else:
+            new = patch.replace(old) if callable(patch.replace) else patch.replace
+        out.extend(lines[pos:first])
+        out.extend(new.split('\n'))
+        pos = last
+        if new != old:
+            changed.append((first + 1, patch))
+    out.extend(lines[pos:])
+    return out, changed, problems
+
+
+def add_import(lines, name, module='lucide-react'):
+    """
+    Add name to the one-line named import from module in lines
+
+    For patches that insert a component (<Rocket />). Returns True when
+    lines changed, False when name is imported already; raises
+    AnchorError when there is no such import line to extend.
+    """
+    for number, line in enumerate(lines):
+        m = _NAMED_IMPORT.fullmatch(line)
+        if m is None or m.group(4) != module:
+            continue
+        names = [n.strip() for n in m.group(2).split(',') if n.strip()]
+        if name in names:
+            return False
+        lines[number] = f'{m.group(1)} {", ".join(names + [name])} {m.group(3)}'
+        return True
+    raise AnchorError(f'no one-line import from {module!r} to add {name} to')
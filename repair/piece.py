@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Piece-table edit buffer
+
+The text is never rebuilt per edit. The original and every inserted
+string live in append-only buffers; the current text is a list of
+pieces, (buffer, start, end) slices of them, in order. A splice splits
+at most two pieces and swaps the ones in between, so its cost depends on
+the number of pieces - about twice the number of edits so far - and not
+on the size of the text. The text is joined once, when it is read or
+written, and kept until the next edit. update() is for callers that only
+have the new text as a whole string: it stores just the changed lines,
+but has to compare the two texts to find them.
+
+Offsets are in the units of the text: characters for str, bytes for
+bytes. A batch of edits given in the same (pre-batch) coordinates is
+applied in one merge pass over the pieces.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+ORIGINAL = 0
+# Lines diff_edits looks ahead to resync after a mismatch
+LOOKAHEAD = 32
+# Units compared per slice while looking for the first difference
+CHUNK = 4096
+
+
+def _common_prefix(a, b):
+    # Chunk by chunk (memcmp speed, each unit copied once), then a binary
+    # search inside the first chunk that differs
+    limit = min(len(a), len(b))
+    pos = 0
+    while pos < limit and a[pos:pos + CHUNK] == b[pos:pos + CHUNK]:
+        pos += CHUNK
+    if pos >= limit:
+        return limit
+    x, y = a[pos:pos + CHUNK], b[pos:pos + CHUNK]
+    lo, hi = 0, min(len(x), len(y))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if x[:mid] == y[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return pos + lo
+
+
+def _common_suffix(a, b, limit):
+    # _common_prefix from the other end, at most limit units
+    pos = 0
+    while pos < limit:
+        size = min(CHUNK, limit - pos)
+        if a[len(a) - pos - size:len(a) - pos] != b[len(b) - pos - size:len(b) - pos]:
+            x = a[len(a) - pos - size:len(a) - pos]
+            y = b[len(b) - pos - size:len(b) - pos]
+            lo, hi = 0, size
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if x[size - mid:] == y[size - mid:]:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            return pos + lo
+        pos += size
+    return limit
+
+
+def changed_span(old, new):
+    """[start, end) span of new that differs from old"""
+    start = _common_prefix(old, new)
+    end = _common_suffix(old, new, min(len(old), len(new)) - start)
+    return start, len(new) - end
+
+
+def _trimmed(offset, old, new):
+    """(offset, removed, inserted) of old -> new without their common ends"""
+    p = _common_prefix(old, new)
+    limit = min(len(old), len(new)) - p
+    q = 0
+    while q < limit and old[len(old) - q - 1] == new[len(new) - q - 1]:
+        q += 1
+    return offset + p, old[p:len(old) - q], new[p:len(new) - q]
+
+
+def _starts(lines):
+    return list(accumulate((len(line) + 1 for line in lines), initial=0))
+
+
+def diff_edits(old, new, lookahead=LOOKAHEAD):
+    """
+    Small (offset, removed, inserted) edits turning old into new
+
+    Offsets are into old, edits are sorted and never overlap. The changed
+    span is split into lines, which are aligned greedily: after a
+    mismatch, the nearest equal line within lookahead lines resyncs (a
+    blank line only when the next line is equal too). An unmatched block
+    of as many new lines as old ones is paired line by line, one edit per
+    changed line; any other block becomes one edit. Every edit is trimmed
+    to the characters that differ, so unchanged bytes between two changed
+    lines never belong to an edit. Any alignment gives correct edits; a
+    poor one only gives bigger ones.
+    """
+    if old == new:
+        return []
+    sep = b'\n' if isinstance(old, (bytes, bytearray)) else '\n'
+    start, new_end = changed_span(old, new)
+    old_end = len(old) - (len(new) - new_end)
+    start = old.rfind(sep, 0, start) + 1
+    a_text, b_text = old[start:old_end], new[start:new_end]
+    a, b = a_text.split(sep), b_text.split(sep)
+    a_starts, b_starts = _starts(a), _starts(b)
+    edits = []
+
+    def block(i, i2, j, j2):
+        if i2 - i == j2 - j:
+            for k, m in zip(range(i, i2), range(j, j2)):
+                if a[k] != b[m]:
+                    edits.append(_trimmed(start + a_starts[k], a[k], b[m]))
+            return
+        x0, y0 = a_starts[i], b_starts[j]
+        if i2 == len(a) and i:
+            # Up to the end: the separator in front of the block is part of it
+            x0, y0 = x0 - 1, y0 - 1
+        x = a_text[x0:min(a_starts[i2], len(a_text))]
+        y = b_text[y0:min(b_starts[j2], len(b_text))]
+        edits.append(_trimmed(start + x0, x, y))
+
+    def resync(i, j):
+        for total in range(1, 2 * lookahead + 1):
+            for di in range(max(0, total - lookahead), min(total, lookahead) + 1):
+                k, m = i + di, j + total - di
+                if k >= len(a) or m >= len(b) or a[k] != b[m]:
+                    continue
+                if (a[k].strip() or k + 1 == len(a) or m + 1 == len(b)
+                        or a[k + 1] == b[m + 1]):
+                    return k, m
+        return None
+
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            i += 1
+            j += 1
+            continue
+        found = resync(i, j)
+        if found is None:
+            break
+        block(i, found[0], j, found[1])
+        i, j = found
+    if i < len(a) or j < len(b):
+        block(i, len(a), j, len(b))
+    return [e for e in edits if e[1] or e[2]]
+
+
+class PieceTable:
+    """Editable text (str or bytes) kept as pieces of append-only buffers"""
+
+    def __init__(self, original):
+        self.buffers = [original]     # append-only: the original, then each insert
+        self.pieces = [(ORIGINAL, 0, len(original))] if original else []
+        self.edits = 0
+        self._length = len(original)
+        self._empty = original[:0]
+        self._starts = None           # current offset of each piece
+        self._positions = None        # original start/end and current start of original pieces
+        self._text = original
+
+    def __len__(self):
+        return self._length
+
+    def _piece_starts(self):
+        if self._starts is None:
+            self._starts = list(accumulate((end - start for _, start, end in self.pieces),
+                                           initial=0))[:-1]
+        return self._starts
+
+    def apply(self, edits):
+        """
+        Apply (offset, remove, insert) edits in one pass
+
+        Offsets refer to the text as it was before the batch; the edits
+        must be sorted and must not overlap.
+        """
+        edits = list(edits)
+        if not edits:
+            return
+        pieces = self.pieces
+        buffers = self.buffers
+        i = 0           # next untouched piece
+        pos = 0         # offset of head (or pieces[i]) in the old text
+        starts = self._starts
+        if starts:
+            # Offsets are known: pieces before the first edit are copied as a block
+            i = max(bisect_right(starts, edits[0][0]) - 1, 0)
+            pos = starts[i]
+        out = pieces[:i]
+        head = None     # the rest of a piece split at pos
+        last = 0
+        delta = 0
+        count = 0
+        for offset, remove, insert in edits:
+            end = offset + remove
+            if offset < last or remove < 0 or end > self._length:
+                raise ValueError(f'edit ({offset}, {remove}) is out of order, '
+                                 f'overlaps or is past the end ({self._length})')
+            last = end
+            if not remove and not insert:
+                continue
+            # Keep everything before offset, drop everything up to end
+            for stop, keep in ((offset, True), (end, False)):
+                while pos < stop:
+                    if head is not None:
+                        buf, start, piece_end = head
+                        head = None
+                    else:
+                        buf, start, piece_end = pieces[i]
+                        i += 1
+                    size = piece_end - start
+                    if pos + size > stop:
+                        cut = start + stop - pos
+                        head = (buf, cut, piece_end)
+                        piece_end = cut
+                        size = cut - start
+                    if keep:
+                        out.append((buf, start, piece_end))
+                    pos += size
+                if keep and insert:
+                    buffers.append(insert)
+                    out.append((len(buffers) - 1, 0, len(insert)))
+            delta += len(insert) - remove
+            count += 1
+        if not count:
+            return
+        if head is not None:
+            out.append(head)
+        out.extend(pieces[i:])
+        # A new list rather than an in-place change, so snapshots stay valid
+        self.pieces = out
+        self._length += delta
+        self.edits += count
+        self._starts = None
+        self._positions = None
+        self._text = None
+
+    def splice(self, offset, remove=0, insert=None):
+        """Replace remove units at offset with insert"""
+        self.apply([(offset, remove, self._empty if insert is None else insert)])
+
+    def update(self, new):
+        """
+        Make the text equal to new with the edits diff_edits finds
+
+        For code that still produces whole strings: only the changed
+        lines are stored, one batch, and new itself becomes the
+        materialised text. Finding them compares old and new once, so
+        this costs time in the size of the text; callers that know their
+        edits should apply() them instead.
+        """
+        old = self.getvalue()
+        if new == old:
+            return
+        self.apply((offset, len(removed), inserted)
+                   for offset, removed, inserted in diff_edits(old, new))
+        self._text = new
+
+    def snapshot(self):
+        """Opaque state for restore(); O(1) because apply() never mutates pieces"""
+        return self.pieces, self._length, self.edits
+
+    def restore(self, state):
+        self.pieces, self._length, self.edits = state
+        self._starts = None
+        self._positions = None
+        self._text = None
+
+    def slice(self, start, end):
+        """The current text[start:end], without materialising the rest"""
+        start, end = max(start, 0), min(end, self._length)
+        if start >= end:
+            return self._empty
+        if self._text is not None:
+            return self._text[start:end]
+        starts = self._piece_starts()
+        i = bisect_right(starts, start) - 1
+        parts = []
+        while i < len(self.pieces) and starts[i] < end:
+            buf, piece_start, piece_end = self.pieces[i]
+            a = piece_start + max(start - starts[i], 0)
+            b = piece_start + min(end - starts[i], piece_end - piece_start)
+            parts.append(self.buffers[buf][a:b])
+            i += 1
+        return self._empty.join(parts)
+
+    def position(self, original):
+        """
+        Current offset of an offset in the original text
+
+        An offset inside deleted text maps to where the deletion was.
+        """
+        if self._positions is None:
+            kept = [(start, end, current) for (buf, start, end), current
+                    in zip(self.pieces, self._piece_starts()) if buf == ORIGINAL]
+            self._positions = [list(column) for column in zip(*kept)] or [[], [], []]
+        starts, ends, current = self._positions
+        i = bisect_right(starts, original) - 1
+        if i < 0:
+            return 0
+        # Past the end of the piece: deleted, or after the last kept text
+        return current[i] + min(original, ends[i]) - starts[i]
+
+    def net_edits(self):
+        """
+        All edits so far as one sorted (offset, removed, inserted) list
+        against the original, read off the piece list in one pass
+        """
+        original = self.buffers[ORIGINAL]
+        edits = []
+        pos = 0             # end of the last original piece
+        added = []
+        for buf, start, end in self.pieces + [(ORIGINAL, len(original), len(original))]:
+            if buf != ORIGINAL:
+                added.append(self.buffers[buf][start:end])
+                continue
+            if start != pos or added:
+                edit = _trimmed(pos, original[pos:start], self._empty.join(added))
+                if edit[1] or edit[2]:
+                    edits.append(edit)
+            pos = end
+            added = []
+        return edits
+
+    def chunks(self):
+        """The current text as a sequence of buffer slices"""
+        buffers = self.buffers
+        for buf, start, end in self.pieces:
+            source = buffers[buf]
+            yield source if start == 0 and end == len(source) else source[start:end]
+
+    def getvalue(self):
+        """The current text, joined once and kept until the next edit"""
+        if self._text is None:
+            self._text = self._empty.join(self.chunks())
+        return self._text
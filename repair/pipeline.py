@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read-once, write-once repair pipeline
+
+Runs the fix_*.py scripts as ordered stages over one in-memory buffer.
+Each script runs unchanged, but its open() of the target file is served
+from the buffer and its final write lands back in the buffer (any other
+file is read-only to a stage; a script that handles several files finds
+the one to work on in PIPELINE_TARGET), so the
+file is read and decoded once, written once at the end (only if it
+changed), and every stage reports its own time and hits. Invalid UTF-8
+in the target is reported up front and carried through as surrogate
+escapes; a stage that turns those bytes into U+FFFD or drops them (an
+errors='replace' or 'ignore' read) is flagged, and the result is then
+not written. A .tsx target is also checked for balanced delimiters and
+JSX tags after every stage that changed it, re-lexing only around the
+stage's edits (repair.structure); a stage that breaks the structure is
+flagged and blocks the write the same way, and so does a stage that
+changes the number of lines or grows the file beyond what replacing
+characters inside lines can (a '\n'.join over readlines() output doubles
+every newline). The buffer is a piece table:
+a stage's write is stored as the lines it changed, and a failed stage
+is rolled back by restoring the piece list. The scripts still read and
+write whole strings, so each stage costs time in the size of the file
+however little it changes. Each
+stage's edits go to the run's journal (repair.journal), so a run or a
+single stage can be undone.
+
+Usage: python -m repair.pipeline [file] [--stage fix_x.py ...] [--dry-run] [-v]
+                                [--diff] [--html FILE] [-U N]
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from repair import diff, encoding, journal, profiling
+from repair.piece import PieceTable, diff_edits
+from repair.structure import Structure
+from repair.validate import iter_invalid, lossy_change
+
+TARGET = 'src/pages/ModuleDetail.tsx'
+# The fix_*.py scripts sit next to the repair package
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Broad decoders first, narrow module fixes next, aggressive fallbacks last
+STAGES = [
+    'fix_emojis.py',
+    'fix_all_modules_icons.py',
+    'fix_all_modules_comprehensive.py',
+    'fix_remaining_corruptions.py',
+    'fix_all_remaining_corruptions.py',
+    'fix_emoji_text_corruption.py',
+    'fix_emoji_text_direct.py',
+    'fix_emoji_final_simple.py',
+    'fix_icon_fields_final.py',
+    'fix_module1_icons.py',
+    'fix_module1_content_icons.py',
+    'fix_module1_all_content.py',
+    'fix_module1_final.py',
+    'fix_module1_final_direct.py',
+    'fix_m1_bullets.py',
+    'fix_m1_content_simple.py',
+    'fix_hardware_basics_bullets.py',
+    'fix_bullets_clean.py',
+    'fix_bullets_exact.py',
+    'fix_launch_icons.py',
+    'fix_launch_direct.py',
+    'fix_why_it_matters_and_bullets.py',
+    'fix_specific_patterns.py',
+    'fix_remaining_aggressive.py',
+]
+
+# Not run as stages:
+#   fix_all_modules_final.py  - same tables as fix_all_modules_comprehensive.py
+#   fix_bullets_bytes.py      - edits the file on disk through mmap
+#   fix_m1.py, fix_m2.py, fix_line_7934.py - one-off anchored patches
+#                               (repair.patch) for a particular file state
+SKIPPED = ['fix_all_modules_final.py', 'fix_bullets_bytes.py',
+           'fix_m1.py', 'fix_m2.py', 'fix_line_7934.py']
+
+# Text is kept undecoded-safe: invalid bytes survive the round trip
+_ERRORS = 'surrogateescape'
+
+# Repairs replace characters inside lines: a run may add or drop a few
+# lines (an import), not more than this many or this fraction of them
+LINE_SLACK = 50
+MAX_LINE_DRIFT = 0.01
+# Mojibake is longer than what it decodes to, so a repair rarely grows the file
+MAX_GROWTH = 0.05
+
+
+def _is_utf8(encoding):
+    return (encoding or 'utf-8').lower().replace('_', '-') in ('utf-8', 'utf8')
+
+
+class _Capture:
+    """Write handle whose contents replace the buffer text on close"""
+
+    def __init__(self, buffer, binary, encoding):
+        self._buffer = buffer
+        self._binary = binary
+        self._encoding = encoding
+        self._io = io.BytesIO() if binary else io.StringIO()
+        self.write = self._io.write
+
+    def close(self):
+        if self._io.closed:
+            return
+        value = self._io.getvalue()
+        if self._binary:
+            value = value.decode('utf-8', _ERRORS)
+        elif not _is_utf8(self._encoding):
+            value = value.encode(self._encoding).decode('utf-8', _ERRORS)
+        self._buffer.text = value
+        self._buffer.writes += 1
+        self._io.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Buffer:
+    """The in-memory copy of the target that every stage reads and writes"""
+
+    def __init__(self, file_path, text, aliases=(TARGET,)):
+        # The scripts hard-code TARGET, so it is served from the buffer too
+        self.paths = {os.path.normcase(os.path.abspath(p)) for p in (file_path,) + tuple(aliases)}
+        self.table = PieceTable(text)
+        self.writes = 0
+        self.batches = []   # (stage, byte edits) for the journal
+
+    @property
+    def text(self):
+        return self.table.getvalue()
+
+    @text.setter
+    def text(self, value):
+        self.table.update(value)
+
+    def is_target(self, file):
+        return (isinstance(file, (str, os.PathLike)) and
+                os.path.normcase(os.path.abspath(file)) in self.paths)
+
+    def open(self, file, mode='r', buffering=-1, encoding=None, errors=None, newline=None, **kwargs):
+        """
+        Drop-in open(): the target comes from memory, anything else from disk
+
+        Other files are read-only: a write would skip the dry run, the
+        guards and the journal, so it raises PermissionError.
+        """
+        if not self.is_target(file):
+            if any(flag in mode for flag in 'wax+'):
+                raise PermissionError(f'a pipeline stage may only write its target, not {file}')
+            return builtins.open(file, mode, buffering, encoding, errors, newline, **kwargs)
+        if 'r' in mode:
+            if 'b' in mode:
+                return io.BytesIO(self.text.encode('utf-8', _ERRORS))
+            text = self.text
+            if not _is_utf8(encoding):
+                text = text.encode('utf-8', _ERRORS).decode(encoding, errors or 'strict')
+            return io.StringIO(text, newline=newline)
+        if 'w' in mode:
+            return _Capture(self, 'b' in mode, encoding)
+        raise ValueError(f'pipeline buffer does not support mode {mode!r}')
+
+
+class StageResult:
+    def __init__(self, name, seconds, hits, changed, output, error=None, lossy=None, broken=None,
+                 reshaped=None):
+        self.name = name
+        self.seconds = seconds
+        self.hits = hits
+        self.changed = changed
+        self.output = output
+        self.error = error
+        self.lossy = lossy
+        self.broken = broken
+        self.reshaped = reshaped
+
+
+def _hits(namespace):
+    # The scripts keep their running total in fixed_count or fixed
+    for name in ('fixed_count', 'fixed'):
+        value = namespace.get(name)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _broken(before, after):
+    """What structural errors after has that before did not, or None"""
+    added = Counter(message for _, message in after)
+    added.subtract(message for _, message in before)
+    if sum(added.values()) <= 0:
+        return None
+    first = next(message for _, message in sorted(after) if added[message] > 0)
+    return f'{sum(added.values())} new structural error(s), first {first!r}'
+
+
+def _reshaped(before, after):
+    """Why after is not a repair of before, or None when it could be"""
+    lines, new_lines = before.count('\n'), after.count('\n')
+    if abs(new_lines - lines) > max(LINE_SLACK, lines * MAX_LINE_DRIFT):
+        return f'line count {lines + 1} -> {new_lines + 1}'
+    if len(after) > len(before) * (1 + MAX_GROWTH) + LINE_SLACK:
+        return f'size {len(before)} -> {len(after)} characters'
+    return None
+
+
+def _output():
+    # A text stream the scripts can reconfigure(), as they do on Windows
+    return io.TextIOWrapper(io.BytesIO(), encoding='utf-8', errors='backslashreplace')
+
+
+def _captured(output):
+    output.flush()
+    return output.buffer.getvalue().decode('utf-8', 'replace')
+
+
+def run_stage(script, buffer, structure=None):
+    """
+    Run one script against the buffer; a failing stage leaves it untouched
+
+    structure, a Structure of the buffer's bytes, is brought up to date
+    with the stage's edits.
+    """
+    profiler = profiling.active()
+    if profiler is not None:
+        profiler.stage = os.path.basename(script)
+    before = buffer.table.snapshot()
+    before_text = buffer.text
+    edits = buffer.table.edits
+    scanned = len(buffer.table)
+    output = _output()
+    error = None
+    namespace = {}
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            namespace = runpy.run_path(script, init_globals={'open': buffer.open,
+                                                             'PIPELINE_TARGET': TARGET},
+                                       run_name='__main__')
+    except SystemExit:
+        pass
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        buffer.table.restore(before)
+    seconds = time.perf_counter() - start
+    if profiler is not None:
+        profiler.stage = None
+        profiler.record('stage', os.path.basename(script), seconds, matches=_hits(namespace) or 0,
+                        scanned=scanned)
+    changed = buffer.table.edits != edits
+    lossy = lossy_change(before_text, buffer.text) if changed else None
+    reshaped = _reshaped(before_text, buffer.text) if changed else None
+    broken = None
+    if changed:
+        after = buffer.text.encode('utf-8', _ERRORS)
+        batch = diff_edits(before_text.encode('utf-8', _ERRORS), after)
+        buffer.batches.append((os.path.basename(script), batch))
+        if structure is not None:
+            errors = structure.errors
+            structure.update(after.decode('latin-1'), batch)
+            broken = _broken(errors, structure.errors)
+    return StageResult(os.path.basename(script), seconds, _hits(namespace),
+                       changed, _captured(output), error, lossy, broken, reshaped)
+
+
+def write_text(file_path, text):
+    """Atomically replace file_path with text (str, bytes or a PieceTable), keeping its permissions"""
+    chunks = text.chunks() if isinstance(text, PieceTable) else (text,)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk.encode('utf-8', _ERRORS) if isinstance(chunk, str) else chunk)
+        shutil.copymode(file_path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
+
+
+def run(file_path=TARGET, stages=STAGES, script_dir=SCRIPT_DIR, dry_run=False, verbose=False,
+        show_diff=False, html_path=None, context=diff.CONTEXT):
+    """Run the stages in order over one read of file_path; returns StageResults"""
+    sniffed = encoding.sniff_file(file_path)
+    if sniffed.encoding is None:
+        raise UnicodeError(f'{file_path}: unknown encoding ({sniffed})')
+    if sniffed.canonical:
+        with builtins.open(file_path, 'rb') as f:
+            data = f.read()
+        invalid = list(iter_invalid(io.BytesIO(data), file_path))
+        if invalid:
+            print(f'⚠️  {len(invalid)} invalid UTF-8 sequence(s) kept as they are, first at '
+                  f'{invalid[0]} (python -m repair.validate lists them)')
+        original = data.decode('utf-8', _ERRORS)
+    else:
+        # A BOM, UTF-16 or CRLF would reach the scripts as text they do not expect
+        print(f'Reading {file_path} as {sniffed}; it is written back as UTF-8 with LF')
+        with encoding.open_text(file_path, sniffed) as f:
+            original = f.read()
+    buffer = Buffer(file_path, original)
+    structure = None
+    if file_path.endswith('.tsx'):
+        structure = Structure.cached(original.encode('utf-8', _ERRORS).decode('latin-1'))
+        original_errors = structure.errors
+    results = []
+    for stage in stages:
+        result = run_stage(os.path.join(script_dir, stage), buffer, structure)
+        results.append(result)
+        if verbose and result.output:
+            print(f'--- {result.name}')
+            print(result.output, end='')
+
+    print(f"{'stage':<36} {'ms':>8} {'hits':>6}  changed")
+    for r in results:
+        hits = '-' if r.hits is None else r.hits
+        status = f'ERROR {r.error}' if r.error else ('yes' if r.changed else '')
+        if r.lossy:
+            status += f' LOSSY: {r.lossy}'
+        if r.broken:
+            status += f' BROKEN: {r.broken}'
+        if r.reshaped:
+            status += f' RESHAPED: {r.reshaped}'
+        print(f'{r.name:<36} {r.seconds * 1000:>8.1f} {hits:>6}  {status}')
+    total = sum(r.seconds for r in results)
+    print(f"{'total':<36} {total * 1000:>8.1f}")
+
+    if (show_diff or html_path) and buffer.batches:
+        # The stages' edits composed into one list against the input
+        before = original.encode('utf-8', _ERRORS)
+        net = PieceTable(before)
+        for _, edits in buffer.batches:
+            net.apply((offset, len(removed), inserted) for offset, removed, inserted in edits)
+        print()
+        diff.write_diff(before, net.net_edits(), f'a/{file_path}', f'b/{file_path}', context,
+                        html_path, sys.stdout if show_diff else None)
+        if html_path:
+            print(f'Side-by-side diff: {html_path}')
+
+    lossy = lossy_change(original, buffer.text)
+    broken = structure and _broken(original_errors, structure.errors)
+    reshaped = _reshaped(original, buffer.text)
+    if buffer.text == original and sniffed.canonical:
+        print(f'\nNo changes to {file_path}')
+    elif lossy:
+        stages = ', '.join(r.name for r in results if r.lossy) or 'the stages together'
+        print(f'\n❌ Not writing {file_path}: {lossy} ({stages})')
+    elif broken:
+        stages = ', '.join(r.name for r in results if r.broken) or 'the stages together'
+        print(f'\n❌ Not writing {file_path}: {broken} ({stages}; '
+              f'python -m repair.structure {file_path} lists them)')
+    elif reshaped:
+        stages = ', '.join(r.name for r in results if r.reshaped) or 'the stages together'
+        print(f'\n❌ Not writing {file_path}: {reshaped} ({stages})')
+    elif dry_run:
+        print(f'\nDry run - {file_path} not written')
+    else:
+        write_text(file_path, buffer.table)
+        print(f'\n✅ Wrote {file_path} once')
+        if structure is not None:
+            structure.save()
+        path = journal.record(file_path, original.encode('utf-8', _ERRORS), buffer.batches)
+        if path:
+            print(f'Journal: {path} (undo with python -m repair.journal revert)')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('file', nargs='?', default=TARGET)
+    parser.add_argument('--stage', action='append', dest='stages',
+                        help='run only these scripts, in the given order')
+    parser.add_argument('--dry-run', action='store_true', help='do not write the result')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show each stage\'s output')
+    parser.add_argument('--diff', action='store_true', help='print a unified diff of the changes')
+    parser.add_argument('--html', metavar='FILE', help='write a side-by-side HTML diff')
+    parser.add_argument('-U', '--context', type=int, default=diff.CONTEXT,
+                        help=f'diff context lines (default {diff.CONTEXT})')
+    args = parser.parse_args(argv)
+    results = run(args.file, args.stages or STAGES, dry_run=args.dry_run, verbose=args.verbose,
+                  show_diff=args.diff, html_path=args.html, context=args.context)
+    return 1 if any(r.error or r.lossy or r.broken or r.reshaped for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-rule profiling and hit counts
+
+While a Profiler is active, every rules.json rule, Replacer table and
+decoder pass records wall time, match attempts, matches, bytes rewritten
+and characters scanned, grouped by pipeline stage. The module-level re
+functions (re.sub, re.search, ...) can be instrumented too, so the
+scripts' inline regexes show up by pattern. Optionally a cProfile dump
+and a sampled collapsed-stack file (for flamegraph.pl or speedscope)
+are written as well.
+
+Usage: python -m repair.profiling [--json FILE] [--cprofile FILE] [--collapsed FILE]
+                                  (script.py | -m module) [args ...]
+"""
+
+import argparse
+import cProfile
+import json
+import re
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_active = None
+
+
+def active():
+    """The running Profiler, or None - the hot paths check this once"""
+    return _active
+
+
+def encoded_len(text):
+    if isinstance(text, str):
+        return len(text.encode('utf-8', 'surrogatepass'))
+    return len(text)
+
+
+class Stats:
+    __slots__ = ('seconds', 'attempts', 'matches', 'rewritten', 'scanned')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.attempts = 0
+        self.matches = 0
+        self.rewritten = 0
+        self.scanned = 0
+
+
+class Profiler:
+    def __init__(self):
+        self.stage = None
+        self.entries = {}   # (stage, kind, name) -> Stats
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def record(self, kind, name, seconds, attempts=1, matches=0, rewritten=0, scanned=0):
+        key = (self.stage, kind, name)
+        stats = self.entries.get(key)
+        if stats is None:
+            stats = self.entries[key] = Stats()
+        stats.seconds += seconds
+        stats.attempts += attempts
+        stats.matches += matches
+        stats.rewritten += rewritten
+        stats.scanned += scanned
+
+    def report(self):
+        """JSON-ready report, slowest entries first"""
+        entries = [{
+            'stage': stage,
+            'kind': kind,
+            'name': name,
+            'seconds': round(s.seconds, 6),
+            'attempts': s.attempts,
+            'matches': s.matches,
+            'bytes_rewritten': s.rewritten,
+            'chars_scanned': s.scanned,
+        } for (stage, kind, name), s in self.entries.items()]
+        entries.sort(key=lambda e: e['seconds'], reverse=True)
+        return {'total_seconds': round(self.seconds, 6), 'entries': entries}
+
+    def summary(self, limit=15):
+        lines = [f"{'seconds':>9} {'attempts':>9} {'matches':>8} {'rewritten':>9}  kind  name"]
+        for e in self.report()['entries'][:limit]:
+            name = e['name'] if len(e['name']) <= 60 else e['name'][:57] + '...'
+            stage = f"[{e['stage']}] " if e['stage'] else ''
+            lines.append(f"{e['seconds']:>9.4f} {e['attempts']:>9} {e['matches']:>8} "
+                         f"{e['bytes_rewritten']:>9}  {e['kind']:<5} {stage}{name}")
+        return '\n'.join(lines)
+
+
+_RE_FUNCTIONS = ('sub', 'subn', 'search', 'match', 'fullmatch', 'findall', 'finditer', 'split')
+
+
+def _pattern_name(pattern):
+    return pattern.pattern if isinstance(pattern, re.Pattern) else pattern
+
+
+def _wrap_re(name, original, profiler, subn):
+    def wrapper(pattern, *args, **kwargs):
+        start = time.perf_counter()
+        if name == 'sub':
+            # Same work as re.sub, but it also returns the match count
+            result, matches = subn(pattern, *args, **kwargs)
+        else:
+            result = original(pattern, *args, **kwargs)
+            if name == 'subn':
+                matches = result[1]
+            elif name == 'findall':
+                matches = len(result)
+            elif name in ('search', 'match', 'fullmatch'):
+                matches = result is not None
+            else:
+                matches = 0   # lazy or not a match count
+        pos = 1 if name in ('sub', 'subn') else 0
+        string = args[pos] if len(args) > pos else kwargs.get('string', '')
+        profiler.record('re', str(_pattern_name(pattern)), time.perf_counter() - start,
+                        matches=int(matches), scanned=len(string))
+        return result
+    return wrapper
+
+
+@contextmanager
+def _patched_re(profiler):
+    originals = {name: getattr(re, name) for name in _RE_FUNCTIONS}
+    try:
+        for name, original in originals.items():
+            setattr(re, name, _wrap_re(name, original, profiler, originals['subn']))
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(re, name, original)
+
+
+class Sampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval into collapsed stacks"""
+
+    def __init__(self, thread_id, interval=0.001):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+@contextmanager
+def profiling(patch_re=True, cprofile_path=None, collapsed_path=None):
+    """Activate a Profiler for the duration of the block"""
+    global _active
+    profiler = Profiler()
+    previous = _active
+    _active = profiler
+    cprof = cProfile.Profile() if cprofile_path else None
+    sampler = Sampler(threading.get_ident()) if collapsed_path else None
+    if sampler:
+        sampler.start()
+    if cprof:
+        cprof.enable()
+    try:
+        if patch_re:
+            with _patched_re(profiler):
+                yield profiler
+        else:
+            yield profiler
+    finally:
+        if cprof:
+            cprof.disable()
+            cprof.dump_stats(cprofile_path)
+        if sampler:
+            sampler.stop()
+            sampler.write(collapsed_path)
+        profiler.seconds = time.perf_counter() - profiler.started
+        _active = previous
+
+
+_VALUE_OPTIONS = ('--json', '--cprofile', '--collapsed')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', default='repair_profile.json', help='report file')
+    parser.add_argument('--cprofile', help='also write cProfile stats (for snakeviz/pstats)')
+    parser.add_argument('--collapsed', help='also write sampled collapsed stacks (flamegraph)')
+    parser.add_argument('--no-re', action='store_true', help='do not instrument the re module')
+    argv = sys.argv[1:] if argv is None else argv
+    # Everything from the script or -m on belongs to the profiled program
+    split = len(argv)
+    i = 0
+    while i < len(argv):
+        if argv[i] == '-m' or not argv[i].startswith('-'):
+            split = i
+            break
+        i += 2 if argv[i] in _VALUE_OPTIONS else 1
+    args = parser.parse_args(argv[:split])
+    args.target = argv[split:]
+    if not args.target or args.target == ['-m']:
+        parser.error('nothing to run: give script.py [args] or -m module [args]')
+
+    code = 0
+    with profiling(not args.no_re, args.cprofile, args.collapsed) as profiler:
+        try:
+            if args.target[0] == '-m':
+                sys.argv = args.target[1:]
+                runpy.run_module(args.target[1], run_name='__main__', alter_sys=True)
+            else:
+                sys.argv = args.target
+                runpy.run_path(args.target[0], run_name='__main__')
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(profiler.report(), f, ensure_ascii=False, indent=1)
+    print(f'\n{profiler.summary()}\n\nWrote {args.json}', file=sys.stderr)
+    return code
+
+
+if __name__ == '__main__':
+    # Run through the imported module so the engine sees the same _active
+    from repair import profiling
+    sys.exit(profiling.main())
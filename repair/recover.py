@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lossy emoji stub recovery
+
+When mojibake was read back as latin-1 and the C1 controls were dropped,
+an emoji keeps only its lead byte and whichever continuation bytes were
+printable: 🎯 (F0 9F 8E AF) becomes 'ð¯', 📊 (F0 9F 93 8A) becomes a bare
+'ð'. No decoder can restore those, but the clean sources use the same
+concepts with the right emoji ("Accuracy 🎯", "Storage 💾").
+
+An inverted index maps normalised title/name/description tokens to the
+emoji used in the same object literal across the sources. Each stub is
+then filled by index lookup, restricted to the emoji whose bytes leave
+exactly the surviving bytes once C1 bytes are dropped. Every guess gets a
+confidence: the winner's share of the evidence among the compatible
+emoji. Stubs are found with one regex pass; each line is tokenised at
+most once and shared by every stub (and emoji) around it.
+
+Only sequences decode_mojibake cannot undo are treated as stubs, so
+stubs are looked for in the decoded text. The decoder's own repairs are
+never written from here: a file that still has mojibake the decoder can
+undo is reported and left alone until it has been decoded (python -m
+repair.tree). The guesses are only reported unless --apply is given
+together with an explicit --min-confidence; at 0.7, 8 of the 143
+guesses checked against the clean sources were wrong.
+
+Usage: python -m repair.recover [file ...] [--source PATH ...] [--json]
+                                [--apply --min-confidence N]
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+from repair import journal
+from repair.context import ContextIndex
+from repair.decode import _TO_BYTE, decode_mojibake
+from repair.piece import diff_edits
+from repair.pipeline import write_text
+from repair.tree import find_files
+
+SOURCES = ['src']
+DEFAULT_FILES = ['src/data/lessons.ts']
+MIN_CONFIDENCE = 0.7
+
+# 4-byte emoji only: a stub always starts with the F0 lead byte 'ð'
+EMOJI = re.compile('([\U0001F000-\U0001FAFF])(\ufe0f?)')
+_CONTINUATION = ''.join(sorted(ch for ch, b in _TO_BYTE.items() if 0x80 <= b <= 0xBF))
+# 'ï¸' is U+FE0F (EF B8 8F) with the 0x8F dropped
+STUB = re.compile('ð([' + re.escape(_CONTINUATION) + ']{0,3})(ï¸)?')
+
+FIELD = re.compile(r'''(\w+)\s*:\s*(["'`])(.*?)\2''')
+WORD = re.compile(r'[a-z]{3,}')
+FIELD_WEIGHTS = {'title': 3.0, 'name': 3.0, 'label': 3.0, 'heading': 3.0,
+                 'description': 1.0, 'text': 1.0, 'details': 0.5}
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'are', 'can', 'its', 'into',
+    'your', 'you', 'their', 'they', 'them', 'was', 'were', 'will', 'has', 'have', 'not',
+    'all', 'any', 'more', 'most', 'such', 'than', 'then', 'when', 'which', 'also',
+    'one', 'use', 'used', 'using', 'like', 'very', 'how', 'what', 'between',
+    'icon', 'title', 'name', 'description', 'image', 'details', 'type', 'jpg', 'png',
+}
+# Evidence-free score shared by the emoji that fit a stub
+PRIOR = 1.0
+# How far a stub's object literal may reach up or down
+MAX_SPAN = 8
+
+
+def normalise(word):
+    """Lower-case word with a plural 's' removed"""
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    return word
+
+
+class Lines:
+    """Per-line token lists of one text, each line tokenised once"""
+
+    def __init__(self, text):
+        self.text = text
+        self.index = ContextIndex(text, [])
+        self._tokens = {}
+
+    def line(self, number):
+        starts = self.index.newlines
+        start = starts[number - 1] + 1 if number else 0
+        end = starts[number] if number < len(starts) else len(self.text)
+        return self.text[start:end]
+
+    def tokens(self, number):
+        """{token: weight} of one line; quoted fields weigh by field name"""
+        cached = self._tokens.get(number)
+        if cached is None:
+            line = self.line(number)
+            cached = {}
+            fields = FIELD.findall(line)
+            for key, _, value in fields or [('', '', line)]:
+                weight = FIELD_WEIGHTS.get(key, 1.0)
+                for word in WORD.findall(value.lower()):
+                    if word not in STOPWORDS:
+                        word = normalise(word)
+                        cached[word] = max(cached.get(word, 0.0), weight)
+            self._tokens[number] = cached
+        return cached
+
+    def context(self, number):
+        """Tokens of the object literal around a line: {token: weight}"""
+        first = number
+        while (first > 0 and number - first < MAX_SPAN
+               and '{' not in self.line(first) and '}' not in self.line(first - 1)):
+            first -= 1
+        last = number
+        while (last + 1 < self.index.line_count and last - number < MAX_SPAN
+               and '}' not in self.line(last) and '{' not in self.line(last + 1)):
+            last += 1
+        merged = {}
+        for n in range(first, last + 1):
+            for token, weight in self.tokens(n).items():
+                # The stub's own line counts double
+                weight *= 2.0 if n == number else 1.0
+                merged[token] = max(merged.get(token, 0.0), weight)
+        return merged
+
+
+class EmojiIndex:
+    """Inverted index: token -> emoji -> accumulated weight"""
+
+    def __init__(self):
+        self.postings = defaultdict(Counter)
+        self.frequency = Counter()
+        self.mass = Counter()       # token -> total weight over all emoji
+        self._compatible = {}
+
+    def add_text(self, text):
+        """Index every 4-byte emoji of a (decoded) text"""
+        lines = None
+        for m in EMOJI.finditer(text):
+            lines = lines or Lines(text)
+            emoji = m.group(1)
+            self.frequency[emoji] += 1
+            for token, weight in lines.context(lines.index.line_of(m.start())).items():
+                self.postings[token][emoji] += weight
+                self.mass[token] += weight
+
+    def add_file(self, file_path):
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+        if not text.isascii():
+            self.add_text(decode_mojibake(text)[0])
+
+    def compatible(self, surviving):
+        """Indexed emoji whose UTF-8 bytes minus dropped C1 bytes are `surviving`"""
+        found = self._compatible.get(surviving)
+        if found is None:
+            found = [e for e in self.frequency if _survives(e.encode('utf-8'), surviving)]
+            self._compatible[surviving] = found
+        return found
+
+    def guess(self, surviving, context):
+        """[(emoji, confidence)] best first, or [] when nothing fits"""
+        candidates = self.compatible(surviving)
+        if not candidates:
+            return []
+        allowed = set(candidates)
+        # Every fitting emoji starts from a prior by how common it is, so
+        # one weak vote for a single candidate is not a certain guess
+        known = sum(self.frequency[e] for e in candidates)
+        scores = Counter({e: PRIOR * self.frequency[e] / known for e in candidates})
+        total_emoji = len(self.frequency)
+        for token, weight in context.items():
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            # Rare tokens (few emoji) say more than common ones
+            idf = math.log(1 + total_emoji / len(posting))
+            mass = self.mass[token]
+            for emoji, value in posting.items():
+                if emoji in allowed:
+                    scores[emoji] += weight * idf * value / mass
+        total = sum(scores.values())
+        return [(e, s / total) for e, s in scores.most_common()]
+
+
+def _survives(encoded, surviving):
+    """True when dropping only 0x80-0x9F bytes from encoded leaves surviving"""
+    j = 0
+    for b in encoded:
+        if j < len(surviving) and b == surviving[j]:
+            j += 1
+        elif not 0x80 <= b <= 0x9F:
+            return False
+    return j == len(surviving)
+
+
+def build_index(sources=SOURCES):
+    index = EmojiIndex()
+    for source in sources:
+        for file_path in ([source] if source.endswith(('.ts', '.tsx')) else find_files(source)):
+            index.add_file(file_path)
+    return index
+
+
+class Guess:
+    __slots__ = ('offset', 'line', 'stub', 'emoji', 'confidence', 'applied', 'alternatives')
+
+    def __init__(self, offset, line, stub, emoji, confidence, applied, alternatives):
+        self.offset = offset
+        self.line = line
+        self.stub = stub
+        self.emoji = emoji
+        self.confidence = confidence
+        self.applied = applied
+        self.alternatives = alternatives
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def recover_text(text, index, min_confidence=MIN_CONFIDENCE):
+    """
+    Fill the lossy stubs of an already decoded text
+
+    Returns (text, guesses); only guesses at or above min_confidence are
+    applied, the rest are only reported.
+    """
+    lines = Lines(text)
+    guesses = []
+    pieces = []
+    last = 0
+    for m in STUB.finditer(text):
+        surviving = bytes([0xF0] + [_TO_BYTE[ch] for ch in m.group(1)])
+        line = lines.index.line_of(m.start())
+        ranked = index.guess(surviving, lines.context(line))
+        emoji, confidence = ranked[0] if ranked else (None, 0.0)
+        alternatives = [[e, round(c, 3)] for e, c in ranked[1:3]]
+        applied = emoji is not None and confidence >= min_confidence
+        if applied:
+            pieces.append(text[last:m.start()])
+            pieces.append(emoji + ('\ufe0f' if m.group(2) else ''))
+            last = m.end()
+        guesses.append(Guess(m.start(), line + 1, m.group(0), emoji, round(confidence, 3),
+                             applied, alternatives))
+    pieces.append(text[last:])
+    return ''.join(pieces), guesses
+
+
+def recover_file(file_path, index, min_confidence=MIN_CONFIDENCE, apply=False):
+    """
+    Guesses for the stubs of one file; written only with apply
+
+    Returns (guesses, undecoded): undecoded is the number of sequences
+    decode_mojibake would still repair. Such a file is never written, as
+    that would write the decoder's repairs along with the guesses.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        original = f.read()
+    decoded, undecoded = decode_mojibake(original)
+    text, guesses = recover_text(decoded, index, min_confidence)
+    if apply and not undecoded and text != original:
+        write_text(file_path, text)
+        before, after = (t.encode('utf-8', 'surrogateescape') for t in (original, text))
+        journal.record(file_path, before, [('repair.recover', diff_edits(before, after))])
+    return guesses, undecoded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES)
+    parser.add_argument('--source', action='append', dest='sources',
+                        help=f'clean file or directory to index (default: {", ".join(SOURCES)})')
+    parser.add_argument('--min-confidence', type=float,
+                        help=f'fill stubs guessed with at least this confidence '
+                             f'(reports use {MIN_CONFIDENCE}; required with --apply)')
+    parser.add_argument('--apply', action='store_true', help='write the guesses into the files')
+    parser.add_argument('--json', action='store_true', help='print guesses as JSON lines')
+    args = parser.parse_args(argv)
+    if args.apply and args.min_confidence is None:
+        parser.error('--apply needs an explicit --min-confidence')
+    min_confidence = MIN_CONFIDENCE if args.min_confidence is None else args.min_confidence
+
+    start = time.perf_counter()
+    index = build_index(args.sources or SOURCES)
+    indexed = time.perf_counter() - start
+    filled = kept = 0
+    status = 0
+    for file_path in args.files:
+        guesses, undecoded = recover_file(file_path, index, min_confidence, args.apply)
+        written = args.apply and not undecoded
+        for g in guesses:
+            if args.json:
+                print(json.dumps(dict(g.as_dict(), file=file_path, written=written and g.applied),
+                                 ensure_ascii=False))
+            elif g.applied:
+                arrow = '->' if written else 'would be'
+                print(f'{file_path}:{g.line}: {g.stub!r} {arrow} {g.emoji} ({g.confidence:.2f})')
+            else:
+                best = f', best guess {g.emoji}' if g.emoji else ', no emoji fits'
+                print(f'{file_path}:{g.line}: {g.stub!r} kept ({g.confidence:.2f}{best})')
+        if undecoded:
+            print(f'⚠️  {file_path}: {undecoded} sequence(s) the decoder can undo are still in it; '
+                  f'decode it first (python -m repair.tree), guesses above are for the decoded text'
+                  + ('; not written' if args.apply else ''), file=sys.stderr)
+            status = 1 if args.apply else status
+        if written or not args.apply:
+            filled += sum(1 for g in guesses if g.applied)
+        kept += sum(1 for g in guesses if not g.applied)
+    ms = (time.perf_counter() - start) * 1000
+    done = 'filled' if args.apply else 'would be filled (report only; --apply writes them)'
+    print(f'{filled} stub(s) {done}, {kept} below {min_confidence} kept '
+          f'({len(index.frequency)} emoji indexed in {indexed * 1000:.0f}ms, {ms:.0f}ms total)',
+          file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rule registry
+
+Regex repair rules live in rules.json as data instead of inline lists.
+Each rule is analysed once per rule-file version: the literal prefix and
+the longest literal the pattern cannot match without (its trigger) are
+derived from the parsed regex and cached by rule-file hash. Python cannot
+persist compiled pattern objects, so at run time a rule is only compiled
+when its trigger actually occurs in the text - clean files compile nothing.
+
+A rule may list the TSX span kinds it applies to ("spans": ["string",
+"jsx_text"]). When the caller says the content is a whole TSX file, such
+rules only run inside spans of those kinds, one span at a time, so they
+never touch identifiers or classNames and cannot backtrack across code.
+Rules without "spans" see the whole text, as before.
+
+Rules whose pattern repair.safety flags as able to backtrack badly run in
+a worker process and are skipped (with a report) when they take longer
+than their "budget_ms", so one pathological regex cannot stall a pass.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+MAXREPEAT = sre_parse.MAXREPEAT
+
+from repair import cache, profiling, safety
+from repair.profiling import encoded_len
+from repair.tsx import SPAN_KINDS, span_table
+
+RULES_FILE = os.path.join(os.path.dirname(__file__), 'rules.json')
+
+# Bump when the cached metadata gains fields
+_META_VERSION = 4
+
+_FLAGS = {
+    'IGNORECASE': re.IGNORECASE,
+    'MULTILINE': re.MULTILINE,
+    'DOTALL': re.DOTALL,
+}
+
+
+def _flatten(items):
+    # A plain group is mandatory, so its contents count as top level
+    for op, av in items:
+        if op is sre_parse.SUBPATTERN:
+            yield from _flatten(av[-1])
+        else:
+            yield op, av
+
+
+def analyse(pattern, flags=0):
+    """(literal prefix, trigger) of a pattern; '' when there is none"""
+    parsed = sre_parse.parse(pattern, flags)
+    if flags & re.IGNORECASE:
+        return '', ''
+    runs = ['']
+    for op, av in _flatten(parsed):
+        if op is sre_parse.LITERAL:
+            runs[-1] += chr(av)
+        elif runs[-1]:
+            runs.append('')
+    first = next(_flatten(parsed), (None, None))
+    prefix = runs[0] if first[0] is sre_parse.LITERAL else ''
+    return prefix, max(runs, key=len)
+
+
+_NEWLINE_CATEGORIES = {'CATEGORY_SPACE', 'CATEGORY_NOT_DIGIT', 'CATEGORY_NOT_WORD',
+                       'CATEGORY_LINEBREAK', 'CATEGORY_UNI_SPACE', 'CATEGORY_UNI_NOT_DIGIT',
+                       'CATEGORY_UNI_NOT_WORD', 'CATEGORY_UNI_LINEBREAK'}
+
+
+def _class_matches_newline(items):
+    negate = bool(items) and items[0][0] is sre_parse.NEGATE
+    hit = False
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            hit |= av == 10
+        elif op is sre_parse.RANGE:
+            hit |= av[0] <= 10 <= av[1]
+        elif op is sre_parse.CATEGORY:
+            hit |= str(av) in _NEWLINE_CATEGORIES
+    return hit != negate
+
+
+def line_span(items, flags=0):
+    """
+    Most newlines a match of a parsed pattern can consume
+
+    None when there is no bound: a repeat without a maximum over
+    something that can match a newline ([^"]*, \\s*), or a backreference.
+    """
+    total = 0
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            span = int(av == 10)
+        elif op is sre_parse.NOT_LITERAL:
+            span = int(av != 10)
+        elif op is sre_parse.ANY:
+            span = int(bool(flags & re.DOTALL))
+        elif op is sre_parse.IN:
+            span = int(_class_matches_newline(av))
+        elif op in safety._REPEATS:
+            low, high, item = av
+            span = line_span(item, flags)
+            if span:
+                span = None if high == MAXREPEAT else span * high
+        elif op is sre_parse.SUBPATTERN:
+            span = line_span(av[-1], flags)
+        elif op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+            span = line_span(av, flags)
+        elif op is sre_parse.BRANCH:
+            spans = [line_span(branch, flags) for branch in av[1]]
+            span = None if None in spans else max(spans)
+        elif op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            span = 0    # zero width
+        elif op is sre_parse.GROUPREF:
+            span = None  # whatever the group matched
+        elif isinstance(av, list):
+            span = line_span(av, flags)
+        else:
+            span = None
+        if span is None:
+            return None
+        total += span
+    return total
+
+
+def _subn_texts(compiled, replace, texts, measure):
+    """[(text, count, rewritten bytes)] of subn over each text"""
+    if not measure:
+        return [compiled.subn(replace, text) + (0,) for text in texts]
+    results = []
+    for text in texts:
+        rewritten = 0
+
+        def expand(m):
+            nonlocal rewritten
+            rewritten += encoded_len(m.group(0))
+            return m.expand(replace)
+
+        results.append(compiled.subn(expand, text) + (rewritten,))
+    return results
+
+
+def _subn_all(pattern, flags, replace, texts, measure):
+    # Runs in the worker process for hazardous rules
+    return _subn_texts(re.compile(pattern, flags), replace, texts, measure)
+
+
+_worker = None
+
+
+class Rule:
+    def __init__(self, spec, meta):
+        self.id = spec['id']
+        self.group = spec['group']
+        self.pattern = spec['pattern']
+        self.replace = spec['replace']
+        self.message = spec.get('message', '')
+        self.flags = 0
+        for name in spec.get('flags', []):
+            self.flags |= _FLAGS[name]
+        self.prefix = meta['prefix']
+        self.trigger = meta['trigger']
+        self.spans = tuple(spec['spans']) if 'spans' in spec else None
+        unknown = [kind for kind in self.spans or () if kind not in SPAN_KINDS]
+        self.error = meta['error'] or (f'unknown span kind {unknown[0]!r}' if unknown else None)
+        # Lines a match may reach beyond the line it starts on; None for no limit
+        self.context = spec.get('context', meta['max_lines'])
+        self.hazards = meta['hazards']
+        self.budget = spec.get('budget_ms', safety.DEFAULT_BUDGET_MS) / 1000
+        self._compiled = None
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+        return self._compiled
+
+    def may_match(self, content):
+        return not self.error and (not self.trigger or self.trigger in content)
+
+    def _subn(self, texts, measure=False):
+        """
+        [(text, count, rewritten bytes)] of subn over each text
+
+        rewritten is only counted with measure=True (it costs a Python
+        call per match). Hazardous rules run in the worker, which counts
+        it there; raises TimeoutError when the worker is over the rule's
+        budget.
+        """
+        global _worker
+        if not self.hazards:
+            return _subn_texts(self.compiled, self.replace, texts, measure)
+        if _worker is None:
+            _worker = safety.Worker()
+        return _worker.call(_subn_all, (self.pattern, self.flags, self.replace, texts, measure),
+                            self.budget)
+
+    def apply(self, content):
+        """
+        Return (content, hit count); one scan instead of findall + sub
+
+        Raises TimeoutError when a hazardous rule is over its budget.
+        """
+        profiler = profiling.active()
+        if profiler is not None:
+            return self._apply_profiled(content, profiler)
+        if self.error or (self.trigger and self.trigger not in content):
+            return content, 0
+        return self._subn([content])[0][:2]
+
+    def _apply_profiled(self, content, profiler):
+        start = time.perf_counter()
+        if self.error or (self.trigger and self.trigger not in content):
+            profiler.record('rule', self.id, time.perf_counter() - start, attempts=0)
+            return content, 0
+        scanned = len(content)
+        content, count, rewritten = self._subn([content], measure=True)[0]
+        profiler.record('rule', self.id, time.perf_counter() - start, matches=count,
+                        rewritten=rewritten, scanned=scanned)
+        return content, count
+
+    def apply_spans(self, pieces):
+        """
+        Run the rule inside the [kind, text] pieces of its span kinds
+
+        Pieces are rewritten in place; returns the hit count.
+        """
+        profiler = profiling.active()
+        start = time.perf_counter()
+        if self.error:
+            if profiler is not None:
+                profiler.record('rule', self.id, 0.0, attempts=0)
+            return 0
+        rewritten = scanned = 0
+        trigger = self.trigger
+        eligible = [piece for piece in pieces
+                    if piece[0] in self.spans and (not trigger or trigger in piece[1])]
+        results = self._subn([piece[1] for piece in eligible], measure=profiler is not None)
+        hits = 0
+        for piece, (text, count, piece_rewritten) in zip(eligible, results):
+            scanned += len(piece[1])
+            piece[1] = text
+            hits += count
+            rewritten += piece_rewritten
+        if profiler is not None:
+            profiler.record('rule', self.id, time.perf_counter() - start,
+                            attempts=1 if scanned else 0, matches=hits,
+                            rewritten=rewritten, scanned=scanned)
+        return hits
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = rules
+
+    def group(self, name):
+        return [rule for rule in self.rules if rule.group == name]
+
+    @property
+    def groups(self):
+        """Group names in file order"""
+        return list(dict.fromkeys(rule.group for rule in self.rules))
+
+    @property
+    def context(self):
+        """Widest context any rule needs, in lines; None when a rule has no limit"""
+        if self.unbounded:
+            return None
+        return max((rule.context for rule in self.rules if not rule.error), default=0)
+
+    @property
+    def unbounded(self):
+        """Ids of rules a match of which can run over any number of lines"""
+        return [rule.id for rule in self.rules if not rule.error and rule.context is None]
+
+    @property
+    def errors(self):
+        return [(rule.id, rule.error) for rule in self.rules if rule.error]
+
+    def apply(self, content, group, report=print, tsx=False):
+        """
+        Run one group of rules in file order
+
+        report(message) gets each rule's message for rules that hit.
+        tsx=True says content is a whole TSX file, so rules with span
+        kinds are confined to them; otherwise (a window, a .ts data file)
+        every rule sees the whole text.
+        Returns (content, {rule id: hits}).
+        """
+        hits = {}
+        pieces = None   # [kind, text] of content, while span rules run
+        for rule in self.group(group):
+            if rule.error and report:
+                report(f"⚠️  Skipped rule '{rule.id}': {rule.error}")
+            try:
+                # A span rule whose trigger is absent just misses below, unlexed
+                if tsx and rule.spans and (content is None or rule.may_match(content)):
+                    if pieces is None:
+                        pieces = [[kind, content[start:end]] for kind, start, end in span_table(content)]
+                    count = rule.apply_spans(pieces)
+                    if count:
+                        content = None
+                else:
+                    if pieces is not None and content is None:
+                        content = ''.join(text for _, text in pieces)
+                    content, count = rule.apply(content)
+                    if count:
+                        pieces = None   # lex the new text if a span rule follows
+            except TimeoutError:
+                count = 0
+                if report:
+                    report(f"⏱️  Skipped rule '{rule.id}': over its {rule.budget * 1000:.0f}ms budget")
+            hits[rule.id] = count
+            if count and rule.message and report:
+                report(rule.message.format(count=count, pattern=rule.pattern))
+        if content is None:
+            content = ''.join(text for _, text in pieces)
+        return content, hits
+
+
+def _analyse_all(specs):
+    meta = {}
+    for spec in specs:
+        flags = 0
+        for name in spec.get('flags', []):
+            flags |= _FLAGS[name]
+        try:
+            prefix, trigger = analyse(spec['pattern'], flags)
+            max_lines = line_span(sre_parse.parse(spec['pattern'], flags), flags)
+            hazards = [str(h) for h in safety.hazards(spec['pattern'], flags)]
+            meta[spec['id']] = {'prefix': prefix, 'trigger': trigger, 'max_lines': max_lines,
+                                'hazards': hazards, 'error': None}
+        except re.error as e:
+            escapes = safety.js_escapes(spec['pattern'])
+            if escapes:
+                e = f'{e} ({escapes[0][0]} is JavaScript syntax, Python spells it {escapes[0][1]})'
+            meta[spec['id']] = {'prefix': '', 'trigger': '', 'max_lines': 0,
+                                'hazards': [], 'error': str(e)}
+    return meta
+
+
+def load_rules(rules_file=RULES_FILE):
+    """Load the registry; rule analysis is reused from cache when unchanged"""
+    with open(rules_file, 'rb') as f:
+        raw = f.read()
+    specs = json.loads(raw.decode('utf-8'))
+    key = f'{cache.digest(raw)}-py{sys.version_info[0]}{sys.version_info[1]}-{_META_VERSION}'
+    meta = cache.load('rules', key)
+    if meta is None or any(spec['id'] not in meta for spec in specs):
+        meta = _analyse_all(specs)
+        cache.store('rules', key, meta)
+    return RuleSet([Rule(spec, meta[spec['id']]) for spec in specs])
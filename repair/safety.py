@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regex safety analysis for repair rules
+
+Every registered pattern (and, with --scripts, every constant pattern
+passed to re.* or repair.budgeted.* in the fix_*.py scripts) is compiled
+and checked for:
+
+    js-escape     JavaScript \\u{1F300} escapes, which Python rejects
+    nested        an unbounded quantifier inside another one: (a+)*
+    adjacent      two unbounded quantifiers that can trade the same
+                  characters, e.g. [^<]*Ã[^<]*? - every split is tried
+
+Hazardous patterns are then timed in a child process on generated
+adversarial inputs - the literal lead-in followed by a long run of the
+character both quantifiers accept, with nothing to end the match - at
+doubling lengths up to --length. Patterns whose worst case goes over the
+per-rule budget fail the check.
+
+At run time repair.rules runs hazardous rules in a worker process with
+the same budget, so one pathological regex cannot stall a repair pass;
+scripts get the same through repair.budgeted. A hazardous script pattern
+passed to re directly has no budget and fails the check.
+
+Usage: python -m repair.safety [--rules FILE] [--scripts] [--budget MS]
+                               [--length N] [--no-timing] [--json]
+"""
+
+import argparse
+import ast
+import glob
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+MAXREPEAT = sre_parse.MAXREPEAT
+_REPEATS = tuple(op for op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+                               getattr(sre_parse, 'POSSESSIVE_REPEAT', None)) if op is not None)
+_POSSESSIVE = (getattr(sre_parse, 'POSSESSIVE_REPEAT', None), getattr(sre_parse, 'ATOMIC_GROUP', None))
+
+DEFAULT_BUDGET_MS = 500
+# Adversarial inputs grow to ~3x the longest line of ModuleDetail.tsx
+MAX_LENGTH = 4096
+START_LENGTH = 256
+
+JS_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\u\{([0-9A-Fa-f]+)\}')
+
+# Characters set membership is checked against: printable ASCII, the
+# usual whitespace and the mojibake/emoji characters the rules are about
+_ALPHABET = (''.join(chr(c) for c in range(0x20, 0x7F)) + '\n\t\r'
+             + 'ÃÂâ€™ðŸ˜Å¸°¢¯¸ï¾•→✓💾🚀️')
+
+_CATEGORIES = {
+    'DIGIT': str.isdigit,
+    'SPACE': str.isspace,
+    'WORD': lambda ch: ch.isalnum() or ch == '_',
+    'LINEBREAK': lambda ch: ch == '\n',
+}
+
+
+def js_escapes(pattern):
+    """[(escape, Python spelling)] of JavaScript \\u{...} escapes in pattern"""
+    return [(m.group(0)[len(m.group(1)):], f'\\U{int(m.group(2), 16):08X}')
+            for m in JS_ESCAPE.finditer(pattern)]
+
+
+def _category(name, ch):
+    name = name.replace('CATEGORY_', '').replace('UNI_', '').replace('LOC_', '')
+    negate = name.startswith('NOT_')
+    test = _CATEGORIES[name[4:] if negate else name]
+    return test(ch) != negate
+
+
+def _in_class(items, ch):
+    negate = bool(items) and items[0][0] is sre_parse.NEGATE
+    hit = False
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            hit |= ord(ch) == av
+        elif op is sre_parse.RANGE:
+            hit |= av[0] <= ord(ch) <= av[1]
+        elif op is sre_parse.CATEGORY:
+            hit |= _category(str(av), ch)
+    return hit != negate
+
+
+def char_set(op, av, flags, alphabet=_ALPHABET):
+    """Characters of alphabet one single-character item matches, or None"""
+    if op is sre_parse.LITERAL:
+        chars = {chr(av)}
+        if flags & re.IGNORECASE:
+            chars |= {chr(av).lower(), chr(av).upper()}
+        return frozenset(chars)
+    if op is sre_parse.NOT_LITERAL:
+        return frozenset(ch for ch in alphabet if ord(ch) != av)
+    if op is sre_parse.ANY:
+        return frozenset(ch for ch in alphabet if ch != '\n' or flags & re.DOTALL)
+    if op is sre_parse.IN:
+        return frozenset(ch for ch in alphabet if _in_class(av, ch))
+    return None
+
+
+def _consumable(items, flags, alphabet):
+    """Every character a sequence of items could consume"""
+    chars = set()
+    for op, av in items:
+        single = char_set(op, av, flags, alphabet)
+        if single is not None:
+            chars |= single
+        elif op in _REPEATS:
+            chars |= _consumable(av[2], flags, alphabet)
+        elif op is sre_parse.SUBPATTERN:
+            chars |= _consumable(av[-1], flags, alphabet)
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                chars |= _consumable(branch, flags, alphabet)
+    return frozenset(chars)
+
+
+def _flatten(items):
+    # Mandatory groups do not change what is adjacent to what
+    for op, av in items:
+        if op is sre_parse.SUBPATTERN:
+            yield from _flatten(av[-1])
+        else:
+            yield op, av
+
+
+def _unbounded(op, av):
+    return op in _REPEATS and av[1] == MAXREPEAT and op not in _POSSESSIVE
+
+
+class Hazard:
+    __slots__ = ('kind', 'detail', 'lead', 'pump')
+
+    def __init__(self, kind, detail, lead='', pump=''):
+        self.kind = kind
+        self.detail = detail
+        self.lead = lead     # text that gets the engine to the quantifiers
+        self.pump = pump     # character both quantifiers accept
+
+    def __str__(self):
+        return f'{self.kind}: {self.detail}'
+
+
+def _witness(items, flags, alphabet):
+    """Shortest-ish text that the items match"""
+    out = []
+    for op, av in items:
+        single = char_set(op, av, flags, alphabet)
+        if single is not None:
+            out.append(min(single) if single else '')
+        elif op in _REPEATS:
+            out.append(_witness(av[2], flags, alphabet) * av[0])
+        elif op is sre_parse.SUBPATTERN:
+            out.append(_witness(av[-1], flags, alphabet))
+        elif op is sre_parse.BRANCH:
+            out.append(_witness(av[1][0], flags, alphabet))
+    return ''.join(out)
+
+
+def _scan(items, flags, alphabet, lead, hazards, followed=False):
+    # followed: something mandatory comes after items, so a match can fail
+    # at their end and make the engine retry every split
+    seq = list(_flatten(items))
+    for i, (op, av) in enumerate(seq):
+        before = lead + _witness(seq[:i], flags, alphabet)
+        rest_required = followed or bool(_witness(seq[i + 1:], flags, alphabet))
+        if op in _REPEATS:
+            body = av[2]
+            inner = [(o, a) for o, a in _walk(body) if _unbounded(o, a)]
+            if _unbounded(op, av) and inner:
+                pump = min(_consumable(inner[0][1][2], flags, alphabet) or {'a'})
+                hazards.append(Hazard('nested', 'unbounded quantifier inside an unbounded quantifier',
+                                      before, pump))
+            _scan(body, flags, alphabet, before, hazards, True)
+            if not _unbounded(op, av):
+                continue
+            first = _consumable(body, flags, alphabet)
+            for j in range(i + 1, len(seq)):
+                op2, av2 = seq[j]
+                if _unbounded(op2, av2) and (followed or _witness(seq[j + 1:], flags, alphabet)):
+                    shared = first & _consumable(av2[2], flags, alphabet)
+                    if shared:
+                        between = _witness(seq[i + 1:j], flags, alphabet)
+                        pump = next((ch for ch in between if ch in shared), min(shared))
+                        hazards.append(Hazard(
+                            'adjacent', f'unbounded quantifiers at items {i + 1} and {j + 1} '
+                            f'can trade {len(shared)} sampled character(s), e.g. {pump!r}',
+                            before, pump))
+                        break
+                if op2 in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                    continue
+                # Keep looking only while the first quantifier could also
+                # have consumed what stands in between
+                if not (_consumable([seq[j]], flags, alphabet) & first):
+                    break
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                _scan(branch, flags, alphabet, before, hazards, rest_required)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            _scan(av[1], flags, alphabet, before, hazards, rest_required)
+
+
+def _walk(items):
+    """Every item below items, depth first"""
+    for op, av in items:
+        yield op, av
+        if op in _REPEATS:
+            yield from _walk(av[2])
+        elif op is sre_parse.SUBPATTERN:
+            yield from _walk(av[-1])
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                yield from _walk(branch)
+
+
+def hazards(pattern, flags=0):
+    """Static quantifier hazards of a pattern; raises re.error when it does not parse"""
+    found = []
+    parsed = sre_parse.parse(pattern, flags)
+    literals = ''.join(chr(av) for op, av in _walk(parsed) if op is sre_parse.LITERAL)
+    alphabet = ''.join(dict.fromkeys(_ALPHABET + literals))
+    _scan(parsed, flags, alphabet, '', found)
+    return found
+
+
+def _time_search(pattern, flags, text):
+    compiled = re.compile(pattern, flags)
+    start = time.perf_counter()
+    compiled.search(text)
+    return time.perf_counter() - start
+
+
+def _measure(pattern, flags, lead, pump, budget, max_length):
+    """[(length, seconds)] at doubling lengths until over budget"""
+    points = []
+    length = START_LENGTH
+    while length <= max_length:
+        seconds = _time_search(pattern, flags, lead + pump * length)
+        points.append((length, seconds))
+        if seconds > budget:
+            break
+        length *= 2
+    return points
+
+
+class Worker:
+    """One child process for running regexes that may not come back"""
+
+    def __init__(self):
+        self.pool = None
+
+    def call(self, func, args, timeout):
+        """func(*args) in the child; raises TimeoutError after timeout seconds"""
+        if self.pool is None:
+            self.pool = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn').Pool(1)
+        result = self.pool.apply_async(func, args)
+        try:
+            return result.get(timeout)
+        except multiprocessing.TimeoutError:
+            # The engine cannot be interrupted: kill it, start afresh next time
+            self.pool.terminate()
+            self.pool = None
+            raise TimeoutError(f'over {timeout * 1000:.0f}ms') from None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+
+def worst_case(pattern, flags, hazard, budget, max_length, worker):
+    """(worst seconds, at length, growth exponent or None); seconds None on timeout"""
+    try:
+        points = worker.call(_measure, (pattern, flags, hazard.lead, hazard.pump, budget, max_length),
+                             timeout=budget * 4 + 2)
+    except TimeoutError:
+        return None, None, None
+    length, seconds = max(points, key=lambda p: p[1])
+    growth = None
+    if len(points) >= 2 and points[-2][1] > 1e-4:
+        growth = math.log(points[-1][1] / points[-2][1]) / math.log(points[-1][0] / points[-2][0])
+    return seconds, length, growth
+
+
+class Report:
+    __slots__ = ('source', 'name', 'pattern', 'error', 'hazards', 'seconds', 'length', 'growth',
+                 'ok')
+
+    def __init__(self, source, name, pattern):
+        self.source = source
+        self.name = name
+        self.pattern = pattern
+        self.error = None
+        self.hazards = []
+        self.seconds = None
+        self.length = None
+        self.growth = None
+        self.ok = True
+
+    def as_dict(self):
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d['hazards'] = [str(h) for h in self.hazards]
+        return d
+
+
+def check(source, name, pattern, flags, budget, max_length, worker=None, budgeted=True):
+    """
+    Report on one pattern
+
+    budgeted=False says nothing bounds the pattern's run time, so any
+    backtracking hazard fails the check.
+    """
+    report = Report(source, name, pattern)
+    report.hazards = [Hazard('js-escape', f'{escape} is JavaScript syntax, Python spells it {python}')
+                      for escape, python in js_escapes(pattern)]
+    try:
+        report.hazards += hazards(pattern, flags)
+        re.compile(pattern, flags)
+    except re.error as e:
+        report.error = str(e)
+        report.ok = False
+        return report
+    if not budgeted and any(h.kind != 'js-escape' for h in report.hazards):
+        report.error = 'hazardous pattern passed to re without a budget, use repair.budgeted'
+        report.ok = False
+    if worker is None:
+        return report
+    for hazard in report.hazards:
+        if hazard.kind == 'js-escape':
+            continue
+        seconds, length, growth = worst_case(pattern, flags, hazard, budget, max_length, worker)
+        if seconds is None:
+            report.seconds, report.length, report.ok = None, max_length, False
+            report.error = f'no result within {budget * 4 + 2:.1f}s'
+            break
+        if report.seconds is None or seconds > report.seconds:
+            report.seconds, report.length, report.growth = seconds, length, growth
+    if report.seconds is not None and report.seconds > budget:
+        report.ok = False
+    return report
+
+
+_RE_FUNCTIONS = {'compile', 'search', 'match', 'fullmatch', 'sub', 'subn', 'findall',
+                 'finditer', 'split'}
+
+
+def _flags_of(node):
+    flags = 0
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Attribute) and isinstance(sub.value, ast.Name) and sub.value.id == 're':
+            flags |= getattr(re, sub.attr, 0) if sub.attr.isupper() else 0
+    return flags
+
+
+def script_patterns(file_path):
+    """
+    [(name, pattern, flags, budgeted)] of constant patterns in a script
+
+    Patterns passed to re.* or to budgeted.* (repair.budgeted); budgeted
+    says which.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), file_path)
+    constants = {}
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant)
+                and isinstance(node.value.value, str)):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    found = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name) and node.func.value.id in ('re', 'budgeted')
+                and node.func.attr in _RE_FUNCTIONS and node.args):
+            continue
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            pattern = arg.value
+        elif isinstance(arg, ast.Name) and arg.id in constants:
+            pattern = constants[arg.id]
+        else:
+            continue
+        flags = 0
+        for extra in node.args[1:] + [kw.value for kw in node.keywords if kw.arg == 'flags']:
+            flags |= _flags_of(extra)
+        found.append((f'line {node.lineno}', pattern, flags, node.func.value.id == 'budgeted'))
+    return found
+
+
+def main(argv=None):
+    from repair.rules import RULES_FILE, load_rules
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', default=RULES_FILE)
+    parser.add_argument('--scripts', action='store_true',
+                        help='also check constant patterns in the fix_*.py scripts')
+    parser.add_argument('--budget', type=float,
+                        help='worst-case milliseconds allowed per pattern (default: each '
+                        f"rule's budget_ms, {DEFAULT_BUDGET_MS} for scripts)")
+    parser.add_argument('--length', type=int, default=MAX_LENGTH,
+                        help='longest adversarial input in characters')
+    parser.add_argument('--no-timing', action='store_true', help='static checks only')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    default = (args.budget or DEFAULT_BUDGET_MS) / 1000
+    targets = [('rules.json', rule.id, rule.pattern, rule.flags,
+                args.budget / 1000 if args.budget else rule.budget, True)
+               for rule in load_rules(args.rules).rules]
+    broken = []
+    if args.scripts:
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for file_path in sorted(glob.glob(os.path.join(script_dir, 'fix_*.py'))):
+            try:
+                found = script_patterns(file_path)
+            except SyntaxError as e:
+                broken.append((os.path.basename(file_path), e))
+                continue
+            for name, pattern, flags, budgeted in found:
+                targets.append((os.path.basename(file_path), name, pattern, flags, default,
+                                budgeted))
+
+    worker = None if args.no_timing else Worker()
+    reports = []
+    try:
+        for source, name, pattern, flags, budget, budgeted in targets:
+            reports.append(check(source, name, pattern, flags, budget, args.length, worker,
+                                 budgeted))
+    finally:
+        if worker is not None:
+            worker.close()
+
+    for r in reports:
+        if args.json:
+            print(json.dumps(r.as_dict(), ensure_ascii=False))
+            continue
+        if not r.error and not r.hazards:
+            continue
+        mark = '✅' if r.ok else '❌'
+        print(f'{mark} {r.source} {r.name}: {r.pattern[:70]!r}')
+        if r.error:
+            print(f'     error: {r.error}')
+        for h in r.hazards:
+            print(f'     {h}')
+        if r.seconds is not None:
+            growth = f', grows ~n^{r.growth:.1f}' if r.growth else ''
+            print(f'     worst case {r.seconds * 1000:.1f}ms at {r.length} chars{growth}')
+    for source, e in broken:
+        print(f'❌ {source}: cannot parse: {e}', file=sys.stderr)
+    failed = sum(1 for r in reports if not r.ok) + len(broken)
+    flagged = sum(1 for r in reports if r.hazards)
+    if not args.json:
+        print(f'{len(reports)} pattern(s): {flagged} with hazards, {failed} failing')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
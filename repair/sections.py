@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module/topic section map for ModuleDetail.tsx
+
+One scan finds the brace-balanced extent of every getModuleNSections()
+function and every `moduleId === N && ... topicId === "T"` render branch.
+The nested intervals are flattened into sorted boundaries, so "which
+module/topic owns offset X" is a binary search. Maps are cached by file
+hash, so an unchanged file is never rescanned. After an edit a map can be
+shifted along, unless the edit adds, removes or changes a section header
+(header_edited); then it has to be rebuilt.
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+from repair import cache
+from repair.tsx import scan
+
+Section = namedtuple('Section', 'start end module topic')
+
+SECTION_FUNCTION = re.compile(r'const getModule(\d+)Sections = \(\) => (\{)')
+# {moduleId === 2 && module2Sections && topicId === "1" && (...)}
+RENDER_BRANCH = re.compile(r'(\{)moduleId === (\d+) &&[^\n]*?topicId === "([^"]+)"')
+# ) : moduleId === 1 && topicId === "2" ? (...)
+TERNARY_BRANCH = re.compile(r'moduleId === (\d+) && topicId === "([^"]+)" \? (\()')
+# Every header fits on one line
+HEADERS = (SECTION_FUNCTION, RENDER_BRANCH, TERNARY_BRANCH)
+
+
+def find_sections(text):
+    """All sections of one text, as Section tuples with exclusive ends"""
+    pairs = scan(text).pairs
+    found = []
+
+    def add(opener, module, topic):
+        close = pairs.get(opener)
+        # Openers inside strings or comments never get paired
+        if close is not None:
+            found.append(Section(opener, close + 1, int(module), topic))
+
+    for m in SECTION_FUNCTION.finditer(text):
+        add(m.start(2), m.group(1), None)
+    for m in RENDER_BRANCH.finditer(text):
+        add(m.start(1), m.group(2), m.group(3))
+    for m in TERNARY_BRANCH.finditer(text):
+        add(m.start(3), m.group(1), m.group(2))
+    return found
+
+
+class SectionMap:
+    """Innermost-section lookup over flattened, nested intervals"""
+
+    def __init__(self, sections):
+        self.sections = sorted(sections, key=lambda s: (s.start, -s.end))
+        self.bounds = [0]
+        self.owners = [None]
+        stack = []
+        for section in self.sections:
+            while stack and stack[-1].end <= section.start:
+                self._close(stack)
+            stack.append(section)
+            self._mark(section.start, section)
+        while stack:
+            self._close(stack)
+
+    def _close(self, stack):
+        done = stack.pop()
+        self._mark(done.end, stack[-1] if stack else None)
+
+    def _mark(self, offset, owner):
+        if offset == self.bounds[-1]:
+            self.owners[-1] = owner
+        else:
+            self.bounds.append(offset)
+            self.owners.append(owner)
+
+    @classmethod
+    def from_source(cls, data):
+        """
+        Build (or load from cache) the map of a str, bytes or mmap buffer
+
+        str gives character offsets; bytes and mmap give byte offsets.
+        """
+        unit = 'chars' if isinstance(data, str) else 'bytes'
+        key = f'{cache.digest(data)}-{unit}'
+        cached = cache.load('sections', key)
+        if cached is not None:
+            return cls(Section(*s) for s in cached)
+        text = data if unit == 'chars' else bytes(data).decode('latin-1')
+        sections = find_sections(text)
+        cache.store('sections', key, [list(s) for s in sections])
+        return cls(sections)
+
+    def shift(self, offset, delta):
+        """Move every boundary after offset by delta, following an edit there"""
+        i = bisect_right(self.bounds, offset)
+        self.bounds[i:] = [b + delta for b in self.bounds[i:]]
+
+    def owner(self, offset):
+        """Innermost Section containing offset, or None"""
+        return self.owners[bisect_right(self.bounds, offset) - 1]
+
+    def module_at(self, offset):
+        section = self.owner(offset)
+        return section.module if section else None
+
+    def topic_at(self, offset):
+        """(module, topic) owning offset; topic is None outside render branches"""
+        section = self.owner(offset)
+        return (section.module, section.topic) if section else (None, None)
+
+
+def _lines(data, start, end):
+    """The whole lines of data around [start, end), as str"""
+    nl = b'\n' if isinstance(data, (bytes, bytearray)) else '\n'
+    start = data.rfind(nl, 0, start) + 1
+    stop = data.find(nl, end)
+    lines = data[start:len(data) if stop < 0 else stop]
+    return lines if isinstance(lines, str) else bytes(lines).decode('latin-1')
+
+
+def header_edited(old, new, start, old_end, new_end):
+    """
+    Whether replacing old[start:old_end] with new[start:new_end] touched a
+    section header line, so a shifted map would be stale
+    """
+    return any(pattern.search(_lines(data, start, end))
+               for data, end in ((old, old_end), (new, new_end)) for pattern in HEADERS)
+
+
+def load_sections(file_path):
+    """Section map of a file, in byte offsets"""
+    with open(file_path, 'rb') as f:
+        return SectionMap.from_source(f.read())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Constant-memory streaming repair
+
+Reads fixed-size byte chunks through an incremental UTF-8 decoder and
+repairs text as soon as it is safe to cut it off. Every repair needs a
+non-ASCII character and spans at most the rules' context + 1 lines, so a
+cut between two blocks of context + 1 pure-ASCII lines can never split a
+match. Everything after the last such cut is carried over as the overlap
+tail. Output is written as it goes; memory stays around the chunk size
+plus the tail. A rule that can match across any number of lines
+(RuleSet.unbounded) leaves no safe cut, and the input is then repaired
+in one piece.
+
+A .tsx input is lexed as it streams, so that span rules stay inside
+strings and JSX text as in a whole-file pass. The lexer resumes at each
+cut from the state it stopped in; a cut inside a token whose end has
+not been read yet waits for more input.
+
+Usage: python -m repair.stream [input|-] [-o output|-] [--chunk-size BYTES]
+       python -m repair.stream FILE --in-place
+"""
+
+import argparse
+import codecs
+import os
+import shutil
+import sys
+import tempfile
+
+from repair.incremental import repair_text
+from repair.rules import load_rules
+from repair.tsx import CODE, Scan, lex
+
+# Small enough that no string crosses glibc's 128 KiB mmap threshold even
+# when the text is all astral characters; larger chunks raise the dynamic
+# threshold and the heap then fragments and grows with the input size
+CHUNK_SIZE = 8 * 1024
+# Cut anyway once the tail grows this many chunks without a safe point
+MAX_TAIL_CHUNKS = 16
+
+
+def _safe_cut(text, end, need):
+    """
+    Latest offset <= end with `need` complete ASCII lines on each side
+
+    end must be a line start. Returns 0 when there is none.
+    """
+    starts = []   # starts of the current run of ASCII lines, bottom up
+    pos = end
+    while pos > 0:
+        start = text.rfind('\n', 0, pos - 1) + 1
+        if text[start:pos].isascii():
+            starts.append(start)
+            if len(starts) == 2 * need:
+                return starts[need - 1]
+        else:
+            starts = []
+        pos = start
+    return 0
+
+
+class _Spans:
+    """TSX spans of a stream, lexed one cut at a time"""
+
+    def __init__(self):
+        self.before = ''    # end of the text already cut off, for the lexer's lookbehind
+        self.pending = []   # spans already lexed at the start of the next piece
+        self.mode, self.stack = CODE, []
+
+    def spans(self, text, cut, final=False):
+        """
+        Spans of text[:cut], the next piece, as [(kind, start, end)]
+
+        text runs on past cut as far as the input has been read. Returns
+        None, and keeps its state, while no token boundary at or after cut
+        has been read.
+        """
+        lead = len(self.before)
+        start = lead + (self.pending[-1][2] if self.pending else 0)
+        result = Scan()
+        i, mode, stack = lex(self.before + text, result, start, self.mode, list(self.stack),
+                             () if final else (lead + cut,), lambda *state: True)
+        if not final and i == lead + len(text):
+            return None
+        spans = []
+        for kind, a, b in self.pending + [(kind, a - lead, b - lead) for kind, a, b in result.spans]:
+            if spans and spans[-1][0] == kind:
+                spans[-1] = (kind, spans[-1][1], b)
+            else:
+                spans.append((kind, a, b))
+        self.pending = [(kind, max(a, cut) - cut, b - cut) for kind, a, b in spans if b > cut]
+        self.mode, self.stack = mode, stack
+        # The lexer looks back past whitespace to the previous word
+        before = self.before + text[:cut]
+        significant = len(before.rstrip(' \t\r\n'))
+        self.before = before[max(0, significant - 16):]
+        return [(kind, a, min(b, cut)) for kind, a, b in spans if a < cut]
+
+
+def repair_stream(infile, outfile, rules=None, chunk_size=CHUNK_SIZE, tsx=False):
+    """
+    Repair a binary input stream into a binary output stream; returns hits
+
+    With tsx, span rules are confined to the spans of a TSX lex.
+    """
+    rules = rules or load_rules()
+    need = None if rules.context is None else rules.context + 1
+    decoder = codecs.getincrementaldecoder('utf-8')('surrogateescape')
+    lexer = _Spans() if tsx else None
+    tail = ''
+    hits = 0
+
+    def emit(text, spans):
+        nonlocal hits
+        fixed, count = repair_text(text, rules, spans=spans)
+        hits += count
+        outfile.write(fixed.encode('utf-8', 'surrogateescape'))
+
+    while True:
+        chunk = infile.read(chunk_size)
+        tail += decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            break
+        if need is None:
+            continue
+        end = tail.rfind('\n') + 1
+        cut = _safe_cut(tail, end, need)
+        if not cut and len(tail) > MAX_TAIL_CHUNKS * chunk_size:
+            # No quiet stretch at all: fall back to a plain line boundary
+            cut = end
+        spans = None
+        if cut and lexer is not None:
+            spans = lexer.spans(tail, cut)
+            if spans is None:
+                cut = 0
+        if cut:
+            emit(tail[:cut], spans)
+            tail = tail[cut:]
+    if tail:
+        emit(tail, None if lexer is None else lexer.spans(tail, len(tail), final=True))
+    return hits
+
+
+def repair_file_streaming(file_path, chunk_size=CHUNK_SIZE):
+    """Stream file_path through the repair into a temp file, then replace it"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.')
+    try:
+        with open(file_path, 'rb') as infile, os.fdopen(fd, 'wb') as outfile:
+            hits = repair_stream(infile, outfile, chunk_size=chunk_size,
+                                 tsx=file_path.endswith('.tsx'))
+        shutil.copymode(file_path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
+    return hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', nargs='?', default='-')
+    parser.add_argument('-o', '--output', default='-')
+    parser.add_argument('--in-place', action='store_true', help='rewrite the input file')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.in_place:
+        if args.input == '-':
+            parser.error('--in-place needs a file')
+        hits = repair_file_streaming(args.input, args.chunk_size)
+    else:
+        infile = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+        outfile = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+        name = args.output if args.input == '-' else args.input
+        try:
+            hits = repair_stream(infile, outfile, chunk_size=args.chunk_size,
+                                 tsx=name.endswith('.tsx'))
+        finally:
+            if infile is not sys.stdin.buffer:
+                infile.close()
+            if outfile is not sys.stdout.buffer:
+                outfile.close()
+    print(f'{hits} repair(s)', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
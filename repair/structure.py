@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental TSX structure check
+
+The scripts insert JSX (<Rocket className="mr-2 h-5 w-5 inline" />) and
+rewrite spans by regex; a stray quote, brace or unpaired tag used to
+show up only when the Vite build failed. This runs the tsx scanner over
+the file once and reports every unbalanced (), [], {}, ${}, string,
+template literal and comment, and every JSX tag whose closing tag does
+not match (</div> for a <Card>) or that is never closed.
+
+The full scan keeps a checkpoint of the lexer state - offset, mode and
+the stack of open delimiters - every CHECKPOINT_EVERY characters. After
+an edit, update() re-lexes from the last checkpoint before each edited
+span and stops as soon as it reaches an old checkpoint, past the edit,
+in the same state (offsets shifted): from there on the scan is the old
+one, so its checkpoints and errors are reused. A repair stage is checked
+in the time it takes to lex the few kilobytes around its edits, not the
+whole file. The checkpoints are cached by file hash, so the next run
+over a file this one wrote starts without a full scan either.
+
+A token that fails to match looks ahead: an unterminated string,
+comment or template literal, or a bad tag, up to the end of the text,
+and a '/' that is not a regex literal up to the end of its line. So a
+text that already has errors is rescanned in full, and the re-lex starts
+at the checkpoint before the line of each edit.
+
+Offsets are indexes into the text; check bytes decoded as latin-1 to
+get byte offsets, which is what the pipeline does.
+
+Usage: python -m repair.structure [path ...]
+
+Exit codes: 0 balanced, 1 structural errors found, 2 a file could not be read.
+"""
+
+import argparse
+import heapq
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, count, islice
+
+from repair import cache
+from repair.tsx import CODE, Scan, lex, unclosed
+
+CHECKPOINT_EVERY = 2048
+DEFAULT_PATHS = ['src/pages/ModuleDetail.tsx']
+# A '/' or '<' decides regex or JSX from the word before it, up to this many characters
+LOOKBEHIND = 16
+
+_SIGNIFICANT = re.compile(r'\S')
+
+
+class _Offsets:
+    """Maps offsets of the text before a batch of edits to the text after it"""
+
+    def __init__(self, edits):
+        self.starts = [offset for offset, _, _ in edits]
+        self.ends = [offset + removed for offset, removed, _ in edits]
+        self.deltas = list(accumulate((inserted - removed for _, removed, inserted in edits),
+                                      initial=0))
+        # Where each edit's inserted text starts and ends in the new text
+        self.new_starts = [offset + delta for offset, delta in zip(self.starts, self.deltas)]
+        self.new_ends = [end + delta for end, delta in zip(self.ends, self.deltas[1:])]
+
+    def new(self, offset):
+        """Where offset is now, or None when an edit removed it"""
+        k = bisect_right(self.ends, offset)
+        if k < len(self.starts) and self.starts[k] <= offset:
+            return None
+        return offset + self.deltas[k]
+
+    def old(self, offset):
+        """Where a new offset was, or None when an edit inserted it"""
+        k = bisect_right(self.new_ends, offset)
+        if k < len(self.starts) and self.new_starts[k] <= offset:
+            return None
+        return offset - self.deltas[k]
+
+    def edited(self, offset):
+        """Whether an edit starts at or covers offset"""
+        k = bisect_right(self.starts, offset)
+        return bool(k) and (self.starts[k - 1] == offset or self.ends[k - 1] > offset)
+
+
+class Structure:
+    """Structural errors of one text, kept up to date edit by edit"""
+
+    def __init__(self, text, every=CHECKPOINT_EVERY):
+        self.every = every
+        self.text = text
+        # (offset, mode, stack, errors so far), in order; the first is the start of the text
+        self.checkpoints = [(0, CODE, (), 0)]
+        self.found = []         # (offset, message) in scan order, unclosed delimiters aside
+        self.stack = ()         # what is open at the end of the text
+        self.relexed = 0
+        self._lex(0, CODE, (), count(every, every), None)
+
+    @classmethod
+    def cached(cls, text, every=CHECKPOINT_EVERY):
+        """Structure of text, from the cache when the same text was checked before"""
+        stored = cache.load('structure', cache.digest(text))
+        if stored is None or stored['every'] != every:
+            structure = cls(text, every)
+            structure.save()
+            return structure
+        structure = cls.__new__(cls)
+        structure.every = every
+        structure.text = text
+        structure.checkpoints = [(i, mode, tuple(map(tuple, stack)), errors)
+                                 for i, mode, stack, errors in stored['checkpoints']]
+        structure.found = [tuple(error) for error in stored['found']]
+        structure.stack = tuple(map(tuple, stored['stack']))
+        structure.relexed = 0
+        return structure
+
+    def save(self):
+        cache.store('structure', cache.digest(self.text),
+                    {'every': self.every, 'checkpoints': self.checkpoints,
+                     'found': self.found, 'stack': self.stack})
+
+    @property
+    def errors(self):
+        """(offset, message) of every structural error"""
+        return self.found + unclosed(self.stack)
+
+    def _lex(self, i, mode, stack, marks, converged):
+        """
+        Lex self.text from a checkpoint, appending checkpoints and errors
+
+        Stops when converged(state) returns an old checkpoint index, which
+        is returned; None when the lexer ran to the end.
+        """
+        result = Scan()
+        base = len(self.found)
+        checkpoints = self.checkpoints
+        stopped = []
+
+        def checkpoint(i, mode, stack):
+            state = (i, mode, tuple(stack), base + len(result.errors))
+            index = converged(state) if converged else None
+            if index is not None:
+                stopped.append(index)
+                return True
+            checkpoints.append(state)
+            return False
+
+        end, _, stack = lex(self.text, result, i, mode, list(stack), marks, checkpoint)
+        self.found += result.errors
+        self.relexed += end - i
+        if stopped:
+            return stopped[0]
+        self.stack = tuple(stack)
+        return None
+
+    def update(self, text, edits):
+        """
+        Bring the check up to date with text, made from the last text by edits
+
+        edits are sorted, non-overlapping (offset, removed, inserted) in
+        the offsets of the last text, as the journal records them; only
+        their lengths are used. Returns the number of characters re-lexed.
+        """
+        edits = [(offset, len(removed), len(inserted)) for offset, removed, inserted in edits]
+        old_text = self.text
+        self.text = text
+        self.relexed = 0
+        if not edits:
+            return 0
+        if self.found or self.stack:
+            # An edit anywhere after an error can end the token that failed
+            self.checkpoints = [(0, CODE, (), 0)]
+            self.found = []
+            self._lex(0, CODE, (), count(self.every, self.every), None)
+            return self.relexed
+        offsets = _Offsets(edits)
+        old = self.checkpoints
+        positions = [c[0] for c in old]
+        # Inserts too long to go without checkpoints of their own
+        long_inserts = [(n, offsets.new_starts[n], offsets.new_ends[n])
+                        for n, (_, _, inserted) in enumerate(edits) if inserted > self.every]
+        found = self.found
+        old_stack = self.stack
+        self.checkpoints = []
+        self.found = []
+
+        moved = {}      # old stack offsets seen so far, mapped
+
+        def new(at):
+            if at < first:
+                return at
+            if at not in moved:
+                moved[at] = offsets.new(at)
+            return moved[at]
+
+        entries = {}    # stack entries seen so far, mapped; checkpoints share most of them
+
+        def carry(state, errors_delta):
+            i, mode, stack, errors = state
+            carried = []
+            for entry in stack:
+                if entry not in entries:
+                    o, at, back, name = entry
+                    entries[entry] = (o, new(at), back, name)
+                carried.append(entries[entry])
+            return 0 if i == 0 else new(i), mode, tuple(carried), errors + errors_delta
+
+        def converged(state):
+            i, mode, stack, _ = state
+            p = offsets.old(i)
+            k = bisect_left(positions, p) if p is not None else 0
+            if k <= r or k == len(positions) or positions[k] != p:
+                return None
+            _, old_mode, old_stack, _ = old[k]
+            if old_mode != mode or len(old_stack) != len(stack) or offsets.edited(p):
+                return None
+            # Nothing after p may look behind into the last edit before it
+            last = bisect_left(offsets.starts, p) - 1
+            settled = offsets.ends[last] + offsets.deltas[last + 1] + LOOKBEHIND
+            if _SIGNIFICANT.search(text, settled, i) is None:
+                return None
+            for (o, at, back, name), (old_o, old_at, old_back, old_name) in zip(
+                    reversed(stack), reversed(old_stack)):
+                if (o, back, name) != (old_o, old_back, old_name) or new(old_at) != at:
+                    return None
+            return k
+
+        first = edits[0][0]
+        k = 0           # old checkpoint the new scan agrees with
+        e = 0           # next edit not lexed yet
+        while True:
+            # The old scan holds from checkpoint k up to the next edit
+            limit = (old_text.rfind('\n', 0, edits[e][0]) + 1 if e < len(edits)
+                     else positions[-1] + 1)
+            r = max(bisect_left(positions, limit) - 1, k)
+            errors_delta = len(self.found) - old[k][3]
+            if e == 0:
+                # Nothing before the first edit moved
+                self.found += found[:old[r][3]]
+                self.checkpoints += old[:r + 1]
+            else:
+                self.found += [(new(at), message) for at, message in found[old[k][3]:old[r][3]]]
+                self.checkpoints += [carry(state, errors_delta) for state in old[k:r + 1]]
+            if e == len(edits):
+                self.found += [(new(at), message) for at, message in found[old[r][3]:]]
+                self.stack = carry((0, CODE, old_stack, 0), 0)[2]
+                return self.relexed
+            i, mode, stack, _ = self.checkpoints[-1]
+            resync = (offsets.new(p) for p in islice(positions, r + 1, None))
+            marks = heapq.merge((m for m in resync if m is not None),
+                                *(range(first + self.every, stop, self.every)
+                                  for n, first, stop in long_inserts if n >= e))
+            k = self._lex(i, mode, stack, marks, converged)
+            if k is None:
+                return self.relexed
+            e = bisect_right(offsets.starts, positions[k])
+
+
+def line_col(text, offset):
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - text.rfind('\n', 0, offset)
+
+
+def check_file(file_path):
+    """Structure of one file, its bytes read as latin-1; raises OSError"""
+    with open(file_path, 'rb') as f:
+        return Structure.cached(f.read().decode('latin-1'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for file_path in args.paths:
+        start = time.perf_counter()
+        try:
+            structure = check_file(file_path)
+        except OSError as e:
+            print(f'❌ {file_path}: {e}', file=sys.stderr)
+            status = 2
+            continue
+        ms = (time.perf_counter() - start) * 1000
+        errors = sorted(structure.errors)
+        for offset, message in errors:
+            line, col = line_col(structure.text, offset)
+            print(f'{file_path}:{line}:{col}: byte {offset}: {message}')
+        if errors:
+            print(f'{len(errors)} structural error(s) in {file_path} ({ms:.0f}ms)', file=sys.stderr)
+            status = max(status, 1)
+        else:
+            print(f'✅ {file_path}: balanced ({ms:.0f}ms)', file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
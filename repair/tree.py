@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tree mode: repair every source file under src/ in parallel
+
+Finds the .ts/.tsx/.json/.md files below a root, skips pure-ASCII files
+(mojibake always contains non-ASCII characters, and bytes.isascii() is a
+single C-speed pass), and runs the content-independent repairs - the
+mojibake decoder plus the lossy residual table - on the rest using a
+process pool sized to the available cores. One JSON object per file is
+written as a JSONL report.
+
+Usage: python -m repair.tree [root] [--report FILE] [--dry-run] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from repair import journal
+from repair.decode import LOSSY_RESIDUALS, decode_mojibake
+from repair.encoding import SNIFF_BYTES, sniff
+from repair.engine import Replacer
+from repair.piece import diff_edits
+from repair.pipeline import write_text
+
+EXTENSIONS = ('.ts', '.tsx', '.json', '.md')
+SKIP_DIRS = {'node_modules', '.git', 'dist', 'build'}
+
+_residuals = Replacer(LOSSY_RESIDUALS)
+
+
+def find_files(root, extensions=EXTENSIONS):
+    """Sorted source files below root"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in filenames:
+            if name.endswith(extensions):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def cpu_count():
+    """Cores this process may actually run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def repair_one(file_path, dry_run=False):
+    """Repair one file; returns its report record"""
+    start = time.perf_counter()
+    record = {'file': file_path.replace(os.sep, '/')}
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        record['bytes'] = len(data)
+        if data.isascii():
+            record['status'] = 'ascii'
+        else:
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError as e:
+                sniffed = sniff(data[:SNIFF_BYTES], complete=len(data) <= SNIFF_BYTES)
+                if sniffed.encoding and sniffed.encoding != 'utf-8':
+                    # UTF-16 and friends: repair.encoding converts them first
+                    record['status'] = 'not-utf8'
+                    record['encoding'] = sniffed.encoding
+                else:
+                    record['status'] = 'invalid-utf8'
+                    record['error'] = f'byte {e.start}: {e.reason}'
+            else:
+                decoded_text, decoded = decode_mojibake(text)
+                content, counts = _residuals.sub(decoded_text)
+                record['decoded'] = decoded
+                record['residuals'] = sum(counts.values())
+                if content == text:
+                    record['status'] = 'clean'
+                else:
+                    record['status'] = 'would-repair' if dry_run else 'repaired'
+                    if not dry_run:
+                        write_text(file_path, content)
+                        middle, after = (t.encode('utf-8') for t in (decoded_text, content))
+                        journal.record(file_path, data,
+                                       [('repair.decode', diff_edits(data, middle)),
+                                        ('repair.residuals', diff_edits(middle, after))])
+    except OSError as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return record
+
+
+def repair_tree(root='src', report=sys.stdout, dry_run=False, jobs=None):
+    """Repair every matching file below root; returns the report records"""
+    files = find_files(root)
+    jobs = jobs or cpu_count()
+    records = []
+    if jobs == 1 or len(files) < 2:
+        results = (repair_one(path, dry_run) for path in files)
+        for record in results:
+            records.append(record)
+            report.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return records
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Small files dominate, so hand them out in batches
+        chunksize = max(1, len(files) // (jobs * 4))
+        for record in pool.map(repair_one, files, [dry_run] * len(files), chunksize=chunksize):
+            records.append(record)
+            report.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('root', nargs='?', default='src')
+    parser.add_argument('--report', help='JSONL report file (default: stdout)')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    parser.add_argument('--jobs', type=int, help='worker processes (default: available cores)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report:
+            records = repair_tree(args.root, report, args.dry_run, args.jobs)
+    else:
+        records = repair_tree(args.root, sys.stdout, args.dry_run, args.jobs)
+
+    by_status = {}
+    for record in records:
+        by_status[record['status']] = by_status.get(record['status'], 0) + 1
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(by_status.items()))
+    print(f'{len(records)} files in {time.perf_counter() - start:.2f}s: {summary}', file=sys.stderr)
+    return 1 if by_status.get('error') or by_status.get('invalid-utf8') or by_status.get('not-utf8') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lightweight single-pass TSX scanner
+
+Not a parser - it only tracks enough state (code, strings, template
+literals, JSX tags and JSX children) to know where strings and text start
+and end and which brackets pair up. That is what the section map needs,
+and apostrophes in JSX text no longer look like string quotes.
+
+Offsets are indexes into whatever was scanned: pass bytes decoded as
+latin-1 to get byte offsets (all syntax characters are ASCII).
+The spans cover the text end to end; span_table() caches them by file
+hash for the rule engine. lex() resumes a scan from a saved lexer state,
+which is how repair.structure re-checks only the text around an edit.
+"""
+
+import re
+
+from repair import cache
+
+CODE, TEMPLATE, TAG, CHILDREN = 'code', 'template', 'tag', 'children'
+
+_CODE_STOP = re.compile(r'["\'`/{}()\[\]<]')
+_TEMPLATE_STOP = re.compile(r'\\.|`|\$\{', re.S)
+_CHILDREN_STOP = re.compile(r'[{<]')
+_TAG_TOKEN = re.compile(r'\s+|/>|>|\{|"[^"]*"|\'[^\']*\'|[^\s/>{"\'=]+|=|/')
+_STRING = {
+    '"': re.compile(r'"(?:[^"\\\n]|\\.)*"', re.S),
+    "'": re.compile(r"'(?:[^'\\\n]|\\.)*'", re.S),
+}
+_REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+_CLOSING_TAG = re.compile(r'</[^>]*>')
+_WORD_BEFORE = re.compile(r'(\w+)\s*$')
+
+# A '<' or '/' after one of these starts JSX or a regex, not an operator
+_EXPRESSION_START = set('(,=:?&|{}[;!>+-*%~^')
+_EXPRESSION_KEYWORDS = {'return', 'yield', 'await', 'case', 'default', 'typeof', 'in', 'of'}
+_CLOSERS = {')': '(', ']': '['}
+
+
+class Scan:
+    """Result of scanning one text"""
+
+    def __init__(self):
+        self.spans = []      # (kind, start, end), kinds listed in SPAN_KINDS
+        self.pairs = {}      # opening offset -> closing offset
+        self.errors = []     # (offset, message)
+
+    def add(self, kind, start, end):
+        if start >= end:
+            return
+        spans = self.spans
+        if spans and spans[-1][0] == kind and spans[-1][2] == start:
+            spans[-1] = (kind, spans[-1][1], end)
+        else:
+            spans.append((kind, start, end))
+
+
+SPAN_KINDS = ('code', 'string', 'template', 'comment', 'regex', 'jsx_text', 'jsx_attr')
+# Where human-readable text (and so mojibake) lives; jsx_attr is left out
+# because it is mostly className values
+TEXT_KINDS = ('string', 'template', 'jsx_text')
+
+
+def _prev_significant(text, i):
+    j = i - 1
+    while j >= 0 and text[j] in ' \t\r\n':
+        j -= 1
+    return j
+
+
+def _starts_expression(text, i):
+    j = _prev_significant(text, i)
+    if j < 0 or text[j] in _EXPRESSION_START:
+        return True
+    m = _WORD_BEFORE.search(text, max(0, j - 15), j + 1)
+    return bool(m) and m.group(1) in _EXPRESSION_KEYWORDS
+
+
+def scan(text):
+    """Scan TSX source in one pass"""
+    result = Scan()
+    _, _, stack = lex(text, result)
+    result.errors += unclosed(stack)
+    return result
+
+
+def unclosed(stack):
+    """(offset, message) for what is still open at the end of the text"""
+    return [(start, f'unclosed <{name}>' if opener == '<' and name else f"unclosed '{opener}'")
+            for opener, start, _, name in stack]
+
+
+def lex(text, result, i=0, mode=CODE, stack=None, marks=(), stop=None):
+    """
+    Scan text from offset i in the given lexer state, into result
+
+    The state at any token boundary is (offset, mode, stack), with stack
+    entries (opener, offset, mode to return to, tag name). At the first
+    boundary at or after each offset in marks (increasing), stop(i, mode,
+    stack) is called; when it returns true the scan ends there. Returns
+    the state where the scan ended: offset len(text) unless stopped.
+    """
+    add = result.add
+    pairs = result.pairs
+    errors = result.errors
+    stack = [] if stack is None else stack
+    n = len(text)
+    marks = iter(marks)
+    mark = next(marks, n)
+
+    while i < n:
+        if i >= mark:
+            if stop(i, mode, stack):
+                return i, mode, stack
+            while mark <= i:
+                mark = next(marks, n)
+        if mode == CODE:
+            m = _CODE_STOP.search(text, i)
+            if m is None:
+                add('code', i, n)
+                break
+            j = m.start()
+            add('code', i, j)
+            ch = text[j]
+            if ch in '"\'':
+                s = _STRING[ch].match(text, j)
+                if s is None:
+                    end = text.find('\n', j)
+                    end = n if end < 0 else end
+                    errors.append((j, 'unterminated string'))
+                else:
+                    end = s.end()
+                add('string', j, end)
+                i = end
+            elif ch == '`':
+                stack.append(('`', j, CODE, None))
+                add('code', j, j + 1)
+                mode = TEMPLATE
+                i = j + 1
+            elif ch == '/':
+                nxt = text[j + 1:j + 2]
+                if nxt == '/':
+                    end = text.find('\n', j)
+                    end = n if end < 0 else end
+                    add('comment', j, end)
+                    i = end
+                elif nxt == '*':
+                    end = text.find('*/', j + 2)
+                    if end < 0:
+                        errors.append((j, 'unterminated comment'))
+                        end = n
+                    else:
+                        end += 2
+                    add('comment', j, end)
+                    i = end
+                elif _starts_expression(text, j):
+                    r = _REGEX_LITERAL.match(text, j)
+                    end = r.end() if r else j + 1
+                    add('regex' if r else 'code', j, end)
+                    i = end
+                else:
+                    add('code', j, j + 1)
+                    i = j + 1
+            elif ch in '({[':
+                stack.append((ch, j, CODE, None))
+                add('code', j, j + 1)
+                i = j + 1
+            elif ch in ')]}':
+                add('code', j, j + 1)
+                i = j + 1
+                expected = ('{', '${') if ch == '}' else (_CLOSERS[ch],)
+                if not stack or stack[-1][0] not in expected:
+                    errors.append((j, f"unmatched '{ch}'"))
+                    continue
+                _, start, back, _ = stack.pop()
+                pairs[start] = j
+                mode = back
+            else:  # '<'
+                nxt = text[j + 1:j + 2]
+                if (nxt.isalpha() or nxt == '>') and _starts_expression(text, j):
+                    stack.append(('<', j, CODE, None))
+                    add('code', j, j + 1)
+                    mode = TAG
+                else:
+                    add('code', j, j + 1)
+                i = j + 1
+
+        elif mode == TEMPLATE:
+            m = _TEMPLATE_STOP.search(text, i)
+            while m is not None and m.group(0).startswith('\\'):
+                m = _TEMPLATE_STOP.search(text, m.end())
+            if m is None:
+                add('template', i, n)
+                break
+            j = m.start()
+            add('template', i, j)
+            if m.group(0) == '`':
+                _, start, back, _ = stack.pop()
+                pairs[start] = j
+                add('code', j, j + 1)
+                mode = back
+                i = j + 1
+            else:
+                stack.append(('${', j, TEMPLATE, None))
+                add('code', j, j + 2)
+                mode = CODE
+                i = j + 2
+
+        elif mode == TAG:
+            m = _TAG_TOKEN.match(text, i)
+            if m is None:
+                errors.append((i, 'bad JSX tag'))
+                mode = stack.pop()[2] if stack and stack[-1][0] == '<' else CODE
+                continue
+            token = m.group(0)
+            i = m.end()
+            if token[0] in '"\'':
+                add('jsx_attr', m.start(), i)
+            elif token == '{':
+                stack.append(('{', m.start(), TAG, None))
+                add('code', m.start(), i)
+                mode = CODE
+            elif token == '/>':
+                add('code', m.start(), i)
+                _, start, back, _ = stack.pop()
+                pairs[start] = i - 1
+                mode = back
+            elif token == '>':
+                add('code', m.start(), i)
+                mode = CHILDREN
+            else:
+                add('code', m.start(), i)
+                if stack[-1][3] is None and not token.isspace():
+                    # The first word of a tag is its name
+                    opener, start, back, _ = stack[-1]
+                    stack[-1] = (opener, start, back, token)
+
+        else:  # CHILDREN
+            m = _CHILDREN_STOP.search(text, i)
+            if m is None:
+                add('jsx_text', i, n)
+                break
+            j = m.start()
+            add('jsx_text', i, j)
+            if text[j] == '{':
+                stack.append(('{', j, CHILDREN, None))
+                add('code', j, j + 1)
+                mode = CODE
+                i = j + 1
+            elif text.startswith('</', j):
+                c = _CLOSING_TAG.match(text, j)
+                end = c.end() if c else n
+                add('code', j, end)
+                i = end
+                if not stack or stack[-1][0] != '<':
+                    errors.append((j, 'unmatched closing tag'))
+                    continue
+                _, start, back, name = stack.pop()
+                pairs[start] = end - 1
+                mode = back
+                closing = text[j + 2:end - 1].strip()
+                if c and closing != (name or ''):
+                    errors.append((j, f'</{closing}> closes <{name or ""}>'))
+            else:
+                stack.append(('<', j, CHILDREN, None))
+                add('code', j, j + 1)
+                mode = TAG
+                i = j + 1
+
+    return n, mode, stack
+
+
+def span_table(text):
+    """
+    Spans of a str as [(kind, start, end)], cached by content hash
+
+    Stored as flat (kind index, length) pairs, since the spans are
+    contiguous; ModuleDetail.tsx loads in a fraction of a rescan.
+    """
+    key = cache.digest(text)
+    cached = cache.load('spans', key)
+    if cached is not None:
+        spans = []
+        pos = 0
+        for kind, length in zip(cached[::2], cached[1::2]):
+            spans.append((SPAN_KINDS[kind], pos, pos + length))
+            pos += length
+        return spans
+    spans = scan(text).spans
+    flat = []
+    for kind, start, end in spans:
+        flat += (SPAN_KINDS.index(kind), end - start)
+    cache.store('spans', key, flat)
+    return spans
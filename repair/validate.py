@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strict UTF-8 validation with byte offsets
+
+The scripts read with errors='replace' or 'ignore', so an invalid byte
+is swallowed without a trace - that is how lessons.ts lost the
+continuation bytes behind its 'ð' stubs. This reads a file in fixed-size
+blocks through the strict C decoder (codecs.utf_8_decode, which leaves
+a sequence cut at the end of a block for the next one) and reports every
+invalid sequence with its byte offset, line:col (col counts characters,
+an invalid byte counts as one) and, for .tsx files, the owning
+module/topic. Only one block is decoded at a time and the decoded text
+is thrown away: one linear pass, no full decoded string. The section
+map is only built for a file that has findings.
+
+lossy_change() is the write guard the pipeline uses: a rewrite that
+turns invalid bytes into U+FFFD, or drops them, loses bytes and is
+refused.
+
+Usage: python -m repair.validate [path ...] [--json] [--no-sections]
+
+Exit codes: 0 valid, 1 invalid sequences found, 2 a file could not be read.
+"""
+
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+
+from repair.encoding import sniff_file
+from repair.mapped import mapped
+from repair.sections import SectionMap
+
+CHUNK_BYTES = 1 << 16
+DEFAULT_PATHS = ['src']
+EXTENSIONS = ('.ts', '.tsx', '.json', '.md', '.txt')
+
+# UTF-8 continuation bytes: every other byte starts a character
+_CONTINUATION = bytes(range(0x80, 0xC0))
+# How invalid bytes look after a surrogateescape decode
+_ESCAPED = re.compile('[\udc80-\udcff]')
+
+
+class Invalid:
+    __slots__ = ('file', 'offset', 'line', 'col', 'data', 'reason', 'module', 'topic')
+
+    def __init__(self, file, offset, line, col, data, reason, module=None, topic=None):
+        self.file = file
+        self.offset = offset
+        self.line = line
+        self.col = col
+        self.data = data
+        self.reason = reason
+        self.module = module
+        self.topic = topic
+
+    def as_dict(self):
+        record = {name: getattr(self, name) for name in self.__slots__}
+        record['data'] = self.data.hex(' ')
+        return record
+
+    def __str__(self):
+        owner = ''
+        if self.module is not None:
+            owner = f' (module {self.module}' + (f', topic {self.topic})' if self.topic else ')')
+        return (f'{self.file}:{self.line}:{self.col}: byte {self.offset}: '
+                f'{self.reason} [{self.data.hex(" ")}]{owner}')
+
+
+class _Position:
+    """Line and column of a byte offset, advanced block by block"""
+
+    def __init__(self):
+        self.line = 1
+        self.col = 1
+
+    def advance(self, data, start, end):
+        newlines = data.count(b'\n', start, end)
+        if newlines:
+            self.line += newlines
+            start = data.rfind(b'\n', start, end) + 1
+            self.col = 1
+        self.col += len(data[start:end].translate(None, _CONTINUATION))
+
+
+def iter_invalid(stream, file_path='<stream>', chunk_size=CHUNK_BYTES):
+    """Yield an Invalid for every bad sequence of a binary stream, in order"""
+    position = _Position()
+    offset = 0          # file offset of data[0]
+    carry = b''
+    while True:
+        block = stream.read(chunk_size)
+        final = not block
+        data = carry + block if carry else block
+        view = memoryview(data)
+        pos = 0         # next byte to decode
+        mark = 0        # position is up to date until here
+        while True:
+            try:
+                _, consumed = codecs.utf_8_decode(view[pos:], 'strict', final)
+            except UnicodeDecodeError as e:
+                start, end = pos + e.start, pos + e.end
+                position.advance(data, mark, start)
+                yield Invalid(file_path, offset + start, position.line, position.col,
+                              bytes(view[start:end]), e.reason)
+                position.col += end - start
+                pos = mark = end
+                continue
+            pos += consumed
+            break
+        view.release()
+        position.advance(data, mark, pos)
+        if final:
+            return
+        carry = data[pos:]
+        offset += pos
+
+
+def validate_file(file_path, with_sections=True, chunk_size=CHUNK_BYTES):
+    """Every invalid sequence of one file; raises OSError"""
+    sniffed = sniff_file(file_path)
+    if sniffed.encoding not in (None, 'utf-8'):
+        # Not one bad sequence per code unit: one finding for the file
+        return [Invalid(file_path, 0, 1, 1, sniffed.bom, f'{sniffed} file, not UTF-8 '
+                        '(convert it with python -m repair.encoding)')]
+    with open(file_path, 'rb') as f:
+        found = list(iter_invalid(f, file_path, chunk_size))
+    if found and with_sections and file_path.endswith('.tsx'):
+        with mapped(file_path) as buf:
+            sections = SectionMap.from_source(buf)
+        for invalid in found:
+            invalid.module, invalid.topic = sections.topic_at(invalid.offset)
+    return found
+
+
+def lossy_change(before, after):
+    """
+    Why rewriting before into after would lose bytes, or None
+
+    Both are surrogateescape-decoded texts: invalid bytes are lone
+    surrogates, which an errors='replace' read turns into U+FFFD and an
+    errors='ignore' read drops.
+    """
+    replaced = after.count('\ufffd') - before.count('\ufffd')
+    if replaced > 0:
+        return f'{replaced} new U+FFFD replacement character(s)'
+    if before.isascii():
+        return None
+    dropped = len(_ESCAPED.findall(before)) - len(_ESCAPED.findall(after))
+    if dropped > 0:
+        return f'{dropped} invalid byte(s) dropped'
+    return None
+
+
+def find_paths(paths):
+    from repair.tree import find_files
+    for path in paths:
+        if os.path.isdir(path):
+            yield from find_files(path, EXTENSIONS)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    parser.add_argument('--json', action='store_true', help='print findings as JSON lines')
+    parser.add_argument('--no-sections', action='store_true', help='skip the module/topic lookup')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    status = 0
+    files = bad_files = total = 0
+    for file_path in find_paths(args.paths):
+        files += 1
+        try:
+            found = validate_file(file_path, not args.no_sections)
+        except OSError as e:
+            print(f'❌ {file_path}: {e}', file=sys.stderr)
+            status = 2
+            continue
+        for invalid in found:
+            print(json.dumps(invalid.as_dict()) if args.json else invalid)
+        if found:
+            bad_files += 1
+            total += len(found)
+            status = max(status, 1)
+    ms = (time.perf_counter() - start) * 1000
+    if total:
+        print(f'{total} invalid sequence(s) in {bad_files} of {files} file(s) ({ms:.0f}ms)',
+              file=sys.stderr)
+    elif status == 0:
+        print(f'✅ {files} file(s) are valid UTF-8 ({ms:.0f}ms)', file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode: repair mojibake as soon as it is saved
+
+Watches src/pages and src/data, debounces bursts of saves, and repairs
+only the files that changed. The process stays up, so the rule registry
+(with every rule compiled on first use), the section maps and the last
+seen contents of each file are kept warm between events. A change is
+narrowed to the span that differs from the last seen contents, widened
+to whole lines plus the rules' context, and only that span is decoded
+and repaired. In a .tsx file the span rules only see the strings and JSX
+text of that span (repair.incremental.Spans), as in a whole-file pass.
+
+Files that are already corrupted when the watch starts are only
+reported; --fix-existing repairs them too before watching.
+
+Uses watchdog (inotify / ReadDirectoryChangesW) when it is installed and
+falls back to polling modification times otherwise.
+
+Usage: python -m repair.watch [dir ...] [--debounce SECONDS] [--poll SECONDS] [--fix-existing]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from repair import journal
+from repair.decode import SUSPECT_RUN
+from repair.incremental import Spans, repair_text, steps
+from repair.piece import changed_span
+from repair.pipeline import write_text
+from repair.rules import load_rules
+from repair.sections import SectionMap, header_edited
+from repair.tree import EXTENSIONS, find_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+WATCH_DIRS = ['src/pages', 'src/data']
+
+
+def _line_bounds(data, start, end, context):
+    """Grow [start, end) to whole lines plus context lines each side"""
+    start = data.rfind(b'\n', 0, start) + 1
+    for _ in range(context):
+        if start:
+            start = data.rfind(b'\n', 0, start - 1) + 1
+    end = max(end - 1, start)
+    for _ in range(context + 1):
+        nl = data.find(b'\n', end)
+        if nl < 0:
+            return start, len(data)
+        end = nl + 1
+    return start, end
+
+
+class Repairer:
+    """Warm state shared by every event"""
+
+    def __init__(self):
+        self.rules = load_rules()
+        self.seen = {}       # path -> last contents
+        self.sections = {}   # path -> SectionMap, shifted along with each edit
+
+    def where(self, path, data, offset):
+        if not path.endswith('.tsx'):
+            return ''
+        if path not in self.sections:
+            self.sections[path] = SectionMap.from_source(data)
+        module, topic = self.sections[path].topic_at(offset)
+        if module is None:
+            return ''
+        return f' (module {module}' + (f', topic {topic})' if topic else ')')
+
+    def repair(self, path, dry_run=False):
+        """
+        Repair what changed in path; with dry_run only report what would be
+
+        Returns the number of repairs made (or pending, with dry_run).
+        """
+        start_time = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.seen.pop(path, None)
+            return 0
+        old = self.seen.get(path)
+        if old == data:
+            return 0   # our own write, or a save without changes
+        if old is None:
+            self.sections.pop(path, None)
+            start, end = 0, len(data)
+        else:
+            span_start, span_end = changed_span(old, data)
+            old_end = len(old) - (len(data) - span_end)
+            if header_edited(old, data, span_start, old_end, span_end):
+                # A section was added, removed or renumbered: rebuilt on next use
+                self.sections.pop(path, None)
+            elif path in self.sections:
+                self.sections[path].shift(span_start, len(data) - len(old))
+            if self.rules.context is None:
+                # A rule can match across any number of lines: no window is safe
+                start, end = 0, len(data)
+            else:
+                start, end = _line_bounds(data, span_start, span_end, self.rules.context)
+        window = data[start:end]
+        if window.isascii():
+            self.seen[path] = data
+            return 0
+        text = window.decode('utf-8', 'surrogateescape')
+        hits = 0
+        changes = {}
+        if SUSPECT_RUN.search(text):
+            # Span rules stay inside strings and JSX text, as in a full pass
+            spans = Spans(data).window(data, start, end) if path.endswith('.tsx') else None
+            text, hits = repair_text(text, self.rules, changes, spans)
+        if not hits:
+            self.seen[path] = data
+            return 0
+        location = self.where(path, data, start)
+        if dry_run:
+            self.seen[path] = data
+            print(f'⚠️  {path}: {hits} repair(s) pending{location}', flush=True)
+            return hits
+        result = data[:start] + text.encode('utf-8', 'surrogateescape') + data[end:]
+        if path in self.sections:
+            self.sections[path].shift(start, len(result) - len(data))
+        write_text(path, result)
+        # One batch per rule, so a single rule's repairs can be undone
+        changed = {step: tuple(t.encode('utf-8', 'surrogateescape') for t in pair)
+                   for step, pair in changes.items()}
+        journal.record(path, data, journal.step_batches([(start, end - start, changed)],
+                                                        steps(self.rules)))
+        self.seen[path] = result
+        ms = (time.perf_counter() - start_time) * 1000
+        print(f'✅ {path}: {hits} repair(s){location} in {ms:.1f}ms', flush=True)
+        return hits
+
+    def prime(self, paths):
+        """Remember current contents and build section maps up front"""
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    self.seen[path] = f.read()
+            except OSError:
+                continue
+            if path.endswith('.tsx'):
+                self.sections[path] = SectionMap.from_source(self.seen[path])
+
+
+class Debouncer:
+    """Collects changed paths and flushes them once saves go quiet"""
+
+    def __init__(self, delay, flush):
+        self.delay = delay
+        self.flush = flush
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def touch(self, path):
+        with self.lock:
+            self.pending.add(path)
+            if self.timer:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self._fire)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _fire(self):
+        with self.lock:
+            paths, self.pending = sorted(self.pending), set()
+        self.flush(paths)
+
+
+def _watch_with_watchdog(dirs, debouncer):
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            path = getattr(event, 'dest_path', '') or event.src_path
+            if not event.is_directory and path.endswith(EXTENSIONS):
+                debouncer.touch(os.path.relpath(path))
+
+    observer = Observer()
+    for d in dirs:
+        observer.schedule(Handler(), d, recursive=True)
+    observer.start()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def _snapshot(dirs):
+    stamps = {}
+    for d in dirs:
+        for path in find_files(d):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+def _watch_with_polling(dirs, debouncer, interval):
+    stamps = _snapshot(dirs)
+    while True:
+        time.sleep(interval)
+        current = _snapshot(dirs)
+        for path, stamp in current.items():
+            if stamps.get(path) != stamp:
+                debouncer.touch(path)
+        stamps = current
+
+
+def watch(dirs=WATCH_DIRS, debounce=0.3, poll=0.5, fix_existing=False):
+    repairer = Repairer()
+    lock = threading.Lock()
+    files = [path for d in dirs for path in find_files(d)]
+
+    def flush(paths, dry_run=False):
+        with lock:
+            return sum(repairer.repair(path, dry_run) for path in paths)
+
+    # Report (or, when asked, repair) what is already broken, then only watch for edits
+    pending = flush(files, dry_run=not fix_existing)
+    if pending:
+        print('Not repaired; restart with --fix-existing to repair them too', flush=True)
+    repairer.prime(files)
+    debouncer = Debouncer(debounce, flush)
+    backend = 'watchdog' if Observer else f'polling every {poll}s'
+    print(f'👀 Watching {", ".join(dirs)} ({len(files)} files, {backend}); Ctrl+C to stop', flush=True)
+    try:
+        if Observer:
+            _watch_with_watchdog(dirs, debouncer)
+        else:
+            _watch_with_polling(dirs, debouncer, poll)
+    except KeyboardInterrupt:
+        print('Stopped')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dirs', nargs='*', default=WATCH_DIRS)
+    parser.add_argument('--debounce', type=float, default=0.3, help='quiet period before repairing')
+    parser.add_argument('--poll', type=float, default=0.5, help='polling interval without watchdog')
+    parser.add_argument('--fix-existing', action='store_true',
+                        help='also repair files that are corrupted when the watch starts '
+                             '(default: only report them)')
+    args = parser.parse_args(argv)
+    watch(args.dirs, args.debounce, args.poll, args.fix_existing)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
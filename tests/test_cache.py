@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from repair import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cache, 'KEEP', 3)
+    return tmp_path
+
+
+def age(kind, key, seconds, suffix='.json'):
+    path = cache._path(kind, key, suffix)
+    os.utime(path, (seconds, seconds))
+
+
+def test_round_trip():
+    cache.store('spans', cache.digest('a'), {'x': [1, 2]})
+    cache.store_bytes('baseline', cache.digest('b'), b'\xff\x00')
+    assert cache.load('spans', cache.digest('a')) == {'x': [1, 2]}
+    assert cache.load_bytes('baseline', cache.digest('b')) == b'\xff\x00'
+    assert cache.load('spans', cache.digest('missing')) is None
+
+
+@pytest.mark.parametrize('store, load, suffix', [(cache.store, cache.load, '.json'),
+                                                 (cache.store_bytes, cache.load_bytes, '.bin')])
+def test_keeps_the_most_recently_used_per_kind(store, load, suffix):
+    keys = [cache.digest(str(n)) for n in range(5)]
+    value = b'v' if suffix == '.bin' else 'v'
+    for n, key in enumerate(keys[:3]):
+        store('structure', key, value)
+        age('structure', key, 1000 + n, suffix)
+    cache.store('sections', cache.digest('other kind'), [])
+    assert load('structure', keys[0]) == value     # a hit makes it the newest
+    store('structure', keys[3], value)
+    store('structure', keys[4], value)
+    assert [load('structure', key) is not None for key in keys] == [True, False, False, True, True]
+    assert cache.load('sections', cache.digest('other kind')) == []
+
+
+def test_qualified_keys_and_explicit_keep(cache_dir):
+    for n in range(5):
+        cache.store('sections', f'{cache.digest(str(n))}-bytes', n, keep=4)
+    cache.store('sections', cache.digest('last'), 'last', keep=4)
+    assert len(os.listdir(cache_dir)) == 4
@@ -0,0 +1,32 @@
+from repair.census import classify, scan_text
+
+
+def kinds(text):
+    return [(f.text, f.kind) for f in scan_text(text, 'lessons.ts')]
+
+
+def test_lone_stub_before_quote():
+    assert kinds('{ icon: "ð", title: "Speed" }') == [('ð', 'lossy-stub')]
+
+
+def test_lone_stub_before_tag_and_space():
+    assert kinds('<span>ð</span> Ã done') == [('ð', 'lossy-stub'), ('Ã', 'lossy-stub')]
+
+
+def test_stub_and_run_on_one_line():
+    assert kinds('icon: "ð", b: "ð¯"') == [('ð', 'lossy-stub'), ('ð¯', 'lossy-stub')]
+
+
+def test_stub_inside_a_run_is_counted_once():
+    assert kinds('icon: "ðŸ’¾ ð"') == [('ðŸ’¾', 'double-emoji'), ('ð', 'lossy-stub')]
+
+
+def test_stub_needs_a_boundary_after_it():
+    assert kinds('const name = "ðx, Ãb";') == []
+
+
+def test_classes():
+    assert classify('ðŸ’¾') == 'double-emoji'
+    assert classify('Ã°Å¸â€™Â¾') == 'triple-emoji'
+    assert classify('â€¢') == 'symbol'
+    assert classify('ðŸ” ') == 'lossy-stub'
@@ -0,0 +1,37 @@
+import random
+
+from repair.context import ContextIndex
+
+WORDS = ['RAM', 'CPU', 'plain', 'text', 'Memory', '']
+
+
+def window(lines, line, before, after):
+    return '\n'.join(lines[max(0, line - before):line + after])
+
+
+def test_same_as_joining_the_window():
+    rng = random.Random(4)
+    for _ in range(50):
+        lines = [' '.join(rng.choices(WORDS, k=rng.randint(0, 3))) for _ in range(rng.randint(1, 40))]
+        content = '\n'.join(lines)
+        index = ContextIndex(content, ['RAM', 'CPU', 'Memory'])
+        assert index.line_count == len(lines)
+        for line in range(len(lines)):
+            before, after = rng.randint(0, 10), rng.randint(0, 10)
+            for keyword in ['RAM', 'CPU', 'Memory']:
+                assert index.near(keyword, line, before, after) == (
+                    keyword in window(lines, line, before, after))
+
+
+def test_first_and_any_near():
+    index = ContextIndex('CPU\nx\nRAM\n', ['RAM', 'CPU'])
+    assert index.first_near(['RAM', 'CPU'], 1, 1, 2) == 'RAM'
+    assert index.first_near(['RAM', 'CPU'], 1, 1, 1) == 'CPU'
+    assert index.first_near(['RAM'], 0, 0, 1) is None
+    assert index.any_near(['RAM', 'CPU'], 1, 0, 1) is False
+
+
+def test_bytes_and_line_of():
+    index = ContextIndex(b'a\nRAM b\n\nc', [b'RAM'])
+    assert [index.line_of(offset) for offset in (0, 1, 2, 8, 9)] == [0, 0, 1, 2, 3]
+    assert index.near(b'RAM', 3, 2, 1) and not index.near(b'RAM', 3, 1, 1)
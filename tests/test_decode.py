@@ -0,0 +1,34 @@
+import pytest
+
+from repair.decode import LOSSY_RESIDUALS, SUSPECT_CHARS, decode_mojibake, decode_run
+from repair.emojimap import mis_decode
+
+
+@pytest.mark.parametrize('text', ['💾', '⚠️', '🧑‍💻', '•', '→', 'é', '🧬'])
+@pytest.mark.parametrize('layers', [1, 2, 3])
+def test_undoes_every_layer(text, layers):
+    broken = text
+    for _ in range(layers):
+        broken = mis_decode(broken)
+    fixed, repaired = decode_mojibake(f'icon: "{broken}"')
+    assert fixed == f'icon: "{text}"' and repaired
+
+
+def test_leaves_clean_text_alone():
+    text = 'const name = "Zoë"; // café → 💾\n'
+    assert decode_mojibake(text) == (text, 0)
+
+
+def test_decode_run_keeps_what_is_not_utf8():
+    assert decode_run('Ã©Ã') == ('éÃ', 1)
+
+
+def test_lost_variation_selector():
+    assert decode_mojibake('"ðŸ’¾ï¸ "') == ('"💾\ufe0f"', 2)
+
+
+def test_lossy_residuals_are_left_for_the_table():
+    for form, fixed in LOSSY_RESIDUALS:
+        assert decode_mojibake(form)[0] == form
+        # Only what cp1252 or latin-1 made of bytes, ASCII, and the repair itself
+        assert all(ch.isascii() or ch in SUSPECT_CHARS or ch in fixed for ch in form), form
@@ -0,0 +1,62 @@
+import difflib
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from repair import diff
+from repair.piece import diff_edits
+
+
+def unified(old, new, context=diff.CONTEXT):
+    return list(diff.unified(old, diff_edits(old, new), 'a/f', 'b/f', context))
+
+
+def test_no_edits_no_diff():
+    assert unified(b'same\n', b'same\n') == []
+
+
+def test_same_lines_as_difflib():
+    old = b''.join(b'line %d\n' % i for i in range(40))
+    new = old.replace(b'line 5\n', b'line five\n').replace(b'line 30\n', b'')
+    expected = difflib.unified_diff(old.decode().splitlines(), new.decode().splitlines(),
+                                    'a/f', 'b/f', lineterm='')
+    assert unified(old, new) == [line.rstrip() for line in expected]
+
+
+def test_missing_final_newline():
+    assert unified(b'a\nb', b'a\nc') == ['--- a/f', '+++ b/f', '@@ -1,2 +1,2 @@', ' a', '-b',
+                                         '\\ No newline at end of file', '+c',
+                                         '\\ No newline at end of file']
+
+
+def test_side_by_side_marks_the_changed_part():
+    page = diff.side_by_side(b'icon: "x"\n', [(7, b'x', b'y')])
+    assert '<del>x</del>' in page and '<ins>y</ins>' in page
+
+
+@pytest.mark.skipif(shutil.which('patch') is None, reason='needs GNU patch')
+@pytest.mark.parametrize('context', [0, 1, 3])
+def test_patch_round_trip(tmp_path, context):
+    rng = random.Random(23 + context)
+    words = ['a', 'b', 'icon', '{', '}', '']
+    for _ in range(40):
+        lines = rng.choices(words, k=rng.randint(1, 30))
+        old = '\n'.join(lines) + rng.choice(['', '\n'])
+        new_lines = list(lines)
+        for _ in range(rng.randint(1, 4)):
+            i = rng.randrange(len(new_lines) + 1)
+            if rng.random() < 0.5 and i < len(new_lines):
+                del new_lines[i]
+            else:
+                new_lines.insert(i, rng.choice(words) + '!')
+        new = '\n'.join(new_lines) + rng.choice(['', '\n'])
+        if old == new:
+            continue
+        target = tmp_path / 'f'
+        target.write_bytes(old.encode())
+        patch = '\n'.join(unified(old.encode(), new.encode(), context)) + '\n'
+        subprocess.run(['patch', '-s', '-F0', str(target)], input=patch.encode(), check=True,
+                       cwd=tmp_path)
+        assert target.read_bytes() == new.encode()
@@ -0,0 +1,79 @@
+import pytest
+
+from repair import cache, emojimap
+from repair.emojimap import EmojiTable, mis_decode
+
+
+@pytest.fixture(scope='module')
+def sources(tmp_path_factory):
+    root = tmp_path_factory.mktemp('src')
+    (root / 'lessons.ts').write_text('const icons = ["💾", "💾", "🚀", "🧑‍💻"];\n', encoding='utf-8')
+    return [str(root)]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def cache_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cache, 'CACHE_DIR', str(tmp_path_factory.mktemp('cache')))
+        yield
+
+
+@pytest.fixture(scope='module')
+def table(sources):
+    return EmojiTable(emojimap.build_table(sources))
+
+
+def test_mis_decode_layers():
+    assert mis_decode('💾') == 'ðŸ’¾'
+    assert mis_decode(mis_decode('💾')) == 'Ã°Å¸â€™Â¾'
+    assert mis_decode('💾', 'latin-1, dropped') == 'ð¾'
+
+
+def test_lookup(table):
+    entry = table.lookup('ðŸ’¾')
+    assert entry.candidates[0] == '💾' and entry.layers == 1 and entry.sure and not entry.lossy
+    assert table.lookup(mis_decode(mis_decode('🧑‍💻'))).candidates[0] == '🧑‍💻'
+    assert table.lookup('plain text') is None
+
+
+def test_longest_match_wins(table):
+    form = mis_decode('🧑‍💻')
+    assert table.match(form + ' x').form == form
+
+
+def test_sub_replaces_sure_forms_only(table):
+    text = f'icon: "{mis_decode("🚀")}", name: "Zoë"'
+    assert table.sub(text) == ('icon: "🚀", name: "Zoë"', 1)
+
+
+def test_header_records_the_used_sequences(sources, table):
+    assert table.version
+    used = emojimap.used_sequences(sources)
+    assert used == {'💾': 2, '🚀': 1, '🧑‍💻': 1}
+    assert table.used == emojimap.used_digest(used)
+    used['🚀'] += 1
+    assert table.used != emojimap.used_digest(used)
+
+
+def test_sub_skips_text_no_form_can_be_in(monkeypatch):
+    monkeypatch.setattr(emojimap, 'load', lambda: pytest.fail('table loaded'))
+    assert emojimap.sub('const x = "🚀 ready";') == ('const x = "🚀 ready";', 0)
+
+
+def test_load_rebuilds_when_the_sources_change(tmp_path, monkeypatch):
+    source = tmp_path / 'lessons.ts'
+    source.write_text('icon: "🚀"\n', encoding='utf-8')
+    path = tmp_path / 'emoji.table'
+    monkeypatch.setattr(emojimap, '_loaded', None)
+    first = emojimap.load(str(path), [str(source)])
+    built = path.stat().st_mtime_ns
+
+    monkeypatch.setattr(emojimap, '_loaded', None)
+    emojimap.load(str(path), [str(source)])
+    assert path.stat().st_mtime_ns == built
+
+    source.write_text('icon: "🚀", next: "🦩"\n', encoding='utf-8')
+    monkeypatch.setattr(emojimap, '_loaded', None)
+    second = emojimap.load(str(path), [str(source)])
+    assert second.used != first.used
+    assert second.used == emojimap.used_digest(emojimap.used_sequences([str(source)]))
@@ -0,0 +1,91 @@
+import io
+import os
+
+import pytest
+
+from repair.encoding import main, open_text, sniff, sniff_file, transcode, transcode_file
+
+TEXT = '<Card className="é">\r\n  💾\r\n</Card>\r\n'
+
+
+@pytest.mark.parametrize('encoding, bom', [
+    ('utf-8', b'\xef\xbb\xbf'),
+    ('utf-16-le', b'\xff\xfe'),
+    ('utf-16-be', b'\xfe\xff'),
+    ('utf-32-le', b'\xff\xfe\x00\x00'),
+    ('utf-32-be', b'\x00\x00\xfe\xff'),
+])
+def test_byte_order_marks(encoding, bom):
+    sniffed = sniff(bom + TEXT.encode(encoding))
+    assert (sniffed.encoding, sniffed.bom, sniffed.newline) == (encoding, bom, '\r\n')
+    assert not sniffed.canonical
+
+
+@pytest.mark.parametrize('encoding', ['utf-16-le', 'utf-16-be', 'utf-32-le', 'utf-32-be'])
+def test_nul_interleaving(encoding):
+    sniffed = sniff(TEXT.encode(encoding))
+    assert sniffed.encoding == encoding and sniffed.bom == b''
+    assert sniffed.reason == 'NUL-interleaved code units'
+
+
+def test_utf8_and_fallback():
+    assert sniff(b'const a = 1;\n').canonical
+    assert sniff(b'const a = 1;\n').reason == 'ASCII'
+    # A character cut at the end of the sample is only an error when complete
+    head = 'const é = 1;\n'.encode()[:7]
+    assert sniff(head).encoding == 'utf-8'
+    assert sniff(head, complete=True).encoding is None
+    assert str(sniff(b'caf\xe9\n')) == 'unknown (invalid UTF-8 at byte 3)'
+    assert sniff(b'caf\xe9\n', fallback='cp1252').encoding == 'cp1252'
+    assert sniff(b'\x89PNG\r\n\x1a\n\0\0\0\rIHDR').encoding is None
+
+
+def test_sniff_file_reads_only_the_head(tmp_path):
+    path = tmp_path / 'big.ts'
+    path.write_bytes(b'a' * 10 + b'\xe9')
+    assert sniff_file(str(path), size=10).encoding == 'utf-8'
+    assert sniff_file(str(path)).encoding is None
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 1 << 16])
+def test_transcode(chunk_size):
+    data = b'\xff\xfe' + (TEXT + 'a\rb\r').encode('utf-16-le')
+    out = io.BytesIO()
+    assert transcode(io.BytesIO(data), out, sniff(data), chunk_size) == 5
+    assert out.getvalue() == '<Card className="é">\n  💾\n</Card>\na\nb\n'.encode()
+
+
+def test_transcode_file(tmp_path):
+    path = tmp_path / 'url.txt'
+    path.write_bytes(TEXT.encode('utf-16-le'))
+    os.chmod(path, 0o640)
+    assert transcode_file(str(path), dry_run=True).encoding == 'utf-16-le'
+    assert path.read_bytes() == TEXT.encode('utf-16-le')
+    assert transcode_file(str(path)).encoding == 'utf-16-le'
+    assert path.read_bytes() == TEXT.replace('\r\n', '\n').encode()
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['url.txt']
+    assert transcode_file(str(path)) is None
+
+
+def test_open_text(tmp_path):
+    path = tmp_path / 'bom.txt'
+    path.write_bytes(b'\xef\xbb\xbf' + TEXT.encode())
+    with open_text(str(path)) as f:
+        assert f.read() == TEXT.replace('\r\n', '\n')
+    path.write_bytes(b'\0\x01\0\0\x02')
+    with pytest.raises(UnicodeError):
+        open_text(str(path))
+
+
+def test_main(tmp_path, capsys):
+    (tmp_path / 'a.ts').write_bytes(b'\xef\xbb\xbfconst a = 1;\n')
+    (tmp_path / 'b.ts').write_bytes(b'const b = 1;\n')
+    (tmp_path / 'c.md').write_bytes(b'caf\xe9\n')
+    assert main([str(tmp_path), '--check']) == 1
+    out = capsys.readouterr().out
+    assert 'a.ts: utf-8, BOM, LF' in out and 'b.ts' not in out and 'c.md: unknown' in out
+    assert main([str(tmp_path), '--fallback', 'cp1252']) == 0
+    assert (tmp_path / 'a.ts').read_bytes() == b'const a = 1;\n'
+    assert (tmp_path / 'c.md').read_bytes() == 'café\n'.encode()
+    assert '2 file(s) transcoded' in capsys.readouterr().err
@@ -0,0 +1,63 @@
+import random
+
+from repair.engine import Replacer, replace_all
+
+
+def sequential(content, pairs):
+    """Leftmost-longest replacement, the slow way"""
+    table = {}
+    for old, new in pairs:
+        table.setdefault(old, new)
+    keys = sorted(table, key=len, reverse=True)
+    out = []
+    i = 0
+    while i < len(content):
+        key = next((k for k in keys if content.startswith(k, i)), None)
+        if key is None:
+            out.append(content[i])
+            i += 1
+        else:
+            out.append(table[key])
+            i += len(key)
+    return ''.join(out)
+
+
+def test_longest_match_wins():
+    replacer = Replacer([('ðŸ', '?'), ('ðŸ’¾', '💾'), ('ðŸ’', '!')])
+    assert replacer.sub('ðŸ’¾ ðŸ’ ðŸ') == ('💾 ! ?', {'ðŸ': 1, 'ðŸ’¾': 1, 'ðŸ’': 1})
+
+
+def test_leftmost_match_wins():
+    assert replace_all('abc', [('bc', 'X'), ('ab', 'Y')])[0] == 'Yc'
+
+
+def test_first_entry_wins():
+    replacer = Replacer([('â†’', '→'), ('â†’', '->')])
+    assert replacer.sub('a â†’ b') == ('a → b', {'â†’': 1})
+
+
+def test_empty_table_and_keys():
+    assert Replacer([]).sub('text') == ('text', {})
+    assert Replacer([('', 'x')]).sub('text') == ('text', {})
+    assert list(Replacer([]).finditer('text')) == []
+
+
+def test_bytes():
+    replacer = Replacer([(b'\xc3\xa2\xc2\x80\xc2\x94', '—'.encode()), (b'\xc3\xa2', b'?')])
+    assert replacer.is_bytes
+    data = b'a \xc3\xa2\xc2\x80\xc2\x94 b \xc3\xa2'
+    assert replacer.sub(data)[0] == 'a — b ?'.encode()
+    assert list(replacer.finditer(data)) == [(2, 8, b'\xc3\xa2\xc2\x80\xc2\x94'), (11, 13, b'\xc3\xa2')]
+
+
+def test_special_characters_are_literal():
+    assert replace_all('a.b (x)* [y]', [('.', '!'), ('(x)*', 'X'), ('[y]', 'Y')])[0] == 'a!b X Y'
+
+
+def test_same_as_sequential():
+    rng = random.Random(1)
+    alphabet = 'aÃâ€™ð'
+    for _ in range(300):
+        pairs = [(''.join(rng.choices(alphabet, k=rng.randint(1, 4))), str(n)) for n in range(6)]
+        content = ''.join(rng.choices(alphabet, k=30))
+        assert Replacer(pairs).sub(content)[0] == sequential(content, pairs)
@@ -0,0 +1,75 @@
+import shutil
+import subprocess
+
+import pytest
+
+from repair import cache, journal
+from repair.context import ContextIndex
+from repair.incremental import changed_lines, repair_incremental, repair_steps, repair_text, steps, widen
+from repair.rules import load_rules
+
+LINES = [f'const line{i} = "text {i}";\n' for i in range(100)]
+
+
+@pytest.fixture(autouse=True)
+def state_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', str(tmp_path / 'journal'))
+
+
+def test_widen():
+    assert widen([(10, 11), (2, 3), (14, 15)], 2, 16) == [(0, 5), (8, 16)]
+    assert widen([], 2, 10) == []
+
+
+def test_changed_lines():
+    base = ''.join(LINES).encode()
+    data = base.replace(b'text 5"', b'text five"').replace(LINES[50].encode(), b'')
+    assert changed_lines(base, data, ContextIndex(data, [])) == [(5, 6), (49, 50)]
+
+
+def test_steps_follow_the_registry():
+    rules = load_rules()
+    text = 'icon: "Ã°Å¸â€™Â¾", note: "ðŸ” "'
+    seen = [step for step, _, _ in repair_steps(text, rules)]
+    assert seen == steps(rules)
+    changes = {}
+    fixed, hits = repair_text(text, rules, changes)
+    assert fixed == 'icon: "💾", note: "🔍"' and hits
+    assert list(changes) == ['decode', 'residuals']
+    assert changes['decode'][0] == text and changes['residuals'][1] == fixed
+
+
+def test_no_baseline_repairs_the_whole_file(tmp_path, capsys):
+    path = tmp_path / 'data.ts'
+    path.write_text('icon: "ðŸ’¾"\n' + ''.join(LINES), encoding='utf-8')
+    assert repair_incremental(str(path)) == 1
+    assert path.read_text(encoding='utf-8').startswith('icon: "💾"\n')
+    assert 'repairing the whole file' in capsys.readouterr().out
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='needs git')
+def test_only_changed_windows(tmp_path, capsys):
+    # Old damage outside the edited window is left alone
+    path = tmp_path / 'data.ts'
+    lines = list(LINES)
+    lines[0] = 'icon: "ðŸ’¾"\n'
+    path.write_text(''.join(lines), encoding='utf-8')
+    git = ['git', '-C', str(tmp_path), '-c', 'user.name=t', '-c', 'user.email=t@t']
+    subprocess.run(git + ['init', '-q'], check=True)
+    subprocess.run(git + ['add', 'data.ts'], check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'base'], check=True)
+    lines[80] = 'next: "ðŸš€"\n'
+    path.write_text(''.join(lines), encoding='utf-8')
+
+    assert repair_incremental(str(path), dry_run=True) == 1
+    assert path.read_text(encoding='utf-8') == ''.join(lines)
+    assert repair_incremental(str(path), since='HEAD') == 1
+    text = path.read_text(encoding='utf-8')
+    assert text.startswith('icon: "ðŸ’¾"\n') and 'next: "🚀"\n' in text
+    assert len(journal.journals()) == 1
+
+    # The repaired text is the next baseline: nothing changed, nothing scanned
+    capsys.readouterr()
+    assert repair_incremental(str(path)) == 0
+    assert '0 window(s)' in capsys.readouterr().out
@@ -0,0 +1,81 @@
+import io
+import random
+
+import pytest
+
+from repair import journal
+from repair.journal import Batch, Journal, revert
+from repair.piece import PieceTable, diff_edits
+
+
+def run(before, steps):
+    """Journal of rewriting before through each (rule, text) step, and the result"""
+    batches = []
+    text = before
+    for rule, after in steps:
+        batches.append(Batch(rule, diff_edits(text, after)))
+        text = after
+    return Journal('f.tsx', journal._hash(before), journal._hash(text), batches, 0), text
+
+
+@pytest.mark.parametrize('n', [0, 1, 127, 128, 300, 2 ** 32 + 5])
+def test_varint_round_trip(n):
+    out = io.BytesIO()
+    journal._put(out, n)
+    data = out.getvalue()
+    assert len(data) == max(1, (n.bit_length() + 6) // 7)
+    reader = journal._Reader(data)
+    assert reader.varint() == n
+    assert reader.pos == len(data)
+
+
+def test_truncated_bytes_are_an_error():
+    out = io.BytesIO()
+    journal._put_bytes(out, b'abcdef')
+    with pytest.raises(ValueError):
+        journal._Reader(out.getvalue()[:-1]).bytes()
+
+
+def test_serialise_round_trip():
+    j, _ = run(b'a b c\nd e f\n', [('r1', b'a X c\nd e f\n'), ('r2', b'a X c\nd Y f\n')])
+    back = Journal.from_bytes(j.to_bytes())
+    assert (back.file, back.before, back.after, back.created) == (j.file, j.before, j.after, 0)
+    assert [(b.rule, b.edits) for b in back.batches] == [(b.rule, b.edits) for b in j.batches]
+
+
+def test_not_a_journal():
+    with pytest.raises(ValueError):
+        Journal.from_bytes(b'nope')
+
+
+def test_revert_one_rule_on_adjacent_lines():
+    before = b'icon: "a1"\nicon: "b1"\nicon: "c1"\n'
+    j, after = run(before, [('r1', b'icon: "a2"\nicon: "b2"\nicon: "c1"\n'),
+                            ('r2', b'icon: "a2"\nicon: "b2"\nicon: "c2"\n')])
+    data, reverted, conflicts = revert(j, after, {'r1'})
+    assert (data, reverted, conflicts) == (b'icon: "a1"\nicon: "b1"\nicon: "c2"\n', 2, 0)
+
+
+def test_revert_keeps_edits_a_later_rule_changed():
+    j, after = run(b'x = 1\n', [('r1', b'x = 2\n'), ('r2', b'x = 3\n')])
+    assert revert(j, after, {'r1'}) == (b'x = 3\n', 0, 1)
+
+
+def test_revert_whole_run_round_trip():
+    rng = random.Random(22)
+    words = [b'icon', b'"a"', b'"b"', b'\n', b' ', b'{', b'}']
+    for _ in range(500):
+        text = b''.join(rng.choices(words, k=rng.randint(0, 30)))
+        before = text
+        steps = []
+        for k in range(rng.randint(1, 4)):
+            table = PieceTable(text)
+            i = rng.randint(0, len(text))
+            remove = min(rng.randint(0, 4), len(text) - i)
+            table.splice(i, remove, b''.join(rng.choices(words, k=rng.randint(0, 3))))
+            text = table.getvalue()
+            steps.append((f'r{k}', text))
+        j, after = run(before, steps)
+        data, _, conflicts = revert(j, after)
+        assert conflicts == 0
+        assert data == before
@@ -0,0 +1,45 @@
+import io
+import os
+
+from repair.mapped import find_edits, mapped, repair_file, write_edits
+
+PAIRS = [('ðŸ’¾'.encode(), '💾'.encode()), ('Ã¢â¬Â¢'.encode(), '•'.encode())]
+TEXT = '<li>Ã¢â¬Â¢ one</li>\n<div>ðŸ’¾</div>\n<li>Ã¢â¬Â¢ two</li>\n'
+
+
+def test_edits_and_output(tmp_path):
+    path = tmp_path / 'f.tsx'
+    path.write_bytes(TEXT.encode())
+    with mapped(path) as buf:
+        edits = find_edits(buf, PAIRS)
+        out = io.BytesIO()
+        write_edits(buf, edits, out)
+    assert [(offset, size) for offset, size, _ in edits] == [
+        (4, len('Ã¢â¬Â¢'.encode())), (TEXT.encode().index('ðŸ’¾'.encode()), len('ðŸ’¾'.encode())),
+        (TEXT.encode().rindex('Ã¢'.encode()), len('Ã¢â¬Â¢'.encode()))]
+    assert out.getvalue().decode() == '<li>• one</li>\n<div>💾</div>\n<li>• two</li>\n'
+
+
+def test_keep_vetoes_edits(tmp_path):
+    path = tmp_path / 'f.tsx'
+    path.write_bytes(TEXT.encode())
+    with mapped(path) as buf:
+        edits = find_edits(buf, PAIRS, keep=lambda buf, offset: offset < buf.find(b'\n'))
+    assert edits == [(4, len('Ã¢â¬Â¢'.encode()), '•'.encode())]
+
+
+def test_repair_file(tmp_path):
+    path = tmp_path / 'f.tsx'
+    path.write_bytes(TEXT.encode())
+    os.chmod(path, 0o640)
+    assert len(repair_file(path, PAIRS)) == 3
+    assert path.read_text(encoding='utf-8') == '<li>• one</li>\n<div>💾</div>\n<li>• two</li>\n'
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert repair_file(path, PAIRS) == []
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.tsx'
+    path.write_bytes(b'')
+    assert repair_file(path, PAIRS) == []
+    assert os.listdir(tmp_path) == ['empty.tsx']
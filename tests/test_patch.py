@@ -0,0 +1,49 @@
+import pytest
+
+from repair.patch import AnchorError, Line, Patch, add_import, apply_patches
+
+LINES = [
+    'import { Cpu, HardDrive } from "lucide-react";',
+    'const items = [',
+    '  { icon: "🚀", title: "Launch" },',
+    '  { icon: "ðŸ’¾", title: "Save" },',
+    '];',
+]
+
+
+def test_clean_line_is_left_alone():
+    patch = Patch(Line('  { icon: "", title: "Launch" },'), '  { icon: "⚠️", title: "Launch" },')
+    lines, changed, problems = apply_patches(LINES, [patch])
+    assert (lines, changed, problems) == (LINES, [], [])
+
+
+def test_corrupted_line_is_patched():
+    patch = Patch.line('  { icon: "💾", title: "Save" },')
+    lines, changed, problems = apply_patches(LINES, [patch])
+    assert lines[3] == '  { icon: "💾", title: "Save" },'
+    assert changed == [(4, patch)] and problems == []
+
+
+def test_callable_gets_only_corrupted_targets():
+    lines = ['<li>🚀 Go</li>', '<li>ðŸš€ Go</li>']
+    seen = []
+    patch = Patch(Line('<li> Go</li>', every=True),
+                  lambda old: seen.append(old) or old.replace('ðŸš€', '🚀'))
+    lines, changed, _ = apply_patches(lines, [patch])
+    assert seen == ['<li>ðŸš€ Go</li>']
+    assert lines == ['<li>🚀 Go</li>', '<li>🚀 Go</li>']
+    assert [number for number, _ in changed] == [2]
+
+
+def test_missing_anchor_is_a_problem():
+    _, changed, problems = apply_patches(LINES, [Patch.line('  { icon: "🧠", title: "Think", extra: 1 },')])
+    assert changed == [] and len(problems) == 1
+
+
+def test_add_import():
+    lines = list(LINES)
+    assert add_import(lines, 'Rocket')
+    assert lines[0] == 'import { Cpu, HardDrive, Rocket } from "lucide-react";'
+    assert not add_import(lines, 'Rocket')
+    with pytest.raises(AnchorError):
+        add_import(lines, 'Link', 'react-router-dom')
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from repair.piece import CHUNK, PieceTable, _common_prefix, changed_span, diff_edits
+
+
+def apply(text, edits):
+    out = []
+    pos = 0
+    for offset, removed, inserted in edits:
+        assert text[offset:offset + len(removed)] == removed
+        out += (text[pos:offset], inserted)
+        pos = offset + len(removed)
+    out.append(text[pos:])
+    return text[:0].join(out)
+
+
+def mutate(rng, text, alphabet):
+    chars = list(text)
+    for _ in range(rng.randint(0, 6)):
+        i = rng.randint(0, len(chars))
+        op = rng.randrange(3)
+        if op == 0:
+            chars[i:i] = rng.choices(alphabet, k=rng.randint(1, 5))
+        elif op == 1:
+            del chars[i:i + rng.randint(1, 5)]
+        elif chars:
+            chars[min(i, len(chars) - 1)] = rng.choice(alphabet)
+    return ''.join(chars)
+
+
+def test_splice_and_apply():
+    table = PieceTable('hello world')
+    table.splice(0, 5, 'goodbye')
+    table.apply([(0, 0, '<'), (8, 5, 'there'), (13, 0, '>')])
+    assert table.getvalue() == '<goodbye there>'
+    assert len(table) == len('<goodbye there>')
+    assert table.slice(1, 8) == 'goodbye'
+
+
+def test_apply_rejects_overlapping_edits():
+    table = PieceTable('abcdef')
+    with pytest.raises(ValueError):
+        table.apply([(2, 2, 'x'), (3, 1, 'y')])
+
+
+def test_snapshot_restore():
+    table = PieceTable(b'abc')
+    state = table.snapshot()
+    table.splice(1, 1, b'XYZ')
+    assert table.getvalue() == b'aXYZc'
+    table.restore(state)
+    assert table.getvalue() == b'abc'
+
+
+def test_position_maps_original_offsets():
+    table = PieceTable('0123456789')
+    table.apply([(2, 2, ''), (6, 0, 'abc')])
+    assert table.getvalue() == '0145abc6789'
+    assert table.position(1) == 1
+    assert table.position(3) == 2       # inside the deletion
+    assert table.position(6) == 7       # after the insert
+    assert table.position(9) == 10
+
+
+def test_update_stores_changed_lines_only():
+    old = 'one\ntwo\nthree\nfour\n'
+    table = PieceTable(old)
+    table.update('one\nTWO\nthree\nFOUR\n')
+    assert table.net_edits() == [(4, 'two', 'TWO'), (14, 'four', 'FOUR')]
+
+
+def test_diff_edits_pairs_equal_blocks_line_by_line():
+    # Two changed lines next to each other are two edits, not one block
+    assert diff_edits('a1\nb1\n', 'a2\nb2\n') == [(1, '1', '2'), (4, '1', '2')]
+
+
+@pytest.mark.parametrize('kind', [str, bytes])
+def test_diff_edits_round_trip(kind):
+    rng = random.Random(22)
+    alphabet = 'ab \n'
+    for _ in range(3000):
+        old = ''.join(rng.choices(alphabet, k=rng.randint(0, 40)))
+        new = mutate(rng, old, alphabet)
+        if kind is bytes:
+            old, new = old.encode(), new.encode()
+        edits = diff_edits(old, new)
+        assert apply(old, edits) == new
+        assert all(a[0] + len(a[1]) <= b[0] for a, b in zip(edits, edits[1:]))
+        table = PieceTable(old)
+        table.apply((offset, len(removed), inserted) for offset, removed, inserted in edits)
+        assert table.getvalue() == new
+        assert apply(old, table.net_edits()) == new
+
+
+def test_changed_span_across_chunks():
+    rng = random.Random(19)
+    for _ in range(200):
+        old = ''.join(rng.choices('ab', k=rng.choice([CHUNK - 1, CHUNK, 3 * CHUNK + 5])))
+        new = mutate(rng, old, 'abc')
+        start = 0
+        while start < min(len(old), len(new)) and old[start] == new[start]:
+            start += 1
+        assert _common_prefix(old, new) == start
+        span_start, span_end = changed_span(old, new)
+        assert span_start == start
+        assert old[len(old) - (len(new) - span_end):] == new[span_end:]
@@ -0,0 +1,89 @@
+import os
+import textwrap
+
+import pytest
+
+from conftest import ROOT
+from repair import pipeline
+from repair.pipeline import Buffer, _reshaped, run_stage
+
+TEXT = ''.join(f'<li key="{i}">Ã¢â¬Â¢ item {i}</li>\n' for i in range(200))
+
+
+@pytest.fixture
+def buffer(tmp_path, monkeypatch):
+    # The scripts open pipeline.TARGET relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return Buffer(str(tmp_path / 'ModuleDetail.tsx'), TEXT)
+
+
+def stage(tmp_path, body):
+    script = tmp_path / 'fix_stage.py'
+    script.write_text(textwrap.dedent(body).format(target=pipeline.TARGET), encoding='utf-8')
+    return str(script)
+
+
+def test_reshaped():
+    assert _reshaped(TEXT, TEXT.replace('Ã¢â¬Â¢', '•')) is None
+    assert _reshaped(TEXT, TEXT.replace('\n', '\n\n')) == 'line count 201 -> 401'
+    assert _reshaped(TEXT, TEXT.replace('item', 'item ' * 5)).startswith('size ')
+
+
+def test_newline_doubling_is_flagged(tmp_path, buffer):
+    script = stage(tmp_path, '''
+        with open({target!r}, encoding='utf-8') as f:
+            lines = f.readlines()
+        with open({target!r}, 'w', encoding='utf-8') as f:
+            f.write('\\n'.join(lines))
+        ''')
+    result = run_stage(script, buffer)
+    assert result.changed and result.reshaped == 'line count 201 -> 400'
+
+
+def test_fix_specific_patterns_keeps_the_lines(buffer):
+    result = run_stage(os.path.join(ROOT, 'fix_specific_patterns.py'), buffer)
+    assert result.error is None and result.changed and result.reshaped is None
+    assert buffer.text == TEXT.replace('Ã¢â¬Â¢', '•')
+
+
+def test_stage_output_can_be_reconfigured(tmp_path, buffer):
+    script = stage(tmp_path, '''
+        import sys
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+        print('fixed 💾')
+        ''')
+    result = run_stage(script, buffer)
+    assert result.error is None and result.output == 'fixed 💾\n'
+
+
+def test_failing_stage_is_rolled_back(tmp_path, buffer):
+    script = stage(tmp_path, '''
+        with open({target!r}, 'w', encoding='utf-8') as f:
+            f.write('partial')
+        raise RuntimeError('boom')
+        ''')
+    result = run_stage(script, buffer)
+    assert result.error == 'RuntimeError: boom' and not result.changed
+    assert buffer.text == TEXT
+
+
+def test_stage_cannot_write_other_files(tmp_path, buffer):
+    script = stage(tmp_path, '''
+        with open('other.ts', 'w', encoding='utf-8') as f:
+            f.write('x')
+        ''')
+    result = run_stage(script, buffer)
+    assert result.error.startswith('PermissionError') and not (tmp_path / 'other.ts').exists()
+
+
+def test_fix_emojis_only_touches_the_target(tmp_path, buffer):
+    lessons = tmp_path / 'src' / 'data' / 'lessons.ts'
+    lessons.parent.mkdir(parents=True)
+    lessons.write_text('icon: "Ã°Å¸â€™Â¾"\n', encoding='utf-8')
+    target = tmp_path / pipeline.TARGET
+    target.parent.mkdir(parents=True)
+    target.write_text('stale\n', encoding='utf-8')
+    buffer.text = 'icon: "ðŸ’¾"\n'
+    result = run_stage(os.path.join(ROOT, 'fix_emojis.py'), buffer)
+    assert result.error is None and buffer.text == 'icon: "💾"\n'
+    assert lessons.read_text(encoding='utf-8') == 'icon: "Ã°Å¸â€™Â¾"\n'
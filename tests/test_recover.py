@@ -0,0 +1,111 @@
+import pytest
+
+from repair import cache, journal
+from repair.recover import EmojiIndex, _survives, build_index, main, normalise, recover_file, recover_text
+
+SOURCE = '''export const cards = [
+  {
+    title: "Accuracy targets",
+    icon: "🎯",
+  },
+  {
+    title: "Storage layers",
+    icon: "💾",
+  },
+  {
+    title: "Chart of results",
+    icon: "📊",
+  },
+  {
+    title: "Growth trends",
+    icon: "📈",
+  },
+];
+'''
+
+
+@pytest.fixture(autouse=True)
+def state_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', str(tmp_path / 'journal'))
+
+
+@pytest.fixture
+def index(tmp_path):
+    source = tmp_path / 'source.ts'
+    source.write_text(SOURCE, encoding='utf-8')
+    return build_index([str(source)])
+
+
+def test_normalise():
+    assert normalise('layers') == 'layer'
+    assert normalise('class') == 'class' and normalise('bus') == 'bus'
+
+
+def test_survives():
+    # 🎯 is F0 9F 8E AF: only the C1 bytes 9F and 8E may be dropped
+    assert _survives('🎯'.encode('utf-8'), b'\xf0\xaf')
+    assert not _survives('🎯'.encode('utf-8'), b'\xf0')
+    assert _survives('📊'.encode('utf-8'), b'\xf0')
+
+
+def test_build_index(index):
+    assert set(index.frequency) == {'🎯', '💾', '📊', '📈'}
+    assert index.compatible(b'\xf0\xaf') == ['🎯']
+    assert index.guess(b'\xf0\xaf', {})[0][0] == '🎯'
+    assert EmojiIndex().guess(b'\xf0', {}) == []
+
+
+def test_recover_text(index):
+    text = '  {\n    title: "Accuracy",\n    icon: "ð¯",\n  },\n'
+    fixed, guesses = recover_text(text, index)
+    assert fixed == text.replace('ð¯', '🎯')
+    [guess] = guesses
+    assert (guess.line, guess.stub, guess.emoji, guess.applied) == (3, 'ð¯', '🎯', True)
+    assert guess.confidence == 1.0
+
+    # 📊 and 📈 lose every continuation byte: the context picks one
+    text = '  {\n    title: "Charts",\n    icon: "ð",\n  },\n'
+    fixed, [guess] = recover_text(text, index)
+    assert guess.emoji == '📊' and guess.alternatives[0][0] == '📈'
+    assert 0.5 < guess.confidence < 1.0
+    assert recover_text(text, index, min_confidence=0.5)[0] == text.replace('ð', '📊')
+    assert recover_text(text, index, min_confidence=1.0)[0] == text
+
+
+def test_report_only_by_default(tmp_path, index, capsys):
+    path = tmp_path / 'lessons.ts'
+    text = '  {\n    title: "Accuracy",\n    icon: "ð¯",\n  },\n'
+    path.write_text(text, encoding='utf-8')
+    guesses, undecoded = recover_file(str(path), index)
+    assert [g.emoji for g in guesses] == ['🎯'] and undecoded == 0
+    assert path.read_text(encoding='utf-8') == text
+
+    assert recover_file(str(path), index, apply=True)[0][0].applied
+    assert path.read_text(encoding='utf-8') == text.replace('ð¯', '🎯')
+    assert len(journal.journals()) == 1
+
+
+def test_undecoded_files_are_not_written(tmp_path, index):
+    path = tmp_path / 'lessons.ts'
+    text = 'title: "Accuracy", icon: "ð¯", note: "ðŸ’¾"\n'
+    path.write_text(text, encoding='utf-8')
+    guesses, undecoded = recover_file(str(path), index, apply=True)
+    assert undecoded and guesses[0].applied
+    assert path.read_text(encoding='utf-8') == text
+
+
+def test_apply_needs_min_confidence(tmp_path, capsys):
+    source = tmp_path / 'source.ts'
+    source.write_text(SOURCE, encoding='utf-8')
+    path = tmp_path / 'lessons.ts'
+    text = 'title: "Accuracy", icon: "ð¯"\n'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(SystemExit):
+        main([str(path), '--source', str(source), '--apply'])
+    assert '--min-confidence' in capsys.readouterr().err
+    assert main([str(path), '--source', str(source)]) == 0
+    assert 'would be 🎯' in capsys.readouterr().out
+    assert path.read_text(encoding='utf-8') == text
+    assert main([str(path), '--source', str(source), '--apply', '--min-confidence', '0.5']) == 0
+    assert path.read_text(encoding='utf-8') == text.replace('ð¯', '🎯')
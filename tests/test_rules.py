@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from repair import cache, rules
+from repair.rules import analyse, line_span, load_rules, sre_parse
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def registry(tmp_path, *specs):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([dict({'group': 'g', 'replace': ''}, **spec) for spec in specs]),
+                    encoding='utf-8')
+    return load_rules(str(path))
+
+
+def span(pattern, flags=0):
+    return line_span(sre_parse.parse(pattern, flags), flags)
+
+
+def test_analyse():
+    assert analyse(r'icon:[ \t]*"Ã°Å¸â€™') == ('icon:', '"Ã°Å¸â€™')
+    assert analyse(r'(<div[^>]*>)[^<]*Ã[^<]*?(</div>)') == ('<div', '</div>')
+    assert analyse('abc', 2) == ('', '')
+
+
+def test_line_span():
+    assert span(r'icon:[ \t]*"x"') == 0
+    assert span(r'a\nb\n?') == 2
+    assert span(r'"[^"]*"') is None
+    assert span(r'(a)\1') is None
+    assert span('.*', 0) == 0 and span('.*', 16) is None
+
+
+def test_registry(tmp_path):
+    ruleset = registry(tmp_path,
+                       {'id': 'bullet', 'pattern': 'Ã¢â¬Â¢', 'replace': '•', 'message': 'fixed {count}'},
+                       {'id': 'js', 'pattern': r'[\u{1F300}]'},
+                       {'id': 'wide', 'pattern': r'<ul>[^<]*</ul>', 'context': 2})
+    assert ruleset.groups == ['g']
+    assert [rule_id for rule_id, _ in ruleset.errors] == ['js']
+    assert 'JavaScript syntax' in ruleset.errors[0][1]
+    assert ruleset.context == 2 and ruleset.unbounded == []
+    reports = []
+    content, hits = ruleset.apply('<li>Ã¢â¬Â¢ a</li>', 'g', report=reports.append)
+    assert content == '<li>• a</li>' and hits == {'bullet': 1, 'js': 0, 'wide': 0}
+    assert reports == ['fixed 1', "⚠️  Skipped rule 'js': " + ruleset.errors[0][1]]
+
+
+def test_analysis_is_cached(tmp_path, monkeypatch):
+    registry(tmp_path, {'id': 'a', 'pattern': 'x'})
+    monkeypatch.setattr(rules, '_analyse_all', lambda specs: pytest.fail('analysed again'))
+    assert registry(tmp_path, {'id': 'a', 'pattern': 'x'}).rules[0].trigger == 'x'
+
+
+def test_span_rules_stay_in_their_spans(tmp_path):
+    ruleset = registry(tmp_path, {'id': 'text', 'pattern': r'Ã[^"]*', 'replace': '?',
+                                  'spans': ['string', 'jsx_text']})
+    source = 'const a = "Ãx"; // Ãx\nconst b = <p>Ãy</p>;\n'
+    assert ruleset.apply(source, 'g', report=None, tsx=True)[0] == (
+        'const a = "?"; // Ãx\nconst b = <p>?</p>;\n')
+    # A window or a data file: the rule sees everything
+    assert ruleset.apply(source, 'g', report=None)[0] == 'const a = "?"; // ?'
+
+
+def test_unknown_span_kind(tmp_path):
+    ruleset = registry(tmp_path, {'id': 'a', 'pattern': 'x', 'spans': ['strings']})
+    assert ruleset.errors == [('a', "unknown span kind 'strings'")]
+
+
+def test_registry_loads():
+    ruleset = load_rules()
+    assert ruleset.rules and not ruleset.errors
+    assert len({rule.id for rule in ruleset.rules}) == len(ruleset.rules)
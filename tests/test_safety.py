@@ -0,0 +1,63 @@
+import glob
+import os
+
+import pytest
+
+from conftest import ROOT
+from repair import budgeted, safety
+
+
+def kinds(pattern, flags=0):
+    return [hazard.kind for hazard in safety.hazards(pattern, flags)]
+
+
+def test_hazards():
+    assert kinds(r'(a+)*b') == ['nested']
+    assert kinds(r'(<div[^>]*>)[^<]*Ã[^<]*?(</div>)') == ['adjacent']
+    assert kinds(r'(icon:\s*")[^"]*(")') == []
+    assert kinds(r'<span>[^<]*</span>') == []
+
+
+def test_js_escape():
+    report = safety.check('rules.json', 'r', r'[\u{1F300}-\u{1F5FF}]', 0, 0.5, 256)
+    assert [hazard.kind for hazard in report.hazards] == ['js-escape'] * 2 and not report.ok
+    assert safety.js_escapes(r'\u{1F300}') == [(r'\u{1F300}', r'\U0001F300')]
+
+
+def test_unbudgeted_hazard_fails():
+    pattern = r'(<div[^>]*>)[^<]*Ã[^<]*?(</div>)'
+    assert safety.check('fix.py', 'line 1', pattern, 0, 0.5, 256).ok
+    assert not safety.check('fix.py', 'line 1', pattern, 0, 0.5, 256, budgeted=False).ok
+    assert safety.check('fix.py', 'line 1', '<div>', 0, 0.5, 256, budgeted=False).ok
+
+
+def test_script_patterns(tmp_path):
+    script = tmp_path / 'fix_x.py'
+    script.write_text('import re\n'
+                      'from repair import budgeted\n'
+                      'P = r"[^<]*Ã[^<]*?<"\n'
+                      'a = re.sub(P, "", s, flags=re.DOTALL)\n'
+                      'b = budgeted.findall(r"x+y", s)\n', encoding='utf-8')
+    assert safety.script_patterns(str(script)) == [
+        ('line 4', '[^<]*Ã[^<]*?<', 2 ** 4, False), ('line 5', 'x+y', 0, True)]
+
+
+def test_scripts_run_hazards_through_the_budget():
+    for file_path in glob.glob(os.path.join(ROOT, 'fix_*.py')):
+        for name, pattern, flags, is_budgeted in safety.script_patterns(file_path):
+            assert is_budgeted or not safety.hazards(pattern, flags), (file_path, name)
+
+
+def test_budgeted_calls_match_re():
+    text = '<div className="text-4xl">Ã°Å¸â€™Â¾</div>'
+    pattern = r'(<div[^>]*text-4xl[^>]*>)[^<]*Ã[^<]*?(</div>)'
+    assert budgeted.sub(pattern, r'\1💾\2', text) == '<div className="text-4xl">💾</div>'
+    assert budgeted.subn(pattern, lambda m: m.group(1), text) == ('<div className="text-4xl">', 1)
+    assert budgeted.findall(pattern, text) == [('<div className="text-4xl">', '</div>')]
+    assert budgeted.search(pattern, text).start() == 0
+
+
+def test_budgeted_call_over_budget(monkeypatch):
+    monkeypatch.setattr(budgeted, 'BUDGET_MS', 50)
+    with pytest.raises(TimeoutError):
+        budgeted.sub(r'(a+)+$', '', 'a' * 40 + 'b')
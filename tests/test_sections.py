@@ -0,0 +1,75 @@
+import pytest
+
+from repair import cache
+from repair.sections import Section, SectionMap, find_sections, header_edited
+
+SOURCE = '''const getModule1Sections = () => {
+  return [{ title: "RAM" }];
+};
+const getModule2Sections = () => {
+  return [{ title: "}" }];
+};
+export default function ModuleDetail() {
+  return (
+    <div>
+      {moduleId === 1 && module1Sections && topicId === "3" && (
+        <p>Launch {"{"}</p>
+      )}
+      {moduleId === 2 ? (
+        <p>two</p>
+      ) : moduleId === 1 && topicId === "2" ? (
+        <p>one</p>
+      ) : null}
+    </div>
+  );
+}
+'''
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def test_find_sections():
+    sections = find_sections(SOURCE)
+    assert [(s.module, s.topic) for s in sections] == [(1, None), (2, None), (1, '3'), (1, '2')]
+    for s in sections:
+        assert SOURCE[s.end - 1] in '})'
+    # The brace inside a string does not close getModule2Sections
+    assert SOURCE[sections[1].start:sections[1].end].endswith('}];\n}')
+
+
+def test_topic_at():
+    sections = SectionMap.from_source(SOURCE)
+    assert sections.topic_at(SOURCE.index('RAM')) == (1, None)
+    assert sections.topic_at(SOURCE.index('Launch')) == (1, '3')
+    assert sections.topic_at(SOURCE.index('one')) == (1, '2')
+    assert sections.topic_at(SOURCE.index('two')) == (None, None)
+    assert sections.module_at(SOURCE.index('export')) is None
+
+
+def test_innermost_section_wins():
+    sections = SectionMap([Section(0, 100, 1, None), Section(10, 20, 1, 'a'), Section(30, 40, 2, None)])
+    assert [sections.topic_at(offset) for offset in (5, 10, 19, 20, 35, 40, 100)] == [
+        (1, None), (1, 'a'), (1, 'a'), (1, None), (2, None), (1, None), (None, None)]
+
+
+def test_bytes_give_byte_offsets():
+    data = SOURCE.replace('"RAM"', '"💾 RAM"').encode()
+    sections = SectionMap.from_source(data)
+    assert sections.topic_at(data.index(b'Launch')) == (1, '3')
+
+
+def test_shift_and_header_edited():
+    sections = SectionMap.from_source(SOURCE)
+    offset = SOURCE.index('<p>Launch')
+    new = SOURCE[:offset] + 'xxxx' + SOURCE[offset:]
+    assert not header_edited(SOURCE, new, offset, offset, offset + 4)
+    sections.shift(offset, 4)
+    assert sections.topic_at(new.index('one')) == (1, '2')
+    assert sections.topic_at(new.index('two')) == (None, None)
+
+    offset = SOURCE.index('topicId === "3"') + len('topicId === "')
+    new = SOURCE[:offset] + '4' + SOURCE[offset + 1:]
+    assert header_edited(SOURCE, new, offset, offset + 1, offset + 1)
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from repair import cache, journal
+from repair.incremental import Spans, repair_incremental, repair_text
+from repair.rules import load_rules
+from repair.stream import repair_stream
+from repair.watch import Repairer
+
+# The template literal is repaired; the comment is not a span rules may touch
+SOURCE = 'const k = `⚠️âxÃy`; // ⚠️âxÃy\n'
+REPAIRED = 'const k = `⚠️`; // ⚠️âxÃy\n'
+
+
+@pytest.fixture(autouse=True)
+def state_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', str(tmp_path / 'journal'))
+
+
+@pytest.fixture(scope='module')
+def rules():
+    return load_rules()
+
+
+def test_whole_file_pass_confines_span_rules(rules):
+    text = SOURCE
+    for group in rules.groups:
+        text, _ = rules.apply(text, group, report=lambda message: None, tsx=True)
+    assert text == REPAIRED
+
+
+def test_window_spans(rules):
+    data = ('const a = "é";\n' + SOURCE).encode()
+    start = data.index(b'\n') + 1
+    spans = Spans(data).window(data, start, len(data))
+    text = data[start:].decode()
+    assert [kind for kind, _, _ in spans] == ['code', 'template', 'code', 'comment', 'code']
+    assert text[spans[1][1]:spans[1][2]] == '⚠️âxÃy'
+    assert repair_text(text, rules, spans=spans)[0] == REPAIRED
+
+
+def test_windows_without_spans_see_everything(rules):
+    assert repair_text(SOURCE, rules)[0] != REPAIRED
+
+
+def test_incremental(tmp_path, capsys):
+    path = tmp_path / 'Lesson.tsx'
+    path.write_text(SOURCE, encoding='utf-8')
+    repair_incremental(str(path))
+    assert path.read_text(encoding='utf-8') == REPAIRED
+
+
+def test_watch(tmp_path, capsys):
+    path = tmp_path / 'Lesson.tsx'
+    path.write_text('const a = 1;\n', encoding='utf-8')
+    repairer = Repairer()
+    repairer.prime([str(path)])
+    # A mis-decoded run is what sends a change to the repair
+    path.write_text('const a = 1;\n' + SOURCE + 'const s = "Ã©";\n', encoding='utf-8')
+    assert repairer.repair(str(path))
+    assert path.read_text(encoding='utf-8') == 'const a = 1;\n' + REPAIRED + 'const s = "é";\n'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 4096])
+def test_stream(rules, chunk_size):
+    # Long enough that the stream cuts it, with a template literal open across cuts
+    text = ''.join(f'const a{i} = 1;\n' for i in range(60))
+    text = (text + 'const t = `\n' + text + '`;\n' + SOURCE) * 3
+    out = io.BytesIO()
+    repair_stream(io.BytesIO(text.encode()), out, rules, chunk_size, tsx=True)
+    assert out.getvalue().decode() == text.replace(SOURCE, REPAIRED)
@@ -0,0 +1,62 @@
+import io
+import os
+import random
+
+import pytest
+
+from repair.incremental import repair_text
+from repair.rules import load_rules
+from repair.stream import _safe_cut, main, repair_file_streaming, repair_stream
+
+PIECES = ['const a = 1;\n', '  <li>plain</li>\n', '\n', 'icon: "ðŸ’¾",\n', 'note: "ðŸ” "\n',
+          'x = "Ã°Å¸â€™Â¾";\n', 'é', '💾', 'Ã', '\xff']
+
+
+@pytest.fixture(scope='module')
+def rules():
+    return load_rules()
+
+
+def corpus(seed, size):
+    rng = random.Random(seed)
+    return ''.join(rng.choices(PIECES, weights=[30, 30, 10, 3, 2, 2, 1, 1, 1, 1], k=size))
+
+
+def stream(data, rules, chunk_size, tsx=False):
+    out = io.BytesIO()
+    hits = repair_stream(io.BytesIO(data), out, rules, chunk_size, tsx)
+    return out.getvalue(), hits
+
+
+def test_safe_cut():
+    text = 'é\na\nb\nc\nd\né\n'
+    assert _safe_cut(text, len(text), 2) == text.index('c')
+    assert _safe_cut(text, len(text), 3) == 0
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64, 1000, 1 << 20])
+def test_output_does_not_depend_on_chunk_size(rules, chunk_size):
+    for seed in range(3):
+        # Invalid UTF-8 passes through untouched
+        data = corpus(seed, 400).encode('utf-8', 'surrogateescape') + b'\xf0\x9f'
+        whole = repair_text(data.decode('utf-8', 'surrogateescape'), rules)
+        assert stream(data, rules, chunk_size) == (whole[0].encode('utf-8', 'surrogateescape'),
+                                                   whole[1])
+
+
+def test_in_place(tmp_path, capsys):
+    path = tmp_path / 'data.ts'
+    path.write_text('icon: "ðŸ’¾"\n' * 1000, encoding='utf-8')
+    os.chmod(path, 0o640)
+    assert repair_file_streaming(str(path), chunk_size=256) == 1000
+    assert path.read_text(encoding='utf-8') == 'icon: "💾"\n' * 1000
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['data.ts']
+
+
+def test_main(tmp_path, capsys):
+    source = tmp_path / 'in.ts'
+    source.write_text('icon: "ðŸ’¾"\n', encoding='utf-8')
+    assert main([str(source), '-o', str(tmp_path / 'out.ts')]) == 0
+    assert (tmp_path / 'out.ts').read_text(encoding='utf-8') == 'icon: "💾"\n'
+    assert capsys.readouterr().err == '1 repair(s)\n'
@@ -0,0 +1,82 @@
+import random
+
+from repair.piece import PieceTable
+from repair.structure import Structure
+
+SOURCE = '''import { Rocket } from "lucide-react";
+
+const pattern = /a\\/b[/]/g;
+export function Card({ items }) {
+  const label = `total ${items.length} of ${count(items, (x) => x / 2)}`;
+  // a comment with "quotes" and <tags>
+  return (
+    <div className="p-4">
+      {items.map((item) => (
+        <li key={item.id}>{item.icon} {item.name}</li>
+      ))}
+      <Rocket className="mr-2 h-5 w-5 inline" />
+      <p>{a < b ? "less" : 'more'}</p>
+    </div>
+  );
+}
+'''
+PIECES = ['"', "'", '`', '{', '}', '(', ')', '[', ']', '<div>', '</div>', '<br />', '/', '/x/',
+          '/*', '*/', '//', '\n', ' ', 'x', '${', 'return (']
+
+
+def test_reports_wrong_and_unclosed():
+    assert Structure('<Card></div>').errors == [(6, '</div> closes <Card>')]
+    assert Structure('let b = [1, 2;\n').errors == [(8, "unclosed '['")]
+    assert Structure(SOURCE).errors == []
+
+
+def test_incremental_matches_full_scan():
+    rng = random.Random(24)
+    for _ in range(300):
+        text = SOURCE
+        structure = Structure(text, every=64)
+        for _ in range(rng.randint(1, 4)):
+            edits = []
+            pos = 0
+            for _ in range(rng.randint(1, 3)):
+                offset = rng.randint(pos, len(text))
+                removed = text[offset:offset + rng.randint(0, 6)]
+                inserted = ''.join(rng.choices(PIECES, k=rng.randint(0, 3)))
+                if rng.random() < 0.1:
+                    inserted = 'x' * 200
+                edits.append((offset, removed, inserted))
+                pos = offset + len(removed)
+            table = PieceTable(text)
+            table.apply((offset, len(removed), inserted) for offset, removed, inserted in edits)
+            text = table.getvalue()
+            structure.update(text, edits)
+            assert structure.errors == Structure(text, every=64).errors
+
+
+def test_one_edit_relexes_only_around_it():
+    text = SOURCE * 20
+    structure = Structure(text, every=64)
+    offset = text.index('p-4')
+    relexed = structure.update(text[:offset] + 'p-8' + text[offset + 3:], [(offset, 'p-4', 'p-8')])
+    assert 0 < relexed < 4 * 64
+
+
+def test_edit_can_end_a_token_that_failed_before_it():
+    # The stray quote makes a bad JSX tag; a quote near the end closes it
+    text = SOURCE.replace('<div className', "<div 'className")
+    structure = Structure(text, every=64)
+    assert structure.errors
+    offset = text.rindex('\n}')
+    new = text[:offset] + '\'<Rocket className="x" />' + text[offset:]
+    structure.update(new, [(offset, '', '\'<Rocket className="x" />')])
+    assert structure.errors == Structure(new, every=64).errors
+
+
+def test_edit_can_end_a_regex_literal_earlier_on_its_line():
+    text = 'const a = 1;\n' * 20 + 'y = /a' + ' ' * 100 + '( ) x;\nconst b = 2;\n'
+    structure = Structure(text, every=16)
+    assert structure.errors == []
+    offset = text.index('( ) x') + 1
+    new = text[:offset] + '/' + text[offset:]
+    structure.update(new, [(offset, '', '/')])
+    assert structure.errors == Structure(new, every=16).errors == [(offset + 2, "unmatched ')'")]
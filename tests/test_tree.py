@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from repair import journal
+from repair.tree import find_files, repair_tree
+
+FILES = {
+    'ascii.ts': 'export const a = 1;\n'.encode(),
+    'clean.tsx': 'const icon = "💾";\n'.encode(),
+    'pages/broken.tsx': 'const icon = "ðŸ’¾"; // â€¢\n'.encode(),
+    'data/lossy.json': '{"icon": "ðŸ” "}\n'.encode(),
+    'data/invalid.md': b'caf\xe9\n',
+    'data/utf16.ts': '\ufeffconst é = 1;\n'.encode('utf-16-le'),
+    'node_modules/dep/index.ts': 'const icon = "ðŸ’¾";\n'.encode(),
+    'script.py': 'icon = "ðŸ’¾"\n'.encode(),
+}
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', str(tmp_path / 'journal'))
+    src = tmp_path / 'src'
+    for name, data in FILES.items():
+        path = src / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return src
+
+
+def statuses(records, root):
+    return {record['file'][len(str(root)) + 1:]: record['status'] for record in records}
+
+
+def test_find_files(root):
+    assert [path[len(str(root)) + 1:] for path in find_files(str(root))] == [
+        'ascii.ts', 'clean.tsx', 'data/invalid.md', 'data/lossy.json', 'data/utf16.ts',
+        'pages/broken.tsx']
+
+
+def test_repair_tree(root):
+    report = io.StringIO()
+    records = repair_tree(str(root), report, jobs=1)
+    assert statuses(records, root) == {
+        'ascii.ts': 'ascii', 'clean.tsx': 'clean', 'data/invalid.md': 'invalid-utf8',
+        'data/lossy.json': 'repaired', 'data/utf16.ts': 'not-utf8', 'pages/broken.tsx': 'repaired'}
+    assert [json.loads(line) for line in report.getvalue().splitlines()] == records
+    assert (root / 'pages/broken.tsx').read_text(encoding='utf-8') == 'const icon = "💾"; // •\n'
+    assert (root / 'data/lossy.json').read_text(encoding='utf-8') == '{"icon": "🔍"}\n'
+    assert (root / 'node_modules/dep/index.ts').read_bytes() == FILES['node_modules/dep/index.ts']
+    assert len(journal.journals()) == 2
+
+
+def test_dry_run_in_parallel(root):
+    records = repair_tree(str(root), io.StringIO(), dry_run=True, jobs=2)
+    assert statuses(records, root)['pages/broken.tsx'] == 'would-repair'
+    assert (root / 'pages/broken.tsx').read_bytes() == FILES['pages/broken.tsx']
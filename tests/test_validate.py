@@ -0,0 +1,51 @@
+import io
+import random
+
+import pytest
+
+from repair.validate import iter_invalid, lossy_change
+
+
+def reference(data):
+    """(offset, bytes, line, col) of every invalid sequence, from a whole-buffer decode"""
+    found = []
+    pos = 0
+    while True:
+        try:
+            data[pos:].decode('utf-8')
+            return found
+        except UnicodeDecodeError as e:
+            start, end = pos + e.start, pos + e.end
+            head = data[:start]
+            line = head.count(b'\n') + 1
+            # Every invalid byte is one column
+            col = len(head[head.rfind(b'\n') + 1:].decode('utf-8', 'surrogateescape')) + 1
+            found.append((start, data[start:end], line, col))
+            pos = end
+
+
+def invalid(data, chunk_size):
+    return [(i.offset, i.data, i.line, i.col) for i in iter_invalid(io.BytesIO(data), 'f', chunk_size)]
+
+
+def test_reports_offset_line_and_column():
+    data = 'é\nabð'.encode('utf-8') + b'\xff' + '💾x'.encode('utf-8')
+    found = list(iter_invalid(io.BytesIO(data), 'f.ts'))
+    assert [(i.offset, i.line, i.col, i.data) for i in found] == [(7, 2, 4, b'\xff')]
+    assert str(found[0]).startswith('f.ts:2:4: byte 7: ')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_same_findings_for_any_block_size(chunk_size):
+    rng = random.Random(chunk_size)
+    pieces = [b'a', b'\n', 'é'.encode(), '💾'.encode(), b'\xf0\x9f', b'\xff', b'\x80', b'\xe2\x82',
+              b'\xed\xa0\x80', b'\xc0\xaf']
+    for _ in range(300):
+        data = b''.join(rng.choices(pieces, k=rng.randint(0, 25)))
+        assert invalid(data, chunk_size) == reference(data)
+
+
+def test_lossy_change():
+    assert lossy_change('a\udcffb', 'a�b')
+    assert lossy_change('a\udcffb', 'ab')
+    assert lossy_change('a\udcffb', 'a\udcffc') is None
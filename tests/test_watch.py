@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from repair import cache, journal
+from repair.watch import Debouncer, Repairer, _line_bounds
+
+LINES = ''.join(f'const line{i} = "text {i}";\n' for i in range(40))
+
+
+@pytest.fixture(autouse=True)
+def state_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', str(tmp_path / 'journal'))
+
+
+@pytest.fixture
+def repairer():
+    return Repairer()
+
+
+def test_line_bounds():
+    data = b'a\nb\nc\nd\ne\n'
+    assert _line_bounds(data, 4, 5, 0) == (4, 6)
+    assert _line_bounds(data, 4, 5, 1) == (2, 8)
+    assert _line_bounds(data, 0, 10, 3) == (0, 10)
+
+
+def test_repairs_only_the_edit(tmp_path, repairer, capsys):
+    path = tmp_path / 'data.ts'
+    old_damage = 'icon: "ðŸ’¾"\n'
+    path.write_text(old_damage + LINES, encoding='utf-8')
+    repairer.prime([str(path)])
+    text = old_damage + LINES.replace('"text 30"', '"ðŸš€ text 30"')
+    path.write_text(text, encoding='utf-8')
+    assert repairer.repair(str(path)) == 1
+    assert path.read_text(encoding='utf-8') == text.replace('ðŸš€', '🚀')
+    assert len(journal.journals()) == 1
+    # Its own write comes back as an event and is ignored
+    assert repairer.repair(str(path)) == 0
+
+
+def test_existing_damage_is_only_reported(tmp_path, repairer, capsys):
+    path = tmp_path / 'data.ts'
+    text = 'icon: "ðŸ’¾"\n' + LINES
+    path.write_text(text, encoding='utf-8')
+    assert repairer.repair(str(path), dry_run=True) == 1
+    assert path.read_text(encoding='utf-8') == text
+    assert 'repair(s) pending' in capsys.readouterr().out
+    assert repairer.repair(str(path)) == 0
+
+
+def test_clean_edits_and_missing_files(tmp_path, repairer):
+    path = tmp_path / 'data.ts'
+    path.write_text(LINES, encoding='utf-8')
+    repairer.prime([str(path)])
+    path.write_text(LINES + 'const name = "Zoë";\n', encoding='utf-8')
+    assert repairer.repair(str(path)) == 0
+    path.unlink()
+    assert repairer.repair(str(path)) == 0 and str(path) not in repairer.seen
+
+
+def test_debouncer_flushes_once():
+    flushed = []
+    done = threading.Event()
+    debouncer = Debouncer(0.05, lambda paths: flushed.append(paths) or done.set())
+    for path in ['b.ts', 'a.ts', 'b.ts']:
+        debouncer.touch(path)
+    assert done.wait(2)
+    assert flushed == [['a.ts', 'b.ts']]